@@ -0,0 +1,3 @@
+#!/bin/bash
+
+uv run python -m harness.bench "$@"
\ No newline at end of file
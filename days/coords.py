@@ -0,0 +1,162 @@
+"""Grid positions packed into plain ints, for hot loops that would otherwise
+make a `Vec2` per cell.
+
+A `Grid` packs (x, y) as `(y + border) * stride + x + border`, where the
+stride is the width plus a border on each side. With a border of one cell,
+adding one of `neighbours` to any position on the grid lands on its
+neighbour or on the border, never wrapping onto another row. With no
+border the packing is the plain `y * width + x` that day12's bitmasks use.
+
+Coordinates without known bounds, such as day9's, are packed by
+`pack_pair` into the two 32-bit halves of an int64: x in the low half, y in
+the high one, each offset by `BIAS` so negative values pack too.
+
+`Vec2` stays at the edges: `from_vec2` and `to_vec2` convert one position,
+and `pack_array`/`unpack_array` convert (n, 2) arrays of them with NumPy.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable
+
+from days.lazy import lazy_import
+from demapples.vec import Vec2
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+BIAS = 1 << 31
+LOW = (1 << 32) - 1
+HIGH = LOW << 32
+
+ORTHOGONAL = ((0, -1), (-1, 0), (1, 0), (0, 1))
+DIAGONAL = ((-1, -1), (1, -1), (-1, 1), (1, 1))
+
+
+@dataclass(frozen=True)
+class Grid:
+    """
+    >>> grid = Grid(3, 2, border=1)
+    >>> grid.stride, grid.size, grid.pack(0, 0), grid.unpack(grid.pack(2, 1))
+    (5, 20, 6, (2, 1))
+    >>> sorted(grid.unpack(grid.pack(1, 0) + offset) for offset in grid.neighbours)
+    [(0, -1), (0, 0), (0, 1), (1, -1), (1, 1), (2, -1), (2, 0), (2, 1)]
+    """
+
+    width: int
+    height: int
+    border: int = 0
+
+    @classmethod
+    def around(cls, points: Iterable[Vec2], border: int = 1) -> Grid:
+        """The smallest grid from the origin that holds every one of `points`,
+        which must not be negative."""
+
+        width = height = 0
+        for point in points:
+            width, height = max(width, point.x + 1), max(height, point.y + 1)
+        return cls(width, height, border)
+
+    @property
+    def stride(self) -> int:
+        return self.width + 2 * self.border
+
+    @property
+    def size(self) -> int:
+        """How many packed positions there are, border included."""
+
+        return self.stride * (self.height + 2 * self.border)
+
+    def pack(self, x: int, y: int) -> int:
+        return (y + self.border) * self.stride + x + self.border
+
+    def unpack(self, packed: int) -> tuple[int, int]:
+        y, x = divmod(packed, self.stride)
+        return x - self.border, y - self.border
+
+    def from_vec2(self, point: Vec2) -> int:
+        return self.pack(point.x, point.y)
+
+    def to_vec2(self, packed: int) -> Vec2:
+        return Vec2(*self.unpack(packed))
+
+    def offset(self, dx: int, dy: int) -> int:
+        """What to add to a packed position to move it by (dx, dy)."""
+
+        return dy * self.stride + dx
+
+    @cached_property
+    def neighbours(self) -> tuple[int, ...]:
+        """Offsets of the eight surrounding positions. Only safe to add to
+        positions on the grid if it has a border."""
+
+        return tuple(self.offset(dx, dy) for dx, dy in ORTHOGONAL + DIAGONAL)
+
+    @cached_property
+    def orthogonal(self) -> tuple[int, ...]:
+        return tuple(self.offset(dx, dy) for dx, dy in ORTHOGONAL)
+
+    def pack_array(self, xy: NDArray[np.integer]) -> NDArray[np.int64]:
+        """
+        >>> Grid(3, 2, border=1).pack_array(np.array([[0, 0], [2, 1]])).tolist()
+        [6, 13]
+        """
+        xy = np.asarray(xy, dtype=np.int64)
+        return (xy[..., 1] + self.border) * self.stride + xy[..., 0] + self.border
+
+    def unpack_array(self, packed: NDArray[np.integer]) -> NDArray[np.int64]:
+        """
+        >>> Grid(3, 2, border=1).unpack_array(np.array([6, 13])).tolist()
+        [[0, 0], [2, 1]]
+        """
+        y, x = np.divmod(np.asarray(packed, dtype=np.int64), self.stride)
+        return np.stack((x, y), axis=-1) - self.border
+
+
+def pack_pair(x: int, y: int) -> int:
+    """
+    >>> unpack_pair(pack_pair(-3, 7))
+    (-3, 7)
+    """
+    return (y + BIAS) << 32 | (x + BIAS)
+
+
+def unpack_pair(packed: int) -> tuple[int, int]:
+    return (packed & LOW) - BIAS, (packed >> 32) - BIAS
+
+
+def swap_corners(p: int, q: int) -> tuple[int, int]:
+    """The other two corners of the rectangle with opposite corners `p` and
+    `q`, packed by `pack_pair`: (p.x, q.y) and (q.x, p.y).
+
+    >>> [unpack_pair(c) for c in swap_corners(pack_pair(1, 2), pack_pair(4, 6))]
+    [(1, 6), (4, 2)]
+    """
+    return q & HIGH | p & LOW, p & HIGH | q & LOW
+
+
+def pack_pairs(xy: NDArray[np.integer]) -> NDArray[np.uint64]:
+    """`pack_pair` over an (n, 2) array.
+
+    >>> pack_pairs(np.array([[-3, 7], [1, 2]])).tolist() == [pack_pair(-3, 7), pack_pair(1, 2)]
+    True
+    """
+    halves = np.asarray(xy, dtype=np.int64) + BIAS
+    return halves[..., 1].astype(np.uint64) << np.uint64(32) | halves[..., 0].astype(
+        np.uint64
+    )
+
+
+def unpack_pairs(packed: NDArray[np.integer]) -> NDArray[np.int64]:
+    """
+    >>> unpack_pairs(pack_pairs(np.array([[-3, 7], [1, 2]]))).tolist()
+    [[-3, 7], [1, 2]]
+    """
+    packed = np.asarray(packed, dtype=np.uint64)
+    x = (packed & np.uint64(LOW)).astype(np.int64)
+    y = (packed >> np.uint64(32)).astype(np.int64)
+    return np.stack((x, y), axis=-1) - BIAS
@@ -1,4 +1,17 @@
+from __future__ import annotations
 from pathlib import Path
+import random
+from typing import TYPE_CHECKING, Iterator
+
+from days import parsing
+from days.lazy import lazy_import
+from days.stream import Source, lines
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
 
 
 def parse_input(input_string: str) -> list[tuple[bool, int]]:
@@ -13,6 +26,29 @@ def parse_input(input_string: str) -> list[tuple[bool, int]]:
     ]
 
 
+def parse_stream(source: Source) -> list[tuple[bool, int]]:
+    """Like `parse_input`, but reads lines lazily from a binary file or mmap.
+
+    >>> with open("days/day1/examples/1.txt", "rb") as file:
+    ...     parse_stream(file) == parse_input(Path("days/day1/examples/1.txt").read_text())
+    True
+    """
+
+    return [(line[0] == "L", int(line[1:])) for line in lines(source) if line]
+
+
+def parse_input_array(input_string: parsing.Data) -> NDArray[np.int64]:
+    """The instructions as signed distances, negative for left turns.
+
+    >>> parse_input_array("L2\\nR3\\nL4")
+    array([-2,  3, -4])
+    """
+    buf = parsing.as_bytes(input_string)
+    starts, ends = parsing.digit_runs(buf)
+    distances = parsing.run_values(buf, starts, ends)
+    return np.where(buf[starts - 1] == ord("L"), -distances, distances)
+
+
 def solve_star1(instructions: list[tuple[bool, int]]) -> int:
     """Solves star 1.
 
@@ -72,3 +108,14 @@ def star1(input_str: str) -> str:
 def star2(input_str: str) -> str:
     instructions = parse_input(input_str)
     return str(solve_star2(instructions))
+
+
+def generate(size: int, seed: int = 0, max_distance: int = 999) -> Iterator[str]:
+    """Yields `size` dial instructions, one per line.
+
+    >>> "".join(generate(3, seed=1))
+    'L583\\nL262\\nL508\\n'
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield f"{rng.choice('LR')}{rng.randint(1, max_distance)}\n"
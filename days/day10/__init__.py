@@ -1,9 +1,18 @@
+from __future__ import annotations
+from dataclasses import dataclass
 from pathlib import Path
-from typing import cast
+import random
+from typing import TYPE_CHECKING, Iterator, cast
+
+from days import parsing, trace
+from days.lazy import lazy_import
+from days.stream import Source, lines
 from demapples.path import find_path
-from icecream import ic
-import numpy as np
-from scipy.optimize import linprog
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = lazy_import("numpy")
 
 
 Indicator = tuple[bool, ...]
@@ -11,20 +20,96 @@ Button = tuple[int, ...]
 Req = tuple[int, ...]
 
 
-def parse_input(input_str: str) -> list[tuple[Indicator, tuple[Button, ...], Req]]:
-    def parse_line(line: str) -> tuple[Indicator, tuple[Button, ...], Req]:
-        target, *buttons, reqs = line.split()
-        target = tuple(c == "#" for c in target[1:-1])
-        buttons_list = [
-            tuple(int(wiring) for wiring in button[1:-1].split(","))
-            for button in buttons
-        ]
-        reqs = tuple(int(r) for r in reqs[1:-1].split(","))
-        return target, tuple(buttons_list), reqs
+def parse_line(line: str) -> tuple[Indicator, tuple[Button, ...], Req]:
+    target, *buttons, reqs = line.split()
+    target = tuple(c == "#" for c in target[1:-1])
+    buttons_list = [
+        tuple(int(wiring) for wiring in button[1:-1].split(",")) for button in buttons
+    ]
+    reqs = tuple(int(r) for r in reqs[1:-1].split(","))
+    return target, tuple(buttons_list), reqs
+
 
+def parse_input(input_str: str) -> list[tuple[Indicator, tuple[Button, ...], Req]]:
     return [parse_line(line) for line in input_str.splitlines()]
 
 
+def parse_stream(source: Source) -> list[tuple[Indicator, tuple[Button, ...], Req]]:
+    """Like `parse_input`, but reads lines lazily from a binary file or mmap.
+
+    >>> with open("days/day10/examples/1.txt", "rb") as file:
+    ...     parse_stream(file) == parse_input(Path("days/day10/examples/1.txt").read_text())
+    True
+    """
+    return [parse_line(line) for line in lines(source) if line]
+
+
+@dataclass(frozen=True, slots=True)
+class MachineArrays:
+    """Machines as padded arrays: bit i of `lights[m]` and `buttons[m, b]`
+    stands for light i, and `reqs[m, i]` is light i's joltage for the
+    `sizes[m]` lights of machine m."""
+
+    lights: np.ndarray
+    buttons: np.ndarray
+    reqs: np.ndarray
+    sizes: np.ndarray
+
+
+def ordinals(groups: np.ndarray) -> np.ndarray:
+    """Position of each element within its run of equal, sorted `groups`.
+
+    >>> ordinals(np.array([0, 0, 1, 1, 1, 3]))
+    array([0, 1, 0, 1, 2, 0])
+    """
+    return np.arange(len(groups)) - np.searchsorted(groups, groups)
+
+
+def parse_input_array(input_str: parsing.Data) -> MachineArrays:
+    """
+    >>> machines = parse_input_array(Path("days/day10/examples/1.txt").read_text())
+    >>> machines.lights.tolist(), machines.sizes.tolist()
+    ([6, 8, 46], [4, 5, 6])
+    >>> machines.buttons[0].tolist()
+    [8, 10, 4, 12, 5, 3]
+    >>> machines.reqs[0].tolist()
+    [3, 5, 4, 7, 0, 0]
+    """
+    buf = parsing.as_bytes(input_str)
+    positions = np.arange(len(buf))
+    line_of = np.cumsum(buf == parsing.NEWLINE)
+
+    starts, ends = parsing.digit_runs(buf)
+    values = parsing.run_values(buf, starts, ends)
+    is_opener = (buf == ord("(")) | (buf == ord("{"))
+    opener = np.maximum.accumulate(np.where(is_opener, positions, 0))[starts]
+    in_button = buf[opener] == ord("(")
+
+    cells = np.flatnonzero((buf == ord("#")) | (buf == ord(".")))
+    cell_lines = line_of[cells]
+    count = int(cell_lines[-1]) + 1 if len(cells) else 0
+    sizes = np.bincount(cell_lines, minlength=count)
+
+    lights = np.zeros(count, dtype=np.int64)
+    on = buf[cells] == ord("#")
+    np.bitwise_or.at(lights, cell_lines[on], 1 << ordinals(cell_lines)[on])
+
+    parens = np.flatnonzero(buf == ord("("))
+    paren_lines = line_of[parens]
+    width = int(np.bincount(paren_lines, minlength=count).max(initial=0))
+    buttons = np.zeros((count, width), dtype=np.int64)
+    button_of = ordinals(paren_lines)[np.searchsorted(parens, opener[in_button])]
+    np.bitwise_or.at(
+        buttons, (line_of[starts[in_button]], button_of), 1 << values[in_button]
+    )
+
+    req_lines = line_of[starts[~in_button]]
+    reqs = np.zeros((count, int(sizes.max(initial=0))), dtype=np.int64)
+    reqs[req_lines, ordinals(req_lines)] = values[~in_button]
+
+    return MachineArrays(lights, buttons, reqs, sizes)
+
+
 def get_indicator_neighbours(
     ind: Indicator, buttons: tuple[Button, ...]
 ) -> tuple[Indicator, ...]:
@@ -80,6 +165,7 @@ def indicator_fewest_total(
     return total
 
 
+@trace.traced("day10")
 def reqs_fewest(reqs: Req, buttons: tuple[Button, ...]) -> int | None:
     """
     >>> _, buttons, reqs = parse_input("[.##.] (3) (1,3) (2) (2,3) (0,2) (0,1) {3,5,4,7}")[0]
@@ -87,6 +173,8 @@ def reqs_fewest(reqs: Req, buttons: tuple[Button, ...]) -> int | None:
     10
     """
 
+    from scipy.optimize import linprog
+
     n = len(reqs)
     m = len(buttons)
 
@@ -126,11 +214,54 @@ def total_reqs_fewest(inputs: list[tuple[Indicator, tuple[Button, ...], Req]]) -
     return total
 
 
+def solve_star1(inputs: list[tuple[Indicator, tuple[Button, ...], Req]]) -> int:
+    return indicator_fewest_total(inputs)
+
+
+def solve_star2(inputs: list[tuple[Indicator, tuple[Button, ...], Req]]) -> int:
+    return total_reqs_fewest(inputs)
+
+
 def star1(input_str: str) -> str:
-    inputs = parse_input(input_str)
-    return str(indicator_fewest_total(inputs))
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
-    inputs = parse_input(input_str)
-    return str(total_reqs_fewest(inputs))
+    return str(solve_star2(parse_input(input_str)))
+
+
+def generate(
+    size: int,
+    seed: int = 0,
+    lights: tuple[int, int] = (4, 10),
+    buttons: tuple[int, int] = (3, 13),
+    max_presses: int = 20,
+) -> Iterator[str]:
+    """Yields `size` machines with a light count and button count drawn from
+    the given inclusive ranges.
+
+    Targets and joltage requirements are built from random button presses,
+    so every machine is solvable.
+
+    >>> "".join(generate(1, seed=1, lights=(3, 3), buttons=(2, 2), max_presses=3))
+    '[##.] (0,1) (1,2) {1,1,0}\\n'
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        n = rng.randint(*lights)
+        wirings = [
+            sorted(rng.sample(range(n), rng.randint(1, n)))
+            for _ in range(rng.randint(*buttons))
+        ]
+
+        target = [False] * n
+        reqs = [0] * n
+        for wiring in wirings:
+            presses = rng.randint(0, max_presses)
+            for i in wiring:
+                target[i] ^= presses % 2 == 1
+                reqs[i] += presses
+
+        indicator = "".join("#" if on else "." for on in target)
+        button_strs = " ".join(f"({','.join(map(str, w))})" for w in wirings)
+        yield f"[{indicator}] {button_strs} {{{','.join(map(str, reqs))}}}\n"
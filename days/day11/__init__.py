@@ -1,6 +1,22 @@
 from __future__ import annotations
-from functools import cache
+from dataclasses import dataclass
+from graphlib import CycleError, TopologicalSorter
+from itertools import compress
+import math
 from pathlib import Path
+import random
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from days import parsing
+from days.lazy import lazy_import
+from days.memo import memoize
+from days.stream import Source, lines
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
 
 
 def parse_input(input_str: str) -> dict[str, tuple[str, ...]]:
@@ -8,22 +24,34 @@ def parse_input(input_str: str) -> dict[str, tuple[str, ...]]:
     >>> parse_input(Path("days/day11/examples/1.txt").read_text())
     {'aaa': ('you', 'hhh'), 'you': ('bbb', 'ccc'), 'bbb': ('ddd', 'eee'), 'ccc': ('ddd', 'eee', 'fff'), 'ddd': ('ggg',), 'eee': ('out',), 'fff': ('out',), 'ggg': ('out',), 'hhh': ('ccc', 'fff', 'iii'), 'iii': ('out',)}
     """
+    return parse_lines(input_str.splitlines())
+
+
+def parse_stream(source: Source) -> dict[str, tuple[str, ...]]:
+    """Like `parse_input`, but reads lines lazily from a binary file or mmap.
+
+    >>> with open("days/day11/examples/1.txt", "rb") as file:
+    ...     parse_stream(file) == parse_input(Path("days/day11/examples/1.txt").read_text())
+    True
+    """
+    return parse_lines(line for line in lines(source) if line)
+
+
+def parse_lines(rows: Iterable[str]) -> dict[str, tuple[str, ...]]:
     result = {}
-    for line in input_str.splitlines():
+    for line in rows:
         key, *values = line.split()
         key = key[:-1]
         result[key] = tuple(v for v in values)
     return result
 
 
-def all_paths(input_str: str) -> int:
+def all_paths(graph: dict[str, tuple[str, ...]]) -> int:
     """
-    >>> all_paths(Path("days/day11/examples/1.txt").read_text())
+    >>> all_paths(parse_input(Path("days/day11/examples/1.txt").read_text()))
     5
     """
 
-    graph = parse_input(input_str)
-
     def dfs(start: str, path: list[str] | None = None) -> int:
         path = path or []
 
@@ -38,15 +66,13 @@ def all_paths(input_str: str) -> int:
     return dfs("you")
 
 
-def all_paths_2(input_str: str) -> int:
+def all_paths_2(graph: dict[str, tuple[str, ...]]) -> int:
     """
-    >>> all_paths_2(Path("days/day11/examples/2.txt").read_text())
+    >>> all_paths_2(parse_input(Path("days/day11/examples/2.txt").read_text()))
     2
     """
 
-    graph = parse_input(input_str)
-
-    @cache
+    @memoize()
     def dfs(start: str, found: frozenset[str]) -> int:
         return (
             len(found) == 2
@@ -60,33 +86,383 @@ def all_paths_2(input_str: str) -> int:
     return dfs("svr", frozenset({}))
 
 
-def star1(input_str: str) -> int:
-    return all_paths(input_str)
+def solve_star1(graph: dict[str, tuple[str, ...]]) -> int:
+    return all_paths(graph)
+
 
+def solve_star2(graph: dict[str, tuple[str, ...]]) -> int:
+    return all_paths_2(graph)
 
-def star2(input_str: str) -> int:
-    return all_paths_2(input_str)
 
+def star1(input_str: str) -> str:
+    return str(solve_star1(parse_input(input_str)))
 
-def render(input_str: str):
-    import networkx as nx
-    import matplotlib.pyplot as plt
 
-    graph = parse_input(input_str)
+def star2(input_str: str) -> str:
+    return str(solve_star2(parse_input(input_str)))
+
+
+# The ends every device's path counts are kept for: star 1 counts paths to
+# `out`, and star 2's waypoints are `fft` and `dac`.
+TARGETS = ("out", "fft", "dac")
+
+
+class PathCounter:
+    """Path counts from every device to each of `TARGETS`, kept up to date as
+    links are added and removed, so both stars are answered in O(1).
+
+    A changed link only changes the counts of its source and the source's
+    ancestors, so only those are recounted, in topological order. Adding a
+    link from a device's descendant back to it is refused.
+
+    >>> counter = PathCounter(parse_input(Path("days/day11/examples/1.txt").read_text()))
+    >>> counter.all_paths()
+    5
+    >>> counter.remove_edge("you", "ccc")
+    >>> counter.all_paths()
+    2
+    >>> counter.add_edge("bbb", "hhh")
+    >>> counter.all_paths()
+    7
+    >>> counter.add_edge("iii", "you")
+    Traceback (most recent call last):
+    ...
+    ValueError: linking iii to you would close a cycle
+    >>> counter.add_edge("zzz", "zzz")
+    Traceback (most recent call last):
+    ...
+    ValueError: linking zzz to zzz would close a cycle
+    >>> "zzz" in counter.links
+    False
+    """
+
+    def __init__(self, graph: dict[str, tuple[str, ...]]) -> None:
+        self.links: dict[str, list[str]] = {}
+        self.callers: dict[str, list[str]] = {}
+        self.counts: dict[str, tuple[int, ...]] = {}
+        for source, targets in graph.items():
+            self.add_device(source)
+            for target in targets:
+                self.link(source, target)
+        self.recount(set(self.links))
 
-    G = nx.Graph()
+    def add_device(self, device: str) -> None:
+        if device not in self.links:
+            self.links[device] = []
+            self.callers[device] = []
+            self.counts[device] = tuple(int(device == t) for t in TARGETS)
 
-    # Add nodes and edges
-    G.add_nodes_from(graph.keys())
-    G.add_edges_from(
-        [(key, neighbor) for key, neighbors in graph.items() for neighbor in neighbors]
+    def link(self, source: str, target: str) -> None:
+        self.add_device(source)
+        self.add_device(target)
+        self.links[source].append(target)
+        self.callers[target].append(source)
+
+    def ancestors(self, device: str) -> set[str]:
+        """`device` and every device with a path to it."""
+
+        seen = {device}
+        stack = [device]
+        while stack:
+            for caller in self.callers[stack.pop()]:
+                if caller not in seen:
+                    seen.add(caller)
+                    stack.append(caller)
+        return seen
+
+    def recount(self, devices: set[str]) -> None:
+        """Recounts `devices`, each after the devices it links to."""
+
+        graph = {d: [t for t in self.links[d] if t in devices] for d in devices}
+        try:
+            order = list(TopologicalSorter(graph).static_order())
+        except CycleError as e:
+            cycle = " -> ".join(reversed(e.args[1]))
+            raise ValueError(f"the devices don't form a DAG: {cycle}") from None
+
+        for device in order:
+            identity = tuple(int(device == t) for t in TARGETS)
+            below = (self.counts[t] for t in self.links[device])
+            self.counts[device] = tuple(map(sum, zip(identity, *below)))
+
+    def add_edge(self, source: str, target: str) -> None:
+        # Checked before adding either device, so a rejected edge adds none.
+        above = self.ancestors(source) if source in self.links else {source}
+        if target in above:
+            raise ValueError(f"linking {source} to {target} would close a cycle")
+        self.link(source, target)
+        self.recount(above)
+
+    def remove_edge(self, source: str, target: str) -> None:
+        if target not in self.links.get(source, ()):
+            raise ValueError(f"{source} doesn't link to {target}")
+        self.links[source].remove(target)
+        self.callers[target].remove(source)
+        self.recount(self.ancestors(source))
+
+    def paths(self, start: str, end: str) -> int:
+        """How many paths lead from `start` to `end`, one of `TARGETS`."""
+
+        if start not in self.counts:
+            return 0
+        return self.counts[start][TARGETS.index(end)]
+
+    def all_paths(self) -> int:
+        return self.paths("you", "out")
+
+    def all_paths_2(self) -> int:
+        """Paths from `svr` to `out` through both `fft` and `dac`, in either
+        order (in a DAG, at most one order has any).
+
+        >>> PathCounter(parse_input(Path("days/day11/examples/2.txt").read_text())).all_paths_2()
+        2
+        """
+        p = self.paths
+        return p("svr", "fft") * p("fft", "dac") * p("dac", "out") + p(
+            "svr", "dac"
+        ) * p("dac", "fft") * p("fft", "out")
+
+
+@dataclass(frozen=True)
+class Wiring:
+    """The devices as edge arrays. Devices are numbered in order of first
+    mention, and each link stands for `hidden[i]` collapsed devices."""
+
+    names: tuple[str, ...]
+    sources: NDArray[np.int64]
+    targets: NDArray[np.int64]
+    hidden: NDArray[np.int64]
+
+
+def parse_input_array(input_str: parsing.Data) -> Wiring:
+    """
+    >>> wiring = parse_input_array("you: a out\\na: out\\n")
+    >>> wiring.names, wiring.sources.tolist(), wiring.targets.tolist()
+    (('you', 'a', 'out'), [0, 0, 1], [1, 2, 2])
+    """
+    text = input_str if isinstance(input_str, str) else bytes(input_str).decode()
+    words = text.split()
+    index: dict[str, int] = {}
+    ids = np.array(
+        [index.setdefault(word.rstrip(":"), len(index)) for word in words],
+        dtype=np.int64,
     )
+    heads = np.array([word.endswith(":") for word in words], dtype=bool)
+    head_of = np.maximum.accumulate(np.where(heads, np.arange(len(words)), 0))
+    targets = ids[~heads]
+    return Wiring(tuple(index), ids[head_of][~heads], targets, np.zeros_like(targets))
+
+
+def collapse_chains(wiring: Wiring) -> Wiring:
+    """The wiring with every chain of pass-through devices (one link in, one
+    out) replaced by a single link, found by pointer doubling.
+
+    >>> wiring = collapse_chains(parse_input_array("you: a out\\na: b\\nb: out\\n"))
+    >>> wiring.names, wiring.sources.tolist(), wiring.targets.tolist(), wiring.hidden.tolist()
+    (('you', 'out'), [0, 0], [1, 1], [2, 0])
+    """
+    n = len(wiring.names)
+    indegree = np.bincount(wiring.targets, minlength=n)
+    through = (indegree == 1) & (np.bincount(wiring.sources, minlength=n) == 1)
+
+    # Each device's next kept device and how many pass-through devices lie
+    # on the way, doubling the distance covered every round.
+    jump = np.arange(n)
+    links = through[wiring.sources]
+    jump[wiring.sources[links]] = wiring.targets[links]
+    steps = through.astype(np.int64)
+    for _ in range(n.bit_length()):
+        steps = steps + steps[jump]
+        jump = jump[jump]
+
+    kept = ~through
+    renumber = np.cumsum(kept) - 1
+    targets = wiring.targets[~links]
+    return Wiring(
+        tuple(compress(wiring.names, kept)),
+        renumber[wiring.sources[~links]],
+        renumber[jump[targets]],
+        wiring.hidden[~links] + steps[targets],
+    )
+
+
+def layers(wiring: Wiring) -> NDArray[np.int64]:
+    """Each device's layer, the length of the longest path into it. Kahn's
+    algorithm, a whole layer of ready devices at a time.
+
+    >>> wiring = parse_input_array(Path("days/day11/examples/1.txt").read_text())
+    >>> dict(zip(wiring.names, layers(wiring).tolist()))
+    {'aaa': 0, 'you': 1, 'hhh': 1, 'bbb': 2, 'ccc': 2, 'ddd': 3, 'eee': 3, 'fff': 3, 'ggg': 4, 'out': 5, 'iii': 2}
+    >>> layers(parse_input_array("a: b\\nb: a\\nc: a\\n"))
+    Traceback (most recent call last):
+    ...
+    ValueError: the devices don't form a DAG: 2 are on or behind a cycle
+    """
+    n = len(wiring.names)
+    order = np.argsort(wiring.sources, kind="stable")
+    targets = wiring.targets[order]
+    starts = np.searchsorted(wiring.sources[order], np.arange(n + 1))
+    indegree = np.bincount(wiring.targets, minlength=n)
+
+    layer = np.zeros(n, dtype=np.int64)
+    ready = np.flatnonzero(indegree == 0)
+    placed = 0
+    depth = 0
+    while len(ready):
+        layer[ready] = depth
+        placed += len(ready)
+        counts = starts[ready + 1] - starts[ready]
+        offsets = np.repeat(starts[ready] - np.cumsum(counts) + counts, counts)
+        hit = targets[offsets + np.arange(len(offsets))]
+        np.subtract.at(indegree, hit, 1)
+        hit = np.unique(hit)
+        ready = hit[indegree[hit] == 0]
+        depth += 1
+
+    if placed < n:
+        raise ValueError(
+            f"the devices don't form a DAG: {n - placed} are on or behind a cycle"
+        )
+    return layer
+
+
+def layout(wiring: Wiring) -> NDArray[np.float64]:
+    """(layer, offset) of each device, with each layer centred on zero.
+
+    >>> layout(parse_input_array("you: a b\\na: out\\nb: out\\n")).tolist()
+    [[0.0, 0.0], [1.0, -0.5], [1.0, 0.5], [2.0, 0.0]]
+    """
+    layer = layers(wiring)
+    order = np.argsort(layer, kind="stable")
+    sizes = np.bincount(layer)
+    rank = np.empty(len(layer))
+    rank[order] = np.arange(len(layer)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return np.column_stack((layer, rank - (sizes[layer] - 1) / 2))
+
+
+def render(
+    input_str: str, output: Path, pixels: int = 2000, collapse: bool = True
+) -> int:
+    """Draws the device graph to `output` (.png or .svg) in layers, left to
+    right in topological order, and returns how many devices were drawn.
+
+    With `collapse`, each chain of pass-through devices is drawn as one
+    orange link. Links and devices are snapped to the pixel grid and drawn
+    as one LineCollection per kind and a single scatter, so a million
+    devices draw in seconds.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     render(Path("days/day11/examples/1.txt").read_text(), Path(tmp, "day11.png"))
+    9
+    """
+    from days.render import RASTERIZE_ABOVE, add_lines, figure, save, snap
+
+    wiring = parse_input_array(input_str)
+    if collapse:
+        wiring = collapse_chains(wiring)
+    xy = layout(wiring)
+    cell = np.maximum(np.ptp(xy, axis=0), 1) / pixels
+
+    fig, ax = figure(pixels)
+    chained = wiring.hidden > 0
+    for links, color, width in ((~chained, "grey", 0.3), (chained, "darkorange", 1.0)):
+        if links.any():
+            ends = (xy[wiring.sources[links]], xy[wiring.targets[links]])
+            add_lines(
+                ax,
+                snap(np.stack(ends, axis=1), cell),
+                colors=color,
+                linewidths=width,
+                alpha=0.5,
+            )
+    points = snap(xy, cell)
+    ax.scatter(
+        points[:, 0],
+        points[:, 1],
+        s=4,
+        color="steelblue",
+        zorder=2,
+        rasterized=len(points) > RASTERIZE_ABOVE,
+    )
+
+    reserved = {name: i for i, name in enumerate(wiring.names) if name in RESERVED}
+    for device, color in (("you", "red"), ("out", "lightgreen")):
+        if device in reserved:
+            ax.scatter(*xy[reserved[device]], s=60, color=color, zorder=3)
+    for device, i in reserved.items():
+        ax.annotate(device, xy[i], xytext=(4, 4), textcoords="offset points")
+    ax.autoscale_view()
+    save(fig, output)
+    return len(wiring.names)
+
+
+RESERVED = {"you", "out", "svr", "fft", "dac"}
+
+
+def device_name(index: int) -> str:
+    """
+    >>> device_name(0), device_name(26**3)
+    ('aaa', 'aaaa')
+    """
+    length = 3
+    while index >= 26**length:
+        index -= 26**length
+        length += 1
+
+    chars = []
+    for _ in range(length):
+        index, c = divmod(index, 26)
+        chars.append(chr(ord("a") + c))
+    return "".join(reversed(chars))
+
+
+def generate(
+    size: int, seed: int = 0, depth: int | None = None, fanout: int = 3
+) -> Iterator[str]:
+    """Yields a device DAG with about `size` devices in `depth` layers.
+
+    Every device links to `fanout` devices of the next layer and the last
+    layer links to `out`, so the number of paths grows roughly like
+    `fanout ** depth / width ** (depth - 1)`. `svr` heads the first layer,
+    `you` sits in the second and `fft` and `dac` in the middle layers.
+
+    >>> print("".join(generate(6, seed=1, depth=3, fanout=1)), end="")
+    svr: fft
+    aaa: fft
+    fft: aab
+    you: dac
+    dac: out
+    aab: out
+    """
+    rng = random.Random(seed)
+    depth = max(3, depth or math.isqrt(size))
+    width = max(2, size // depth)
+
+    names: dict[tuple[int, int], str] = {
+        (0, 0): "svr",
+        (min(1, depth - 1), width - 1): "you",
+        (depth // 3, 0): "fft",
+        (2 * depth // 3, 0): "dac",
+    }
+    next_index = 0
 
-    out_nodes = [node for node in G.nodes if node == "out"]
+    def name(layer: int, i: int) -> str:
+        nonlocal next_index
+        if (layer, i) not in names:
+            while device_name(next_index) in RESERVED:
+                next_index += 1
+            names[(layer, i)] = device_name(next_index)
+            next_index += 1
+        return names[(layer, i)]
 
-    # Draw
-    pos = nx.spring_layout(G)  # force-directed layout
-    nx.draw(G, pos, with_labels=True, node_size=600)
-    nx.draw_networkx_nodes(G, pos, nodelist=["you"], node_color="red")
-    nx.draw_networkx_nodes(G, pos, nodelist=out_nodes, node_color="lightgreen")
-    plt.show()
+    for layer in range(depth):
+        for i in range(width):
+            if layer == depth - 1:
+                outputs = ["out"]
+            else:
+                targets = rng.sample(range(width), min(fanout, width))
+                outputs = [name(layer + 1, j) for j in targets]
+            yield f"{name(layer, i)}: {' '.join(outputs)}\n"
+            if layer > 0:
+                del names[(layer - 1, i)]
@@ -1,14 +1,31 @@
 from __future__ import annotations
+from collections import Counter, deque
 from dataclasses import dataclass
-from functools import cache
-import math
+from itertools import combinations_with_replacement
+import os
 from pathlib import Path
+import random
+import sys
+import time
+from typing import TYPE_CHECKING, Iterator
+
+from days import parsing
+from days.day12.transposition import TranspositionTable, Zobrist
+from days.lazy import lazy_import
+from days.memo import memoize
+from demapples.vec import Vec2
 
-from icecream import ic
-import numpy as np
-from numpy.typing import NDArray
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
-from demapples.vec import Vec2
+    import numpy as np
+    from numpy.typing import NDArray
+
+    from days import trace
+else:
+    np = lazy_import("numpy")
+    # Only the search records spans, so tracing loads on its first call.
+    trace = lazy_import("days.trace")
 
 
 @dataclass(eq=True, frozen=True, order=True)
@@ -18,6 +35,7 @@ class Tile:
     def __post_init__(self):
         assert self.as_array() is not None
 
+    @memoize("weak")
     def as_array(self) -> NDArray[np.int8]:
         return np.frombuffer(self.data, dtype=np.int8).reshape(3, 3)
 
@@ -45,7 +63,6 @@ class Tile:
         flipped = np.fliplr(arr)
         return Tile(flipped.tobytes())
 
-    @cache
     def orientations(self) -> list[Tile]:
         """
         >>> tile = Tile.from_str("0:\\n#..\\n...\\n...")
@@ -54,7 +71,23 @@ class Tile:
         >>> tile = Tile.from_str("0:\\n##.\\n...\\n...")
         >>> len(tile.orientations())
         8
+
+        The cache doesn't keep the tile alive:
+
+        >>> import gc, weakref
+        >>> ref = weakref.ref(tile)
+        >>> del tile
+        >>> _ = gc.collect()
+        >>> ref() is None
+        True
         """
+        return sorted((self, *self.other_orientations()))
+
+    @memoize("weak")
+    def other_orientations(self) -> tuple[Tile, ...]:
+        """Every orientation but the tile itself, which the weak cache can't
+        hold without keeping the tile alive."""
+
         result = set()
         current = self
         for _ in range(4):
@@ -62,38 +95,77 @@ class Tile:
             result.add(current.fliplr())
             current = current.rot90()
 
-        return sorted(result)
+        result.discard(self)
+        return tuple(result)
 
-    @cache
-    def mask(self, offset: Vec2, W: int) -> int:
-        array = self.as_array()
-
-        result = 0
-        for y in range(3):
-            for x in range(3):
-                if array[y, x]:
-                    result = on(
-                        result,
-                        W,
-                        Vec2(x, y) + offset,
-                    )
+    @memoize("weak")
+    def canonical(self) -> bytes:
+        """Representative shared by every orientation of the tile.
+
+        >>> tile = Tile.from_str("0:\\n#..\\n...\\n...")
+        >>> tile.canonical() == tile.rot90().fliplr().canonical()
+        True
+        """
+        return min(orientation.data for orientation in self.orientations())
+
+    @memoize("weak")
+    def base_mask(self, W: int) -> int:
+        """The tile's cells as a bitmask on a board of width `W`, anchored at
+        the origin.
+
+        >>> bin(Tile.from_str("0:\\n##.\\n#..\\n...").base_mask(4))
+        '0b10011'
+        """
+        from days.coords import Grid
 
-        return result
+        grid = Grid(W, 3)
+        return sum(
+            1 << grid.pack(i % 3, i // 3) for i, cell in enumerate(self.data) if cell
+        )
+
+    # Not memoized itself: a shift of the memoized base_mask.
+    def mask(self, offset: Vec2, W: int) -> int:
+        return self.base_mask(W) << (offset.y * W + offset.x)
 
+    @memoize("weak")
     def size(self) -> int:
-        arr = self.as_array()
-        return np.sum(arr).item()
+        return sum(self.data)
+
+    @memoize("weak")
+    def placements(self, dim: Vec2) -> PlacementTable:
+        return PlacementTable.build(self, dim)
 
-    @cache
+    # Not memoized itself: a copy of the memoized placements.
     def compute_masks(self, dim: Vec2) -> set[int]:
-        result = set()
+        return set(self.placements(dim).ints)
+
+    @memoize("weak")
+    def colour_bounds(
+        self, period: int, colours: frozenset[tuple[int, int]]
+    ) -> tuple[int, int]:
+        """Fewest and most coloured cells the tile can cover on a board where
+        cell (x, y) is coloured if (x % period, y % period) is in `colours`.
+
+        >>> tile = Tile.from_str("0:\\n###\\n##.\\n##.")
+        >>> tile.colour_bounds(2, frozenset({(0, 0), (1, 1)}))
+        (3, 4)
+        """
+        counts = []
         for orientation in self.orientations():
-            for y in range(dim.y - 2):
-                for x in range(dim.x - 2):
-                    offset = Vec2(x, y)
-                    result.add(orientation.mask(offset, dim.x))
+            arr = orientation.as_array()
+            for dy in range(period):
+                for dx in range(period):
+                    counts.append(
+                        sum(
+                            1
+                            for y in range(3)
+                            for x in range(3)
+                            if arr[y, x]
+                            and ((x + dx) % period, (y + dy) % period) in colours
+                        )
+                    )
 
-        return result
+        return min(counts), max(counts)
 
     def __len__(self) -> int:
         return len(self.orientations())
@@ -114,6 +186,111 @@ class Tile:
         return cls(data.tobytes())
 
 
+def board_symmetries(dim: Vec2) -> list[NDArray[np.intp]]:
+    """The board's non-trivial rotations and reflections, each as the cell
+    every cell is sent to.
+
+    >>> len(board_symmetries(Vec2(5, 4))), len(board_symmetries(Vec2(4, 4)))
+    (3, 7)
+    """
+    W, H = dim.x, dim.y
+    y, x = np.divmod(np.arange(W * H), W)
+    images = [(W - 1 - x, y), (x, H - 1 - y), (W - 1 - x, H - 1 - y)]
+    if W == H:
+        images += [(y, x), (W - 1 - y, x), (y, W - 1 - x), (W - 1 - y, W - 1 - x)]
+    return [ty * W + tx for tx, ty in images]
+
+
+@dataclass(frozen=True, eq=False)
+class PlacementTable:
+    """Every distinct placement of a tile, in any orientation, on a board.
+
+    Placements are sorted by anchor, the first board cell they cover. `ints`
+    holds them as Python ints, `words` as little-endian uint64 words (one
+    row per placement, several words for boards over 64 cells), and
+    `cell_ptr`/`cell_placements` index, CSR-style, the placements covering
+    each cell. `canonical` marks the placements that come first, in anchor
+    order, among their images under the board's symmetries.
+    """
+
+    dim: Vec2
+    ints: list[int]
+    objects: NDArray[np.object_]
+    words: NDArray[np.uint64]
+    cell_ptr: NDArray[np.intp]
+    cell_placements: NDArray[np.intp]
+    canonical: NDArray[np.bool_]
+
+    @classmethod
+    def build(cls, tile: Tile, dim: Vec2) -> PlacementTable:
+        """
+        >>> table = Tile.from_str("0:\\n###\\n##.\\n##.").placements(Vec2(4, 3))
+        >>> len(table), table.words.shape
+        (16, (16, 1))
+        >>> table.covering(0).tolist()
+        [0, 1, 2, 3, 4, 5]
+        >>> int(table.canonical.sum())
+        4
+        """
+        W, H = dim.x, dim.y
+        from days.coords import Grid
+
+        grid = Grid(W, H)
+        shifts = [grid.pack(x, y) for y in range(H - 2) for x in range(W - 2)]
+        ints = sorted(
+            {
+                orientation.base_mask(W) << shift
+                for orientation in tile.orientations()
+                for shift in shifts
+            },
+            key=lambda mask: ((mask & -mask).bit_length(), mask),
+        )
+
+        word_count = max(1, (W * H + 63) // 64)
+        words = np.frombuffer(
+            b"".join(mask.to_bytes(word_count * 8, "little") for mask in ints),
+            dtype="<u8",
+        ).reshape(len(ints), word_count)
+
+        cells = np.unpackbits(words.view(np.uint8), axis=1, bitorder="little")
+        cells = cells[:, : W * H]
+        cell_ids, placement_ids = np.nonzero(cells.T)
+        cell_ptr = np.searchsorted(cell_ids, np.arange(W * H + 1))
+
+        def packed(cells: NDArray[np.uint8]) -> list[bytes]:
+            rows = np.packbits(cells, axis=1, bitorder="little")
+            return [row.tobytes() for row in rows]
+
+        index = {row: i for i, row in enumerate(packed(cells))}
+        canonical = np.ones(len(ints), dtype=bool)
+        for target in board_symmetries(dim):
+            image = np.zeros_like(cells)
+            image[:, target] = cells
+            images = np.array([index[row] for row in packed(image)], dtype=np.intp)
+            canonical &= images >= np.arange(len(ints))
+
+        objects = np.empty(len(ints), dtype=object)
+        objects[:] = ints
+        return cls(dim, ints, objects, words, cell_ptr, placement_ids, canonical)
+
+    def __len__(self) -> int:
+        return len(self.ints)
+
+    def covering(self, cell: int) -> NDArray[np.intp]:
+        return self.cell_placements[self.cell_ptr[cell] : self.cell_ptr[cell + 1]]
+
+    def board_words(self, board: int) -> NDArray[np.uint64]:
+        return np.frombuffer(
+            board.to_bytes(self.words.shape[1] * 8, "little"), dtype="<u8"
+        )
+
+    def legal(self, board_words: NDArray[np.uint64]) -> NDArray[np.bool_]:
+        """Which placements are disjoint from the board, in one vectorised AND."""
+        if self.words.shape[1] == 1:
+            return (self.words[:, 0] & board_words[0]) == 0
+        return ~(self.words & board_words).any(axis=1)
+
+
 @dataclass
 class Spec:
     dim: Vec2
@@ -147,15 +324,16 @@ def on(board: int, W: int, pos: Vec2) -> int:
 
 
 def board_to_str(board: int, dim: Vec2) -> str:
-    rows = []
-    for y in range(dim.y):
-        row = []
-        for x in range(dim.x):
-            pos = Vec2(x, y)
-            mask = 1 << idx(pos, dim.x)
-            row.append("#" if (board & mask) != 0 else ".")
-        rows.append("".join(row))
-    return "\n".join(rows)
+    """
+    >>> print(board_to_str(0b100011, Vec2(3, 2)))
+    ##.
+    ..#
+    """
+    W = dim.x
+    # Bit i of the board is cell i, so row y is bits y * W to y * W + W - 1.
+    cells = format(board, f"0{W * dim.y}b")[::-1] if dim.y else ""
+    rows = (cells[y * W : y * W + W] for y in range(dim.y))
+    return "\n".join(row.replace("1", "#").replace("0", ".") for row in rows)
 
 
 def parse_input(input_str: str) -> tuple[list[Tile], list[Spec]]:
@@ -172,62 +350,406 @@ def parse_input(input_str: str) -> tuple[list[Tile], list[Spec]]:
     return tiles, specs
 
 
-def write_solutions(solutions: dict[int, bool]) -> None:
-    with open("days/day12/solutions.txt", "w") as f:
-        for key in sorted(solutions.keys()):
-            f.write(f"{key}: {solutions[key]}\n")
+def parse_input_array(
+    input_str: parsing.Data,
+) -> tuple[NDArray[np.bool_], NDArray[np.int64]]:
+    """The tiles as a (t, h, w) boolean array, and the specs as an
+    (n, 2 + t) matrix of width, height and tile counts.
 
+    >>> shapes, specs = parse_input_array(Path("days/day12/examples/1.txt").read_text())
+    >>> shapes.shape, shapes[0].astype(int).tolist()
+    ((6, 3, 3), [[1, 1, 1], [1, 1, 0], [1, 1, 0]])
+    >>> specs[0].tolist()
+    [4, 4, 0, 0, 0, 0, 2, 0]
+    """
+    buf = parsing.as_bytes(input_str)
+    first_x = np.flatnonzero(buf == ord("x"))[0]
+    spec_start = np.flatnonzero(buf[:first_x] == parsing.NEWLINE)[-1] + 1
 
-def load_solutions() -> dict[int, bool]:
-    result = {}
+    head = buf[:spec_start]
+    cells = np.flatnonzero((head == ord("#")) | (head == ord(".")))
+    count = int(np.count_nonzero(head == ord(":")))
+    width = int(np.flatnonzero(head[cells[0] :] == parsing.NEWLINE)[0])
+    shapes = (head[cells] == ord("#")).reshape(count, -1, width)
 
-    if not Path("days/day12/solutions.txt").exists():
-        return result
+    return shapes, parsing.integer_rows(buf[spec_start:], 2 + count)
 
-    with open("days/day12/solutions.txt", "r") as f:
-        for line in f:
-            key_str, value_str = line.strip().split(":")
-            key = int(key_str)
-            value = value_str.strip() == "True"
-            result[key] = value
-    return result
 
+SOLUTIONS_PATH = Path(__file__).parent / "solutions.log"
 
+# Node budget for the first attempt at a spec. Specs that exhaust it are
+# retried after everything else with the budget multiplied by BUDGET_GROWTH.
 TICK_LIMIT = 1000
+BUDGET_GROWTH = 4
+PROGRESS_INTERVAL = 1.0
 
 
-def feasible(
-    tiles: list[Tile], spec: Spec, spec_index: int, solutions: dict[int, bool]
-) -> bool:
-    if spec_index in solutions:
-        return solutions[spec_index]
-
-    order = sorted(
-        range(len(tiles)),
-        key=lambda i: (len(tiles[i].compute_masks(spec.dim)), -tiles[i].size()),
+# Specs with more placements than this are searched with the MILP engine
+# (days.day12.milp): HiGHS copes with large, dense boards that exhaust the
+# DFS budget. Its time limit is MILP_SECONDS per TICK_LIMIT of budget, so it
+# grows with the budget when a spec is retried.
+MILP_PLACEMENTS = 2_000
+MILP_SECONDS = 5.0
+ENGINES = ("auto", "dfs", "milp", "parallel")
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def spec_key(tiles: list[Tile], spec: Spec) -> str:
+    """Content hash identifying a spec independently of the input it came from.
+
+    Tiles are identified by their orientation class and boards by their
+    sorted dimensions, so a W x H region shares its entry with H x W.
+
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> a = spec_key(tiles, Spec(Vec2(12, 5), [1, 0, 1, 0, 2, 2]))
+    >>> a == spec_key(tiles, Spec(Vec2(5, 12), [1, 0, 1, 0, 2, 2]))
+    True
+    >>> a == spec_key(tiles[::-1], Spec(Vec2(12, 5), [2, 2, 0, 1, 0, 1]))
+    True
+    >>> a == spec_key(tiles, Spec(Vec2(12, 5), [1, 0, 1, 0, 3, 2]))
+    False
+    """
+    import hashlib
+
+    pieces = sorted(
+        (tile.canonical().hex(), count)
+        for tile, count in zip(tiles, spec.counts)
+        if count > 0
     )
-    tiles = [tiles[i] for i in order]
-    counts = [spec.counts[i] for i in order]
-    total_tile_area = sum(tiles[i].size() * counts[i] for i in range(len(tiles)))
-    board_area = spec.dim.x * spec.dim.y
+    dims = sorted((spec.dim.x, spec.dim.y))
+    return hashlib.sha256(repr((pieces, dims)).encode()).hexdigest()
+
+
+class SolutionCache:
+    """Append-only, content-addressed store of spec results.
+
+    Lines are `<spec key> True|False` or `<spec key> unknown <budget>`, each
+    written with a single `write` on an `O_APPEND` descriptor, so any number
+    of processes can share one file. `refresh` picks up whatever other
+    processes have appended since the last call. Later lines win.
+    """
+
+    def __init__(self, path: Path = SOLUTIONS_PATH) -> None:
+        self.path = path
+        self.solutions: dict[str, bool] = {}
+        self.budgets: dict[str, int] = {}
+        self.offset = 0
+        self.fd: int | None = None
+
+    def __enter__(self) -> SolutionCache:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def refresh(self) -> None:
+        if not self.path.exists():
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+
+        # A line without its newline is still being written, or was torn by
+        # a crash; leave it for the next refresh.
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+
+        for line in data[:end].decode(errors="replace").splitlines():
+            match line.split():
+                case [key, "True" | "False" as value]:
+                    self.record(key, value == "True", 0)
+                case [key, "unknown", budget] if budget.isdigit():
+                    self.record(key, None, int(budget))
+
+    def record(self, key: str, value: bool | None, budget: int) -> None:
+        if value is not None:
+            self.solutions[key] = value
+            self.budgets.pop(key, None)
+        elif key not in self.solutions:
+            self.budgets[key] = max(self.budgets.get(key, 0), budget * BUDGET_GROWTH)
+
+    def put(self, key: str, value: bool | None, budget: int) -> None:
+        if self.fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+            self.fd = os.open(self.path, flags, 0o644)
+
+        line = f"{key} unknown {budget}\n" if value is None else f"{key} {value}\n"
+        os.write(self.fd, line.encode())
+        self.record(key, value, budget)
+
+    def next_budget(self, key: str) -> int:
+        return self.budgets.get(key, TICK_LIMIT)
+
+
+_worker_caches: dict[Path, SolutionCache] = {}
+
+
+def solve_spec(
+    tiles: list[Tile],
+    spec: Spec,
+    key: str,
+    budget: int,
+    path: Path,
+    engine: str = "auto",
+) -> bool | None:
+    """Worker entry point: solves one spec through the shared cache at `path`."""
+
+    store = _worker_caches.setdefault(path, SolutionCache(path))
+    store.refresh()
+    if key in store.solutions:
+        return store.solutions[key]
+
+    result = feasible(tiles, spec, budget, engine)
+    store.put(key, result, budget)
+    trace.flush()
+    return result
+
+
+# Periodic board colourings used to bound how many coloured cells a packing
+# must use: the checkerboard, single residues mod 2, stripes mod 3 in either
+# direction and single residues mod 3.
+COLOURINGS: list[tuple[int, frozenset[tuple[int, int]]]] = [
+    (2, frozenset({(0, 0), (1, 1)})),
+    *((2, frozenset({(a, b)})) for a in range(2) for b in range(2)),
+    *((3, frozenset((a, b) for b in range(3))) for a in range(3)),
+    *((3, frozenset((b, a) for b in range(3))) for a in range(3)),
+    *((3, frozenset({(a, b)})) for a in range(3) for b in range(3)),
+]
+
+
+def coloured_cells(dim: Vec2, period: int, colours: frozenset[tuple[int, int]]) -> int:
+    """
+    >>> coloured_cells(Vec2(3, 3), 2, frozenset({(0, 0), (1, 1)}))
+    5
+    """
+
+    def residue_count(n: int, r: int) -> int:
+        return (n - r + period - 1) // period
+
+    return sum(residue_count(dim.x, a) * residue_count(dim.y, b) for a, b in colours)
+
+
+def strip_masks(tile: Tile, length: int) -> NDArray[np.uint64]:
+    """Every placement of `tile` in a 3 x `length` strip, as bitmasks."""
+
+    masks = {
+        orientation.base_mask(length) << x
+        for orientation in tile.orientations()
+        for x in range(length - 2)
+    }
+    return np.array(sorted(masks), dtype=np.uint64)
+
+
+@memoize()
+def strip_units(tiles: tuple[Tile, ...]) -> list[tuple[tuple[int, ...], int]]:
+    """Groups of two or three tile types that fit in a 3-high strip shorter
+    than the 3 x 3 blocks they would otherwise take.
+
+    Returns (tile indices, strip length) pairs, best saving per tile first.
+
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> strip_units(tuple(tiles))[0]
+    ((0, 0, 2), 7)
+    """
 
+    units = []
+    for group_size in (2, 3):
+        for group in combinations_with_replacement(range(len(tiles)), group_size):
+            for length in range(3 * group_size - 2, 3 * group_size):
+                fits = strip_masks(tiles[group[0]], length)
+                for i in group[1:]:
+                    other = strip_masks(tiles[i], length)
+                    free = (fits[:, None] & other[None, :]) == 0
+                    fits = np.unique((fits[:, None] | other[None, :])[free])
+                    if len(fits) == 0:
+                        break
+
+                if len(fits) > 0:
+                    units.append((group, length))
+                    break
+
+    units.sort(
+        key=lambda unit: (3 * len(unit[0]) - unit[1]) / len(unit[0]), reverse=True
+    )
+    return units
+
+
+def strip_packing(tiles: list[Tile], spec: Spec) -> bool:
+    """Tries to build a packing from rows of 3-high strips, each holding single
+    tiles in 3 x 3 blocks and the groups from `strip_units` side by side.
+    """
+
+    remaining = list(spec.counts)
+    widths = []
+    for group, length in strip_units(tuple(tiles)):
+        copies = min(remaining[i] // group.count(i) for i in set(group))
+        for i in group:
+            remaining[i] -= copies
+        widths.extend([length] * copies)
+    widths.extend([3] * sum(remaining))
+    widths.sort(reverse=True)
+
+    for strip_count, strip_length in (
+        (spec.dim.y // 3, spec.dim.x),
+        (spec.dim.x // 3, spec.dim.y),
+    ):
+        strips = [0] * strip_count
+        for width in widths:
+            strip = next(
+                (i for i, used in enumerate(strips) if used + width <= strip_length),
+                None,
+            )
+            if strip is None:
+                break
+            strips[strip] += width
+        else:
+            return True
+
+    return False
+
+
+def classify(tiles: list[Tile], spec: Spec) -> tuple[bool | None, str]:
+    """Settles a spec without searching when a cheap argument suffices.
+
+    Returns the verdict, or None if search is needed, together with the name
+    of the tier that decided it.
+
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> classify(tiles, Spec(Vec2(4, 4), [0, 0, 0, 0, 3, 0]))
+    (False, 'area')
+    >>> classify(tiles, Spec(Vec2(6, 3), [0, 0, 0, 0, 2, 0]))
+    (True, 'blocks')
+    >>> classify(tiles, Spec(Vec2(7, 4), [1, 0, 1, 1, 1, 0]))
+    (False, 'colouring')
+    >>> classify(tiles, Spec(Vec2(3, 5), [1, 1, 0, 0, 0, 0]))
+    (True, 'strips')
+    >>> classify(tiles, Spec(Vec2(4, 4), [0, 0, 0, 0, 2, 0]))
+    (None, 'search')
+    """
+
+    board_area = spec.dim.x * spec.dim.y
+    total_tile_area = sum(tile.size() * c for tile, c in zip(tiles, spec.counts))
     if total_tile_area > board_area:
-        solutions[spec_index] = False
-        return False
+        return False, "area"
+
+    if sum(spec.counts) <= (spec.dim.x // 3) * (spec.dim.y // 3):
+        return True, "blocks"
+
+    for period, colours in COLOURINGS:
+        coloured = coloured_cells(spec.dim, period, colours)
+        least_coloured = 0
+        least_uncoloured = 0
+        for tile, count in zip(tiles, spec.counts):
+            lo, hi = tile.colour_bounds(period, colours)
+            least_coloured += count * lo
+            least_uncoloured += count * (tile.size() - hi)
+
+        if least_coloured > coloured or least_uncoloured > board_area - coloured:
+            return False, "colouring"
+
+    if strip_packing(tiles, spec):
+        return True, "strips"
+
+    return None, "search"
+
+
+def placement_count(tiles: list[Tile], spec: Spec) -> int:
+    """How many placements the spec's tile types have at most, counted as
+    orientations times offsets without building their tables.
+
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> placement_count(tiles, Spec(Vec2(4, 4), [0, 0, 0, 0, 2, 0]))
+    16
+    """
+    offsets = max(0, spec.dim.x - 2) * max(0, spec.dim.y - 2)
+    return offsets * sum(
+        len(tile.orientations()) for tile, count in zip(tiles, spec.counts) if count
+    )
+
+
+def choose_engine(tiles: list[Tile], spec: Spec, engine: str = "auto") -> str:
+    """
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> choose_engine(tiles, Spec(Vec2(4, 4), [0, 0, 0, 0, 2, 0]))
+    'dfs'
+    >>> choose_engine(tiles, Spec(Vec2(50, 50), [9, 9, 9, 9, 9, 9]))
+    'milp'
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+    if engine != "auto":
+        return engine
+    return "milp" if placement_count(tiles, spec) > MILP_PLACEMENTS else "dfs"
+
+
+# A search node: the covered cells, the copies left of each type, the last
+# placement used of each type and the node's Zobrist hash.
+Node = tuple[int, tuple[int, ...], tuple[int, ...], int]
+
+
+class Search:
+    """The depth-first search behind `feasible`.
+
+    Tile types are ordered by how many placements they have. Each node
+    places the next copy of the type with the fewest legal placements left,
+    trying them in increasing order. Any node can be searched on its own,
+    so the tree can be split between processes (see `days.day12.parallel`).
+    `frames` holds the untried siblings on the current path, shallowest
+    first.
+    """
+
+    def __init__(
+        self,
+        tiles: list[Tile],
+        spec: Spec,
+        budget: int | None = None,
+        table: TranspositionTable | None = None,
+    ) -> None:
+        order = sorted(
+            range(len(tiles)),
+            key=lambda i: (len(tiles[i].placements(spec.dim)), -tiles[i].size()),
+        )
+        self.tables = [tiles[i].placements(spec.dim) for i in order]
+        self.counts = [spec.counts[i] for i in order]
+        self.zobrist = Zobrist(self.tables, self.counts)
+        if table is None:
+            table = TranspositionTable()
+        else:
+            table.clear()
+        self.table = table
+        self.budget = budget
+        self.ticks = 0
+        self.frames: list[deque[Node]] = []
+
+    def root(self) -> Node:
+        counts = tuple(self.counts)
+        return 0, counts, (-1,) * len(counts), self.zobrist.root(self.counts)
 
     def select_tile_idx(
-        board: int, remaining: tuple[int, ...]
-    ) -> tuple[int, list[int]] | None:
+        self, board: int, remaining: tuple[int, ...], lasts: tuple[int, ...]
+    ) -> tuple[int, NDArray[np.intp]] | None:
         types_available = [i for i, c in enumerate(remaining) if c > 0]
+        words = self.tables[0].board_words(board)
 
         min_option_count = None
         selected_idx = None
-        selected_options = []
+        selected_options = np.empty(0, dtype=np.intp)
         for tile_idx in types_available:
-            tile = tiles[tile_idx]
-            options = [
-                mask for mask in tile.compute_masks(spec.dim) if (board & mask) == 0
-            ]
+            # Copies of a tile are interchangeable, so they are placed in
+            # increasing placement order.
+            legal = self.tables[tile_idx].legal(words)
+            legal[: lasts[tile_idx] + 1] = False
+            options = np.flatnonzero(legal)
 
             if remaining[tile_idx] > len(options):
                 return None
@@ -243,60 +765,380 @@ def feasible(
         assert selected_idx is not None
         return selected_idx, selected_options
 
-    @cache
-    def dfs(board: int, remaining: tuple[int, ...]) -> bool:
-        if sum(remaining) == 0:
-            solutions[spec_index] = True
-            return True
-
-        selection = select_tile_idx(board, remaining)
+    def children(self, node: Node) -> list[Node] | None:
+        """The nodes one placement below `node`, or None if some type has
+        fewer legal placements left than copies."""
 
+        board, remaining, lasts, key = node
+        selection = self.select_tile_idx(board, remaining, lasts)
         if selection is None:
-            return False
+            return None
 
         tile_idx, options = selection
+        table = self.tables[tile_idx]
+        placement_keys = self.zobrist.placements[tile_idx]
+        last_keys = self.zobrist.lasts[tile_idx]
+        count_keys = self.zobrist.counts[tile_idx]
+        count = remaining[tile_idx]
+
+        if board == 0:
+            # Any packing can be rotated or reflected so that the first copy
+            # of the first tile placed is the earliest of its mirror images.
+            options = options[table.canonical[options]]
 
         remaining = tuple(
             c - (1 if i == tile_idx else 0) for i, c in enumerate(remaining)
         )
-
-        if any(dfs(board | mask, remaining) for mask in options):
+        # The children's hashes, less the placement each one makes.
+        moved = key ^ count_keys[count] ^ count_keys[count - 1]
+        moved ^= last_keys[lasts[tile_idx] + 1]
+
+        return [
+            (
+                board | table.ints[option],
+                remaining,
+                lasts[:tile_idx] + (option,) + lasts[tile_idx + 1 :],
+                moved ^ placement_keys[option] ^ last_keys[option + 1],
+            )
+            for option in options.tolist()
+        ]
+
+    def tick(self) -> None:
+        self.ticks += 1
+        if self.budget is not None and self.ticks > self.budget:
+            raise BudgetExceeded()
+
+    def dfs(self, node: Node) -> bool:
+        _, remaining, _, key = node
+        known = self.table.lookup(key)
+        if known is not None:
+            return known
+
+        self.tick()
+        depth = sum(remaining)
+        if depth == 0:
             return True
 
+        frame = deque(self.children(node) or ())
+        self.frames.append(frame)
+        try:
+            while frame:
+                if self.dfs(frame.popleft()):
+                    return True
+        finally:
+            self.frames.pop()
+
+        self.table.store(key, depth, False)
         return False
 
-    dfs.cache_clear()
-    result = dfs(0, tuple(counts))
-    return result
 
+def feasible(
+    tiles: list[Tile],
+    spec: Spec,
+    budget: int | None = None,
+    engine: str = "auto",
+    table: TranspositionTable | None = None,
+) -> bool | None:
+    """Decides whether the tiles in `spec` can be packed into its region.
+
+    Returns None if the search visits more than `budget` nodes, or the MILP
+    engine runs out of the matching time, without reaching an answer.
+
+    The search remembers dead ends in `table`, cleared first, or in a new
+    table of `TABLE_BYTES`. Pass one in to read its statistics afterwards.
+    The parallel engine splits the search between one process per CPU.
+
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> spec = Spec(Vec2(12, 5), [1, 0, 1, 0, 3, 2])
+    >>> feasible(tiles, spec, engine="dfs"), feasible(tiles, spec, engine="milp")
+    (False, False)
+    >>> feasible(tiles, Spec(Vec2(12, 5), [1, 0, 1, 0, 2, 2]), engine="parallel")
+    True
+    """
+    with trace.span("feasible", "day12"):
+        verdict, _ = classify(tiles, spec)
+        if verdict is not None:
+            return verdict
+
+        engine = choose_engine(tiles, spec, engine)
+        if engine == "milp":
+            from days.day12.milp import milp_feasible
+
+            time_limit = None if budget is None else MILP_SECONDS * budget / TICK_LIMIT
+            return milp_feasible(tiles, spec, time_limit)
+
+        if engine == "parallel":
+            from days.day12.parallel import parallel_feasible
+
+            return parallel_feasible(tiles, spec, budget=budget)
 
-def count_feasible(input_str: str) -> str:
+        search = Search(tiles, spec, budget, table)
+        with trace.span("dfs", "day12") as span:
+            try:
+                return search.dfs(search.root())
+            except BudgetExceeded:
+                return None
+            finally:
+                if span is not None:
+                    span.args.update(search.table.stats())
+
+
+class DominanceMemo:
+    """Settled specs of one tile set, used to settle other specs without search.
+
+    A packing of counts C on a board is also a packing on any board at least
+    as large in both (sorted) dimensions, and dropping tiles keeps it one.
+    So a feasible spec settles every spec with a board at least as large and
+    counts <= C, and an infeasible one every spec with a board at most as
+    large and counts >= C.
+
+    >>> memo = DominanceMemo(2)
+    >>> memo.add(Spec(Vec2(5, 4), [2, 1]), True)
+    >>> memo.add(Spec(Vec2(4, 4), [3, 3]), False)
+    >>> memo.lookup(Spec(Vec2(4, 6), [1, 1]))
+    True
+    >>> memo.lookup(Spec(Vec2(3, 4), [3, 4]))
+    False
+    >>> memo.lookup(Spec(Vec2(3, 6), [1, 1])) is None
+    True
     """
-    >>> count_feasible(Path("days/day12/examples/1.txt").read_text())
+
+    def __init__(self, tile_count: int) -> None:
+        self.rows = {
+            verdict: np.empty((16, 2 + tile_count), dtype=np.int64)
+            for verdict in (True, False)
+        }
+        self.sizes = {True: 0, False: 0}
+
+    @staticmethod
+    def row(spec: Spec) -> NDArray[np.int64]:
+        dims = sorted((spec.dim.x, spec.dim.y))
+        return np.array(dims + list(spec.counts), dtype=np.int64)
+
+    def add(self, spec: Spec, verdict: bool) -> None:
+        rows, size = self.rows[verdict], self.sizes[verdict]
+        if size == len(rows):
+            rows = self.rows[verdict] = np.concatenate([rows, np.empty_like(rows)])
+        rows[size] = self.row(spec)
+        self.sizes[verdict] = size + 1
+
+    def lookup(self, spec: Spec) -> bool | None:
+        query = self.row(spec)
+
+        packable = self.rows[True][: self.sizes[True]]
+        if np.any(
+            (packable[:, :2] <= query[:2]).all(axis=1)
+            & (packable[:, 2:] >= query[2:]).all(axis=1)
+        ):
+            return True
+
+        refuted = self.rows[False][: self.sizes[False]]
+        if np.any(
+            (refuted[:, :2] >= query[:2]).all(axis=1)
+            & (refuted[:, 2:] <= query[2:]).all(axis=1)
+        ):
+            return False
+
+        return None
+
+
+def report_progress(
+    settled: int, total: int, started: float, retrying: set[int]
+) -> None:
+    elapsed = max(time.monotonic() - started, 1e-9)
+    open_specs = ", ".join(str(i) for i in sorted(retrying)[:10])
+    if len(retrying) > 10:
+        open_specs += ", ..."
+    print(
+        f"day12: {settled}/{total} specs settled, {settled / elapsed:.1f} specs/s,"
+        f" {total - settled} open, over budget: [{open_specs}]",
+        file=sys.stderr,
+    )
+
+
+def report_tiers(tiers: Counter[str]) -> None:
+    resolved = ", ".join(f"{tier} {count}" for tier, count in tiers.most_common())
+    print(f"day12: specs resolved by tier: {resolved}", file=sys.stderr)
+
+
+def count_feasible(
+    input_str: str,
+    solutions_path: Path = SOLUTIONS_PATH,
+    workers: int | None = None,
+    engine: str = "auto",
+) -> str:
+    """
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     count_feasible(
+    ...         Path("days/day12/examples/1.txt").read_text(), Path(tmp) / "solutions.log"
+    ...     )
     '2'
     """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
     tiles, specs = parse_input(input_str)
+    keys = [spec_key(tiles, spec) for spec in specs]
+
+    with SolutionCache(solutions_path) as store:
+        store.refresh()
+
+        # Specs sharing a key are classified and solved once, through their
+        # first index.
+        first_index: dict[str, int] = {}
+        for i, key in enumerate(keys):
+            first_index.setdefault(key, i)
+
+        memo = DominanceMemo(len(tiles))
+        verdicts: dict[str, bool] = {}
+        tier_of: dict[str, str] = {}
+        for key, i in first_index.items():
+            verdict, tier = classify(tiles, specs[i])
+            if verdict is not None:
+                verdicts[key] = verdict
+            elif key in store.solutions:
+                tier = "cache"
+                memo.add(specs[i], store.solutions[key])
+            tier_of[key] = tier
+
+        queue = deque(
+            (key, store.next_budget(key))
+            for key, tier in tier_of.items()
+            if tier == "search"
+        )
+        total = len(queue)
+        retrying = {first_index[key] for key, _ in queue if key in store.budgets}
+
+        workers = workers or os.cpu_count() or 1
+        started = time.monotonic()
+        last_report = started
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            pending: dict[Future[bool | None], tuple[str, int]] = {}
+            while queue or pending:
+                while queue and len(pending) < workers * 2:
+                    key, budget = queue.popleft()
+                    if key in store.solutions:
+                        continue
+
+                    spec = specs[first_index[key]]
+                    verdict = memo.lookup(spec)
+                    if verdict is not None:
+                        tier_of[key] = "dominance"
+                        store.put(key, verdict, budget)
+                        retrying.discard(first_index[key])
+                        continue
+
+                    future = pool.submit(
+                        solve_spec, tiles, spec, key, budget, solutions_path, engine
+                    )
+                    pending[future] = (key, budget)
+
+                done, _ = wait(
+                    pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED
+                )
+                store.refresh()
+                for future in done:
+                    key, budget = pending.pop(future)
+                    result = future.result()
+                    store.record(key, result, budget)
+
+                    if result is None:
+                        retrying.add(first_index[key])
+                        queue.append((key, store.next_budget(key)))
+                    else:
+                        retrying.discard(first_index[key])
+                        memo.add(specs[first_index[key]], result)
+
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    report_progress(
+                        total - len(queue) - len(pending), total, started, retrying
+                    )
+                    last_report = now
+        finally:
+            pool.shutdown(cancel_futures=True)
 
-    solutions = load_solutions()
+    report_tiers(Counter(tier_of[key] for key in keys))
+    return str(sum(verdicts.get(key, store.solutions.get(key, False)) for key in keys))
 
-    result = 0
-    for i, spec in enumerate(specs):
-        if i in solutions:
-            result += solutions[i]
-            continue
 
-        result += feasible(tiles, spec, i, solutions)
+# Unsettled specs `search_specs` searches, so the benchmark of a large
+# generated input costs about as much as that of a small one.
+BENCH_SPECS = 2
+# Phases harness.bench times besides the usual ones.
+BENCH_PHASES = {"search": "search_specs"}
 
-    write_solutions(solutions)
 
-    return str(result)
+def search_specs(
+    input_str: str, limit: int = BENCH_SPECS, budget: int = TICK_LIMIT
+) -> str:
+    """Runs the first round of `count_feasible`'s search in this process:
+    the "dfs" engine, with `budget` nodes each, on the first `limit` specs
+    `classify` can't settle. There's no solution store, so every call
+    searches afresh.
+
+    >>> search_specs(Path("days/day12/examples/1.txt").read_text(), limit=3)
+    '2 feasible, 0 infeasible, 1 over budget'
+    """
+    tiles, specs = parse_input(input_str)
+    unsettled = [spec for spec in specs if classify(tiles, spec)[0] is None]
+    verdicts = Counter(
+        feasible(tiles, spec, budget, engine="dfs") for spec in unsettled[:limit]
+    )
+    return (
+        f"{verdicts[True]} feasible, {verdicts[False]} infeasible,"
+        f" {verdicts[None]} over budget"
+    )
+
+
+def solve_star1(puzzle: tuple[list[Tile], list[Spec]]) -> int:
+    """Counts the specs whose tiles fit even as solid 3x3 blocks.
+
+    >>> solve_star1(parse_input(Path("days/day12/examples/1.txt").read_text()))
+    1
+    """
+    _, specs = puzzle
+    return sum(sum(spec.counts) * 9 <= spec.dim.x * spec.dim.y for spec in specs)
 
 
 def star1(input_str: str) -> str:
-    def feasible(line: str) -> bool:
-        dim_str, counts_str = line.split(":")
-        return sum(int(c) * 9 for c in counts_str.strip().split()) <= math.prod(
-            map(int, dim_str.split("x"))
+    return str(solve_star1(parse_input(input_str)))
+
+
+def generate(
+    size: int,
+    seed: int = 0,
+    tile_count: int = 6,
+    tile_cells: int = 7,
+    dims: tuple[int, int] = (35, 50),
+    fill: tuple[float, float] = (0.6, 1.05),
+) -> Iterator[str]:
+    """Yields `tile_count` random tiles of `tile_cells` cells and `size`
+    region specs.
+
+    Board sides are drawn from `dims` and tile counts are chosen so the tiles
+    cover a fraction of the board area drawn from `fill`; fractions near 1
+    give the specs that are hardest to settle.
+
+    >>> text = "".join(generate(1, seed=1, tile_count=2, dims=(4, 4), fill=(0.8, 0.8)))
+    >>> text.split("\\n\\n")
+    ['0:\\n###\\n##.\\n.##', '1:\\n##.\\n#.#\\n###', '4x4: 1 0\\n']
+    """
+    rng = random.Random(seed)
+    for i in range(tile_count):
+        cells = set(rng.sample(range(9), tile_cells))
+        rows = (
+            "".join("#" if 3 * y + x in cells else "." for x in range(3))
+            for y in range(3)
         )
-
-    return str(sum(feasible(spec) for spec in input_str.split("\n\n")[-1].splitlines()))
+        yield f"{i}:\n" + "\n".join(rows) + "\n\n"
+
+    for _ in range(size):
+        W, H = rng.randint(*dims), rng.randint(*dims)
+        pieces = int(W * H * rng.uniform(*fill)) // tile_cells
+        counts = [0] * tile_count
+        for _ in range(pieces):
+            counts[rng.randrange(tile_count)] += 1
+        yield f"{W}x{H}: {' '.join(map(str, counts))}\n"
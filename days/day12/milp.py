@@ -0,0 +1,109 @@
+"""A spec as a 0/1 integer program, solved by HiGHS through `scipy.optimize.milp`.
+
+There is one binary variable per placement (orientation and offset) of each
+tile type the spec uses, taken from `Tile.placements`. Every cell is covered
+by at most one chosen placement and every type is placed exactly
+`Spec.counts` times. The objective is zero, so any feasible point is a
+packing. Both constraint blocks are built as one sparse matrix straight
+from the placement tables' CSR cell index.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from days.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+    from scipy.sparse import csr_array
+
+    from days.day12 import Spec, Tile
+else:
+    np = lazy_import("numpy")
+
+# HiGHS status codes returned by `milp`.
+OPTIMAL = 0
+LIMIT_REACHED = 1
+INFEASIBLE = 2
+
+
+def constraints(
+    tiles: list[Tile], spec: Spec
+) -> tuple[csr_array, NDArray[np.int64], NDArray[np.int64]]:
+    """The constraint matrix and its lower and upper bounds: one row per
+    board cell, then one per tile type used, over the placements of the
+    types used.
+
+    >>> from pathlib import Path
+    >>> from days.day12 import parse_input, Spec, Vec2
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> matrix, lower, upper = constraints(tiles, Spec(Vec2(4, 4), [0, 0, 0, 0, 2, 0]))
+    >>> matrix.shape, lower[-1].item(), upper[-1].item(), upper[:16].max().item()
+    ((17, 16), 2, 2, 1)
+    """
+    from scipy.sparse import coo_array
+
+    cells = spec.dim.x * spec.dim.y
+    used = [(tile, count) for tile, count in zip(tiles, spec.counts) if count]
+
+    rows, columns = [], []
+    offset = 0
+    for k, (tile, _) in enumerate(used):
+        table = tile.placements(spec.dim)
+        rows.append(np.repeat(np.arange(cells), np.diff(table.cell_ptr)))
+        columns.append(offset + table.cell_placements)
+        rows.append(np.full(len(table), cells + k))
+        columns.append(offset + np.arange(len(table)))
+        offset += len(table)
+
+    row = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+    column = np.concatenate(columns) if columns else np.empty(0, dtype=np.intp)
+    matrix = coo_array(
+        (np.ones(len(row), dtype=np.int8), (row, column)),
+        shape=(cells + len(used), offset),
+    ).tocsr()
+
+    counts = np.array([count for _, count in used], dtype=np.int64)
+    lower = np.concatenate([np.zeros(cells, dtype=np.int64), counts])
+    upper = np.concatenate([np.ones(cells, dtype=np.int64), counts])
+    return matrix, lower, upper
+
+
+def milp_feasible(
+    tiles: list[Tile], spec: Spec, time_limit: float | None = None
+) -> bool | None:
+    """Decides whether the tiles in `spec` can be packed into its region.
+
+    Returns None if HiGHS hits `time_limit` seconds without an answer.
+
+    >>> from pathlib import Path
+    >>> from days.day12 import parse_input, Spec, Vec2
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> milp_feasible(tiles, Spec(Vec2(4, 4), [0, 0, 0, 0, 2, 0]))
+    True
+    >>> milp_feasible(tiles, Spec(Vec2(12, 5), [1, 0, 1, 0, 3, 2]))
+    False
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    matrix, lower, upper = constraints(tiles, spec)
+    variables = matrix.shape[1]
+    options: dict[str, object] = {"presolve": True}
+    if time_limit is not None:
+        options["time_limit"] = time_limit
+
+    result = milp(
+        np.zeros(variables),
+        integrality=np.ones(variables),
+        bounds=Bounds(0, 1),
+        constraints=LinearConstraint(matrix, lower, upper),
+        options=options,
+    )
+    if result.status == OPTIMAL:
+        return True
+    if result.status == INFEASIBLE:
+        return False
+    if result.status == LIMIT_REACHED:
+        return None
+    raise RuntimeError(f"milp failed on {spec}: {result.message}")
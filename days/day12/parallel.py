@@ -0,0 +1,299 @@
+"""Splits the search of a single spec between worker processes.
+
+    python -m days.day12.parallel --workers 1,2,4,8 --specs 4
+
+The parent expands the search tree breadth-first until there are `SPLIT`
+subtrees per worker and puts them on a shared queue. Each worker searches
+subtrees from the queue with its own `Search` and transposition table.
+While a worker is idle and the queue empty, busy ones give away half of the untried siblings
+at the shallowest level of their current path, so work deferred below the
+split still spreads out.
+
+Every `CHECK_TICKS` nodes, a worker adds them to the shared node count and
+checks a shared stop event. The event is set by the first worker to find a
+packing, or once the count passes the budget. The spec is infeasible once
+no subtree is queued or being searched.
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from days.day12 import (
+    BudgetExceeded,
+    Node,
+    Search,
+    Spec,
+    Tile,
+    classify,
+    generate,
+)
+
+if TYPE_CHECKING:
+    from multiprocessing.queues import Queue
+    from multiprocessing.sharedctypes import Synchronized
+    from multiprocessing.synchronize import Event
+
+SPLIT = 8
+CHECK_TICKS = 64
+POLL_INTERVAL = 0.05
+
+
+class Cancelled(Exception):
+    pass
+
+
+@dataclass
+class Shared:
+    """The state the parent and its workers share."""
+
+    tasks: Queue[Node]
+    stop: Event
+    found: Event
+    idle: Synchronized[int]
+    # Subtrees queued or being searched.
+    outstanding: Synchronized[int]
+    # Nodes visited by every process.
+    spent: Synchronized[int]
+
+
+class SharedSearch(Search):
+    """A `Search` that checks in with the other workers as it goes."""
+
+    def __init__(
+        self, tiles: list[Tile], spec: Spec, shared: Shared, budget: int | None
+    ) -> None:
+        super().__init__(tiles, spec)
+        self.shared = shared
+        self.shared_budget = budget
+
+    def tick(self) -> None:
+        self.ticks += 1
+        if self.ticks % CHECK_TICKS == 0:
+            self.check()
+
+    def check(self) -> None:
+        shared = self.shared
+        if shared.stop.is_set():
+            raise Cancelled()
+
+        with shared.spent.get_lock():
+            shared.spent.value += CHECK_TICKS
+            spent = shared.spent.value
+        if self.shared_budget is not None and spent > self.shared_budget:
+            shared.stop.set()
+            raise Cancelled()
+
+        if shared.idle.value > 0 and shared.tasks.empty():
+            self.donate()
+
+    def donate(self) -> None:
+        """Queues the larger half of the untried siblings at the shallowest
+        level of the current path that has any."""
+
+        for frame in self.frames:
+            if frame:
+                given = [frame.pop() for _ in range((len(frame) + 1) // 2)]
+                with self.shared.outstanding.get_lock():
+                    self.shared.outstanding.value += len(given)
+                for node in given:
+                    self.shared.tasks.put(node)
+                return
+
+
+def work(tiles: list[Tile], spec: Spec, shared: Shared, budget: int | None) -> None:
+    shared.tasks.cancel_join_thread()
+    search = SharedSearch(tiles, spec, shared, budget)
+
+    while not shared.stop.is_set():
+        with shared.idle.get_lock():
+            shared.idle.value += 1
+        try:
+            node = shared.tasks.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            if shared.outstanding.value == 0:
+                return
+            continue
+        finally:
+            with shared.idle.get_lock():
+                shared.idle.value -= 1
+
+        try:
+            packed = search.dfs(node)
+        except Cancelled:
+            return
+        if packed:
+            shared.found.set()
+            shared.stop.set()
+            return
+        with shared.outstanding.get_lock():
+            shared.outstanding.value -= 1
+
+
+def split(search: Search, count: int) -> list[Node] | bool:
+    """The search tree's shallowest level with at least `count` nodes (or
+    the deepest one), or the verdict if it is settled before that.
+
+    >>> from pathlib import Path
+    >>> from days.day12 import Vec2, parse_input
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> search = Search(tiles, Spec(Vec2(12, 5), [1, 0, 1, 0, 2, 2]))
+    >>> len(split(search, 100)) >= 100
+    True
+    """
+    frontier = [search.root()]
+    while len(frontier) < count:
+        expanded = []
+        for node in frontier:
+            search.tick()
+            if sum(node[1]) == 0:
+                return True
+            expanded.extend(search.children(node) or ())
+        if not expanded:
+            return False
+        frontier = expanded
+    return frontier
+
+
+def parallel_feasible(
+    tiles: list[Tile],
+    spec: Spec,
+    workers: int | None = None,
+    budget: int | None = None,
+) -> bool | None:
+    """Decides whether the tiles in `spec` can be packed into its region,
+    searching with `workers` processes. Returns None once they have visited
+    more than `budget` nodes between them.
+
+    >>> from pathlib import Path
+    >>> from days.day12 import Vec2, parse_input
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> parallel_feasible(tiles, Spec(Vec2(12, 5), [1, 0, 1, 0, 3, 2]), workers=2)
+    False
+    """
+    workers = workers or os.cpu_count() or 1
+    search = Search(tiles, spec, budget)
+    try:
+        frontier = split(search, workers * SPLIT)
+    except BudgetExceeded:
+        return None
+    if isinstance(frontier, bool):
+        return frontier
+
+    context = multiprocessing.get_context()
+    shared = Shared(
+        context.Queue(),
+        context.Event(),
+        context.Event(),
+        context.Value("i", 0),
+        context.Value("i", len(frontier)),
+        context.Value("q", search.ticks),
+    )
+    processes = [
+        context.Process(target=work, args=(tiles, spec, shared, budget))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Queued only now, so the queue's feeder thread starts after the forks.
+    for node in frontier:
+        shared.tasks.put(node)
+    try:
+        while not shared.stop.wait(POLL_INTERVAL):
+            if shared.outstanding.value == 0:
+                break
+            if not any(process.is_alive() for process in processes):
+                break
+    finally:
+        shared.stop.set()
+        for process in processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        # Subtrees still queued when the search stops are dropped.
+        shared.tasks.cancel_join_thread()
+        shared.tasks.close()
+
+    if shared.found.is_set():
+        return True
+    if shared.outstanding.value == 0:
+        return False
+    if budget is not None and shared.spent.value > budget:
+        return None
+    codes = [process.exitcode for process in processes]
+    raise RuntimeError(f"search workers for {spec} exited with {codes}")
+
+
+def hard_specs(
+    count: int,
+    seed: int,
+    dims: tuple[int, int],
+    min_ticks: int,
+    max_ticks: int,
+    tile_count: int = 6,
+) -> tuple[list[Tile], list[Spec]]:
+    """The tiles and the first `count` generated specs that are feasible and
+    take the sequential search between `min_ticks` and `max_ticks` nodes."""
+
+    stream = generate(sys.maxsize, seed, tile_count, dims=dims, fill=(0.8, 0.95))
+    tiles = [Tile.from_str(next(stream).strip()) for _ in range(tile_count)]
+    found: list[Spec] = []
+    for line in stream:
+        spec = Spec.from_str(line)
+        if classify(tiles, spec)[0] is not None:
+            continue
+        search = Search(tiles, spec, max_ticks)
+        try:
+            packed = search.dfs(search.root())
+        except BudgetExceeded:
+            continue
+        if packed and search.ticks >= min_ticks:
+            found.append(spec)
+            if len(found) == count:
+                break
+    return tiles, found
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="days.day12.parallel",
+        description="Benchmarks the parallel search on hard, feasible specs.",
+    )
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--specs", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dims", default="7,10", help="board side range")
+    parser.add_argument("--min-ticks", type=int, default=20_000)
+    parser.add_argument("--max-ticks", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    low, high = map(int, args.dims.split(","))
+    tiles, specs = hard_specs(
+        args.specs, args.seed, (low, high), args.min_ticks, args.max_ticks
+    )
+    print(f"{len(specs)} specs: {', '.join(str(spec.dim) for spec in specs)}")
+
+    baseline = None
+    for workers in map(int, args.workers.split(",")):
+        started = time.perf_counter()
+        for spec in specs:
+            assert parallel_feasible(tiles, spec, workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(
+            f"{workers:3} workers {elapsed:8.2f}s  speedup {speedup:5.2f}"
+            f"  efficiency {speedup / workers:6.1%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
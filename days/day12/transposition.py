@@ -0,0 +1,170 @@
+"""A fixed-size transposition table for the day12 search, keyed by Zobrist
+hashes.
+
+A search node is the set of board cells covered, how many copies of each
+tile type remain and, per type, the last placement used (copies of a type
+are placed in increasing order, so that bounds what's left to try). Each
+of these components has a random 64-bit key and a node's hash is the XOR of
+its components' keys, so placing a tile updates it with a few XORs instead
+of hashing the whole board.
+
+The table has a power-of-two number of slots, each holding a hash, the
+node's depth (tiles left to place) and its verdict. A node may only evict
+a slot's entry if it is at least as deep, since deeper entries stand for
+larger subtrees.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+from days.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from days.day12 import PlacementTable
+else:
+    np = lazy_import("numpy")
+
+TABLE_BYTES = 16 << 20
+# A 64-bit hash, a 16-bit depth and an 8-bit verdict.
+ENTRY_BYTES = 8 + 2 + 1
+
+
+class Zobrist:
+    """Random keys for the components of a search node, as Python ints.
+
+    `placements[t][p]` is the XOR of the keys of the cells placement `p` of
+    type `t` covers, `counts[t][c]` stands for `c` copies of type `t` left
+    and `lasts[t][p + 1]` for `p` being the last placement of type `t` used.
+
+    >>> from pathlib import Path
+    >>> from days.day12 import parse_input, Vec2
+    >>> tiles, _ = parse_input(Path("days/day12/examples/1.txt").read_text())
+    >>> table = tiles[4].placements(Vec2(4, 4))
+    >>> zobrist = Zobrist([table], [2])
+    >>> key = 0
+    >>> for cell in range(16):
+    ...     if table.ints[0] >> cell & 1:
+    ...         key ^= zobrist.cells[cell]
+    >>> zobrist.placements[0][0] == key
+    True
+    """
+
+    def __init__(
+        self, tables: list[PlacementTable], counts: list[int], seed: int = 0
+    ) -> None:
+        rng = np.random.default_rng(seed)
+
+        def keys(n: int) -> np.ndarray:
+            return rng.integers(0, 2**64, size=n, dtype=np.uint64)
+
+        cell_keys = keys(len(tables[0].cell_ptr) - 1)
+        self.cells: list[int] = cell_keys.tolist()
+        self.placements: list[list[int]] = []
+        for table in tables:
+            placement_keys = np.zeros(len(table), dtype=np.uint64)
+            np.bitwise_xor.at(
+                placement_keys,
+                table.cell_placements,
+                np.repeat(cell_keys, np.diff(table.cell_ptr)),
+            )
+            self.placements.append(placement_keys.tolist())
+        self.counts: list[list[int]] = [keys(count + 1).tolist() for count in counts]
+        self.lasts: list[list[int]] = [
+            keys(len(table) + 1).tolist() for table in tables
+        ]
+
+    def root(self, counts: list[int]) -> int:
+        """The hash of the empty board with `counts` copies left and no
+        placement used yet."""
+
+        key = 0
+        for t, count in enumerate(counts):
+            key ^= self.counts[t][count] ^ self.lasts[t][0]
+        return key
+
+
+class TranspositionTable:
+    """Verdicts of search nodes by Zobrist hash, in at most `max_bytes`.
+
+    >>> table = TranspositionTable(1 << 10)
+    >>> table.capacity, table.nbytes
+    (64, 704)
+    >>> table.store(3, depth=5, verdict=False)
+    >>> table.lookup(3), table.lookup(3 + 64)
+    (False, None)
+    >>> table.store(3 + 64, depth=2, verdict=False)
+    >>> table.lookup(3)
+    False
+    >>> table.report()
+    'transposition table: 2 hits in 3 probes (66.7%), 1 collisions, 0 replaced, 1 rejected, 704 B'
+    """
+
+    def __init__(self, max_bytes: int = TABLE_BYTES) -> None:
+        if max_bytes < ENTRY_BYTES:
+            raise ValueError(f"a transposition table needs at least {ENTRY_BYTES} B")
+        self.capacity = 1 << ((max_bytes // ENTRY_BYTES).bit_length() - 1)
+        self.mask = self.capacity - 1
+        # numpy allocates the arrays lazily; the memoryviews index them with
+        # plain Python ints.
+        self.arrays = (
+            np.zeros(self.capacity, dtype=np.uint64),
+            np.zeros(self.capacity, dtype=np.uint16),
+            np.zeros(self.capacity, dtype=np.uint8),
+        )
+        self.keys, self.depths, self.verdicts = map(memoryview, self.arrays)
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.replaced = 0
+        self.rejected = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays)
+
+    def clear(self) -> None:
+        """Forgets every entry, keeping the counters. A depth of 0 marks an
+        empty slot."""
+
+        self.arrays[1][:] = 0
+
+    def lookup(self, key: int) -> bool | None:
+        self.probes += 1
+        slot = key & self.mask
+        if self.depths[slot] and self.keys[slot] == key:
+            self.hits += 1
+            return bool(self.verdicts[slot])
+        return None
+
+    def store(self, key: int, depth: int, verdict: bool) -> None:
+        slot = key & self.mask
+        held = self.depths[slot]
+        if held and self.keys[slot] != key:
+            self.collisions += 1
+            if depth < held:
+                self.rejected += 1
+                return
+            self.replaced += 1
+        self.keys[slot] = key
+        self.depths[slot] = min(depth, 0xFFFF)
+        self.verdicts[slot] = verdict
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "collisions": self.collisions,
+            "replaced": self.replaced,
+            "rejected": self.rejected,
+            "bytes": self.nbytes,
+        }
+
+    def report(self) -> str:
+        rate = self.hits / self.probes if self.probes else 0.0
+        return (
+            f"transposition table: {self.hits} hits in {self.probes} probes"
+            f" ({rate:.1%}), {self.collisions} collisions, {self.replaced} replaced,"
+            f" {self.rejected} rejected, {self.nbytes} B"
+        )
@@ -1,3 +1,17 @@
+from __future__ import annotations
+import random
+from typing import TYPE_CHECKING, Iterator
+
+from days import parsing
+from days.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+
 def parse_input(input_string: str) -> list[tuple[str, str]]:
     """Parses the input string into a list of tuples.
 
@@ -12,6 +26,16 @@ def parse_input(input_string: str) -> list[tuple[str, str]]:
     return [line_split(line) for line in input_string.strip().split(",")]
 
 
+def parse_input_array(input_string: parsing.Data) -> NDArray[np.int64]:
+    """The ranges as an (n, 2) matrix of inclusive bounds.
+
+    >>> parse_input_array("11-22,95-115")
+    array([[ 11,  22],
+           [ 95, 115]])
+    """
+    return parsing.integers(input_string).reshape(-1, 2)
+
+
 def find_invalids_1(a: str, b: str) -> list[int]:
     """
     >>> find_invalids_1('122000', '124999')
@@ -124,17 +148,15 @@ def solve_star1(items: list[tuple[str, str]]) -> int:
     return sum_invalids
 
 
-def solve_star2(input_str: str) -> int:
+def solve_star2(items: list[tuple[str, str]]) -> int:
     """Solves star 2.
 
-    >>> solve_star2('11-22,95-115')
+    >>> solve_star2(parse_input('11-22,95-115'))
     243
-    >>> solve_star2('11-22,95-115,998-1012,1188511880-1188511890,222220-222224,1698522-1698528,446443-446449,38593856-38593862,565653-565659,824824821-824824827,2121212118-2121212124')
+    >>> solve_star2(parse_input('11-22,95-115,998-1012,1188511880-1188511890,222220-222224,1698522-1698528,446443-446449,38593856-38593862,565653-565659,824824821-824824827,2121212118-2121212124'))
     4174379265
     """
 
-    items = parse_input(input_str)
-
     sum_invalids = 0
     for a, b in items:
         ranges = subdivide(a, b)
@@ -150,4 +172,25 @@ def star1(input_str: str) -> str:
 
 
 def star2(input_str: str) -> str:
-    return str(solve_star2(input_str))
+    return str(solve_star2(parse_input(input_str)))
+
+
+def generate(
+    size: int, seed: int = 0, max_digits: int = 10, span: int = 100_000
+) -> Iterator[str]:
+    """Yields a single line of `size` comma-separated ID ranges.
+
+    Range starts have up to `max_digits` digits and ranges are at most `span`
+    long; together they decide how many repeated-prefix candidates each
+    range holds.
+
+    >>> "".join(generate(2, seed=1, max_digits=4, span=50))
+    '82-130,5-12\\n'
+    """
+    rng = random.Random(seed)
+    for i in range(size):
+        digits = rng.randint(1, max_digits)
+        start = rng.randint(10 ** (digits - 1), 10**digits - 1)
+        end = start + rng.randint(0, span)
+        yield f"{',' if i else ''}{start}-{end}"
+    yield "\n"
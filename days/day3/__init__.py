@@ -1,3 +1,10 @@
+from pathlib import Path
+import random
+from typing import Iterator
+
+from days.stream import Source, lines
+
+
 def joltage(battery: str, size: int) -> int:
     """Calculates the joltage of the battery string.
 
@@ -69,14 +76,38 @@ def joltage_stack(battery: str, size: int) -> int:
     return int("".join(stack))
 
 
+def parse_input(input_str: str) -> tuple[str, ...]:
+    """
+    >>> parse_input('811111111111119\\n987654321111111\\n')
+    ('811111111111119', '987654321111111')
+    """
+    return tuple(input_str.strip().split("\n"))
+
+
+def parse_stream(source: Source) -> tuple[str, ...]:
+    """Like `parse_input`, but reads lines lazily from a binary file or mmap.
+
+    >>> with open("days/day3/examples/1.txt", "rb") as file:
+    ...     parse_stream(file) == parse_input(Path("days/day3/examples/1.txt").read_text())
+    True
+    """
+    return tuple(line for line in lines(source) if line)
+
+
+def solve_star1(batteries: tuple[str, ...]) -> int:
+    return sum(joltage(battery, 2) for battery in batteries)
+
+
+def solve_star2(batteries: tuple[str, ...]) -> int:
+    return sum(joltage(battery, 12) for battery in batteries)
+
+
 def star1(input_str: str) -> str:
     """
     >>> star1('811111111111119\\n987654321111111\\n234234234234278\\n818181911112111')
     '357'
     """
-    batteries = input_str.strip().split("\n")
-    total_joltage = sum(joltage(battery, 2) for battery in batteries)
-    return str(total_joltage)
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
@@ -84,9 +115,7 @@ def star2(input_str: str) -> str:
     >>> star2('811111111111119\\n987654321111111\\n234234234234278\\n818181911112111')
     '3121910778619'
     """
-    batteries = input_str.strip().split("\n")
-    total_joltage = sum(joltage(battery, 12) for battery in batteries)
-    return str(total_joltage)
+    return str(solve_star2(parse_input(input_str)))
 
 
 def star2_stack(input_str: str) -> str:
@@ -94,6 +123,17 @@ def star2_stack(input_str: str) -> str:
     >>> star2('811111111111119\\n987654321111111\\n234234234234278\\n818181911112111')
     '3121910778619'
     """
-    batteries = input_str.strip().split("\n")
+    batteries = parse_input(input_str)
     total_joltage = sum(joltage_stack(battery, 12) for battery in batteries)
     return str(total_joltage)
+
+
+def generate(size: int, seed: int = 0, length: int = 100) -> Iterator[str]:
+    """Yields `size` battery banks of `length` digits each.
+
+    >>> "".join(generate(2, seed=1, length=8))
+    '28735568\\n11847157\\n'
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield "".join(rng.choices("123456789", k=length)) + "\n"
@@ -1,23 +1,66 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from itertools import compress
+import random
+from typing import Iterable, Iterator
 
+from days.coords import Grid
 from demapples.vec import Vec2
 
+# Maps "@" to 1 and every other byte to 0.
+ROLL_BYTES = bytes(1 if byte == ord("@") else 0 for byte in range(256))
+
+
+@dataclass(frozen=True)
+class Rolls:
+    """The parsed diagram: a `Grid` with a border and a byte per packed cell
+    of it, 1 where a roll is."""
+
+    grid: Grid
+    occupied: bytes
+
+    @classmethod
+    def from_str(cls, input_str: str) -> Rolls:
+        lines = input_str.splitlines()
+        grid = Grid(max(map(len, lines), default=0), len(lines), border=1)
+        occupied = bytearray(grid.size)
+        for y, line in enumerate(lines):
+            row = grid.pack(0, y)
+            occupied[row : row + len(line)] = line.encode().translate(ROLL_BYTES)
+        return cls(grid, bytes(occupied))
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[Vec2]) -> Rolls:
+        positions = list(positions)
+        grid = Grid.around(positions, border=1)
+        occupied = bytearray(grid.size)
+        for position in positions:
+            occupied[grid.from_vec2(position)] = 1
+        return cls(grid, bytes(occupied))
+
+    def cells(self) -> set[int]:
+        return set(compress(range(len(self.occupied)), self.occupied))
+
+    def positions(self) -> set[Vec2]:
+        return {self.grid.to_vec2(cell) for cell in self.cells()}
+
 
 @dataclass
 class Diagram:
-    rolls: set[Vec2]
-    to_check: set[Vec2]
+    """The rolls on a `Grid` with a border, as a byte per packed cell that is
+    1 where a roll is, and the packed cells to check in the next wave."""
+
+    grid: Grid
+    occupied: bytearray
+    to_check: set[int]
+
+    @classmethod
+    def from_rolls(cls, rolls: Rolls) -> Diagram:
+        return cls(rolls.grid, bytearray(rolls.occupied), rolls.cells())
 
     @classmethod
     def from_str(cls, input_str: str) -> Diagram:
-        rolls = set()
-        lines = input_str.splitlines()
-        for y, line in enumerate(lines):
-            for x, char in enumerate(line):
-                if char == "@":
-                    rolls.add(Vec2(x, y))
-        return cls(rolls=rolls, to_check=rolls)
+        return cls.from_rolls(Rolls.from_str(input_str))
 
     @classmethod
     def from_file(cls, filepath: str) -> Diagram:
@@ -29,42 +72,104 @@ class Diagram:
     def from_example(cls) -> Diagram:
         return cls.from_file("days/day4/examples/1.txt")
 
+    @property
+    def rolls(self) -> set[Vec2]:
+        return Rolls(self.grid, bytes(self.occupied)).positions()
+
+    def accessible_cells(self) -> set[int]:
+        """The packed cells to check that have fewer than four neighbouring
+        rolls."""
+
+        occupied = self.occupied
+        n0, n1, n2, n3, n4, n5, n6, n7 = self.grid.neighbours
+        return {
+            cell
+            for cell in self.to_check
+            if occupied[cell + n0]
+            + occupied[cell + n1]
+            + occupied[cell + n2]
+            + occupied[cell + n3]
+            + occupied[cell + n4]
+            + occupied[cell + n5]
+            + occupied[cell + n6]
+            + occupied[cell + n7]
+            < 4
+        }
+
     def accessible(self) -> set[Vec2]:
         """
-        >>> Diagram.from_example().accessible()
-        {Vec2(x=0, y=1), Vec2(x=0, y=7), Vec2(x=6, y=2), Vec2(x=0, y=4), Vec2(x=2, y=0), Vec2(x=0, y=9), Vec2(x=8, y=0), Vec2(x=3, y=0), Vec2(x=2, y=9), Vec2(x=8, y=9), Vec2(x=5, y=0), Vec2(x=6, y=0), Vec2(x=9, y=4)}
+        >>> sorted((roll.x, roll.y) for roll in Diagram.from_example().accessible())
+        [(0, 1), (0, 4), (0, 7), (0, 9), (2, 0), (2, 9), (3, 0), (5, 0), (6, 0), (6, 2), (8, 0), (8, 9), (9, 4)]
         """
 
-        return {
-            roll for roll in self.to_check if len(roll.neighbours() & self.rolls) < 4
+        return {self.grid.to_vec2(cell) for cell in self.accessible_cells()}
+
+    def remove_cells(self, to_remove: set[int]) -> None:
+        occupied = self.occupied
+        for cell in to_remove:
+            occupied[cell] = 0
+        neighbours = self.grid.neighbours
+        self.to_check = {
+            cell + offset
+            for cell in to_remove
+            for offset in neighbours
+            if occupied[cell + offset]
         }
 
     def remove(self, to_remove: set[Vec2]) -> None:
-        self.rolls = self.rolls - to_remove
-        self.to_check = {
-            nb for roll in to_remove for nb in roll.neighbours()
-        } & self.rolls
+        self.remove_cells({self.grid.from_vec2(roll) for roll in to_remove})
 
     def repeat(self) -> int:
         """
         >>> Diagram.from_example().repeat()
         43
         """
-        to_remove = self.accessible()
+        to_remove = self.accessible_cells()
         total_count = len(to_remove)
         while to_remove:
-            self.remove(to_remove)
-            to_remove = self.accessible()
+            self.remove_cells(to_remove)
+            to_remove = self.accessible_cells()
             total_count += len(to_remove)
 
         return total_count
 
 
+def parse_input(input_str: str) -> Rolls:
+    """The packed rolls; solvers build their own mutable `Diagram` from them.
+
+    >>> rolls = parse_input("@.\\n.@")
+    >>> rolls.grid, sorted(rolls.cells())
+    (Grid(width=2, height=2, border=1), [5, 10])
+    >>> sorted((roll.x, roll.y) for roll in rolls.positions())
+    [(0, 0), (1, 1)]
+    """
+    return Rolls.from_str(input_str)
+
+
+def solve_star1(rolls: Rolls) -> int:
+    return len(Diagram.from_rolls(rolls).accessible_cells())
+
+
+def solve_star2(rolls: Rolls) -> int:
+    return Diagram.from_rolls(rolls).repeat()
+
+
 def star1(input_str: str) -> str:
-    inp = Diagram.from_str(input_str)
-    return str(len(inp.accessible()))
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
-    inp = Diagram.from_str(input_str)
-    return str(inp.repeat())
+    return str(solve_star2(parse_input(input_str)))
+
+
+def generate(size: int, seed: int = 0, density: float = 0.7) -> Iterator[str]:
+    """Yields a `size` x `size` grid in which each cell holds a roll with
+    probability `density`.
+
+    >>> "".join(generate(3, seed=1))
+    '@..\\n@@@\\n@.@\\n'
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield "".join("@" if rng.random() < density else "." for _ in range(size))
+        yield "\n"
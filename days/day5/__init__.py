@@ -1,7 +1,20 @@
 from __future__ import annotations
-
+from itertools import takewhile
+from pathlib import Path
+import random
+from typing import TYPE_CHECKING, Iterator
+
+from days import parsing
+from days.lazy import lazy_import
+from days.stream import Source, lines
 from demapples.range import Range
 
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
 
 def parse_input(input_str: str) -> tuple[list[Range], list[int]]:
     ranges_str, numbers_str = input_str.strip().split("\n\n")
@@ -10,6 +23,34 @@ def parse_input(input_str: str) -> tuple[list[Range], list[int]]:
     return ranges, numbers
 
 
+def parse_stream(source: Source) -> tuple[list[Range], list[int]]:
+    """Like `parse_input`, but reads lines lazily from a binary file or mmap.
+
+    >>> with open("days/day5/examples/1.txt", "rb") as file:
+    ...     parse_stream(file) == parse_input(Path("days/day5/examples/1.txt").read_text())
+    True
+    """
+    stream = lines(source)
+    ranges = [Range.from_str(line) for line in takewhile(bool, stream)]
+    numbers = [int(line) for line in stream if line]
+    return ranges, numbers
+
+
+def parse_input_array(
+    input_str: parsing.Data,
+) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """The ranges as an (n, 2) matrix of inclusive bounds, and the IDs.
+
+    >>> ranges, ids = parse_input_array(Path("days/day5/examples/1.txt").read_text())
+    >>> ranges.tolist(), ids.tolist()
+    ([[3, 5], [10, 14], [16, 20], [12, 18]], [1, 5, 8, 11, 17, 32])
+    """
+    buf = parsing.as_bytes(input_str)
+    newlines = np.flatnonzero(buf == parsing.NEWLINE)
+    blank = newlines[np.flatnonzero(np.diff(newlines) == 1)[0]]
+    return parsing.integer_rows(buf[:blank], 2), parsing.integers(buf[blank:])
+
+
 def read_example() -> tuple[list[Range], list[int]]:
     with open("days/day5/examples/1.txt") as file:
         input_str = file.read()
@@ -68,11 +109,43 @@ def count_ranges(ranges: list[Range]) -> int:
     return sum(len(r) for r in ranges)
 
 
+def solve_star1(inventory: tuple[list[Range], list[int]]) -> int:
+    return fresh(*inventory)
+
+
+def solve_star2(inventory: tuple[list[Range], list[int]]) -> int:
+    ranges, _ = inventory
+    return count_ranges(merge_all(ranges))
+
+
 def star1(input_str: str) -> str:
-    ranges, numbers = parse_input(input_str)
-    return str(fresh(ranges, numbers))
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
-    ranges, _ = parse_input(input_str)
-    return str(count_ranges(merge_all(ranges)))
+    return str(solve_star2(parse_input(input_str)))
+
+
+def generate(
+    size: int,
+    seed: int = 0,
+    ids: int | None = None,
+    max_value: int = 10**15,
+    span: int = 10**12,
+) -> Iterator[str]:
+    """Yields `size` ingredient ID ranges, a blank line and `ids` IDs
+    (default `size`).
+
+    The ratio of `span` to `max_value` decides how much the ranges overlap.
+
+    >>> "".join(generate(2, seed=1, ids=1, max_value=100, span=10))
+    '18-27\\n98-99\\n\\n33\\n'
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        start = rng.randint(1, max_value)
+        yield f"{start}-{start + rng.randint(0, span)}\n"
+
+    yield "\n"
+    for _ in range(size if ids is None else ids):
+        yield f"{rng.randint(1, max_value)}\n"
@@ -0,0 +1,253 @@
+"""Out-of-core merging of the fresh ranges, for inputs too large for memory.
+
+    python -m days.day5.external days/day5/input.txt --output fresh.intervals
+
+The ranges are read in blocks of about `chunk_bytes`. Each block is parsed
+into an (n, 2) int64 array, sorted, coalesced and written to a run file of
+raw little-endian int64 pairs. The runs are then merged k ways, one block
+of each at a time, coalescing overlapping and touching ranges as they go,
+so only `k * block` ranges are in memory at once. Star 2's count is summed
+on the way out.
+
+The merged ranges are written as an interval file: the n starts, then the
+n ends, as little-endian int64. `intervals` memory-maps one, and `fresh`
+checks IDs against it with `searchsorted` over the mapped starts.
+"""
+
+from __future__ import annotations
+import argparse
+from pathlib import Path
+import re
+import sys
+import tempfile
+from typing import TYPE_CHECKING, BinaryIO, Iterator
+
+from days import parsing
+from days.lazy import lazy_import
+from days.stream import Source
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+CHUNK_BYTES = 64 << 20
+BLOCK = 1 << 20
+DTYPE = "<i8"
+
+BLANK_LINE = re.compile(rb"^\r?\n", re.MULTILINE)
+
+
+def sections(
+    source: Source, chunk_bytes: int = CHUNK_BYTES
+) -> Iterator[tuple[int, bytes]]:
+    """Blocks of about `chunk_bytes` of whole lines, tagged 0 while in the
+    ranges and 1 once past the blank line, in the IDs.
+
+    >>> import io
+    >>> list(sections(io.BytesIO(b"3-5\\n10-14\\n\\n1\\n5"), chunk_bytes=4))
+    [(0, b'3-5\\n'), (0, b'10-14\\n'), (1, b'1\\n'), (1, b'5')]
+    """
+    section = 0
+    carry = b""
+    while True:
+        data = source.read(chunk_bytes)
+        if not data:
+            if carry:
+                yield section, carry
+            return
+
+        data = carry + data
+        cut = data.rfind(b"\n") + 1
+        lines, carry = data[:cut], data[cut:]
+        if section == 0 and (blank := BLANK_LINE.search(lines)):
+            if blank.start():
+                yield 0, lines[: blank.start()]
+            section, lines = 1, lines[blank.end() :]
+        if lines:
+            yield section, lines
+
+
+def coalesce(ranges: NDArray[np.int64]) -> NDArray[np.int64]:
+    """Merges the overlapping or touching inclusive ranges of `ranges`, which
+    must be sorted by start.
+
+    >>> coalesce(np.array([[3, 5], [6, 8], [10, 14], [12, 18], [13, 15]])).tolist()
+    [[3, 8], [10, 18]]
+    """
+    if len(ranges) == 0:
+        return ranges
+    reach = np.maximum.accumulate(ranges[:, 1])
+    firsts = np.flatnonzero(np.r_[True, ranges[1:, 0] > reach[:-1] + 1])
+    return np.column_stack(
+        (ranges[firsts, 0], np.maximum.reduceat(ranges[:, 1], firsts))
+    )
+
+
+def sort_runs(
+    source: Source, directory: Path, chunk_bytes: int = CHUNK_BYTES
+) -> list[Path]:
+    """Writes the ranges of `source` as sorted, coalesced run files, one per
+    block, and returns their paths."""
+
+    runs = []
+    for section, block in sections(source, chunk_bytes):
+        if section:
+            break
+        ranges = parsing.integer_rows(block, 2).astype(np.int64, copy=False)
+        ranges = coalesce(ranges[np.lexsort((ranges[:, 1], ranges[:, 0]))])
+        path = directory / f"run{len(runs)}.i64"
+        ranges.astype(DTYPE).tofile(path)
+        runs.append(path)
+    return runs
+
+
+def read_run(path: Path) -> NDArray[np.int64]:
+    if path.stat().st_size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.memmap(path, dtype=DTYPE, mode="r").reshape(-1, 2)
+
+
+def merge_runs(runs: list[Path], output: BinaryIO, block: int = BLOCK) -> int:
+    """K-way merges sorted, coalesced runs into `output` as (start, end) pairs
+    and returns how many IDs they cover.
+
+    Each round loads the next `block` ranges of every run. Every range
+    starting at or before `bound`, the smallest last start loaded among the
+    runs with more to come, has then been seen, so those are sorted and
+    coalesced together with the range left open by the previous round.
+    The run that set the bound is consumed whole, so each round advances.
+    """
+
+    readers = [read_run(path) for path in runs]
+    positions = [0] * len(readers)
+    open_range = np.empty((0, 2), dtype=np.int64)
+    covered = 0
+
+    def emit(ranges: NDArray[np.int64]) -> None:
+        nonlocal covered
+        covered += int((ranges[:, 1] - ranges[:, 0] + 1).sum())
+        output.write(ranges.astype(DTYPE).tobytes())
+
+    while any(p < len(r) for p, r in zip(positions, readers)):
+        loaded = [r[p : p + block] for p, r in zip(positions, readers)]
+        bound = min(
+            (
+                int(chunk[-1, 0])
+                for chunk, p, r in zip(loaded, positions, readers)
+                if p + len(chunk) < len(r)
+            ),
+            default=None,
+        )
+
+        taken = [open_range]
+        for i, chunk in enumerate(loaded):
+            count = (
+                len(chunk)
+                if bound is None
+                else int(np.searchsorted(chunk[:, 0], bound, side="right"))
+            )
+            taken.append(chunk[:count])
+            positions[i] += count
+
+        batch = np.concatenate(taken)
+        merged = coalesce(batch[np.argsort(batch[:, 0], kind="stable")])
+        emit(merged[:-1])
+        open_range = merged[-1:]
+
+    emit(open_range)
+    return covered
+
+
+def split_columns(pairs: Path, output: Path, block: int = BLOCK) -> None:
+    """Rewrites a file of (start, end) pairs as all starts, then all ends."""
+
+    ranges = read_run(pairs)
+    with open(output, "wb") as file:
+        for column in (0, 1):
+            for i in range(0, len(ranges), block):
+                file.write(
+                    np.ascontiguousarray(ranges[i : i + block, column]).tobytes()
+                )
+
+
+def merge_file(
+    input_path: Path,
+    output: Path,
+    chunk_bytes: int = CHUNK_BYTES,
+    block: int = BLOCK,
+) -> int:
+    """Merges the ranges of the input at `input_path` out of core into the
+    interval file `output`, and returns star 2's count.
+
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     output = Path(tmp, "fresh.intervals")
+    ...     covered = merge_file(Path("days/day5/examples/1.txt"), output, chunk_bytes=8, block=1)
+    ...     covered, intervals(output).tolist()
+    (14, [[3, 10], [5, 20]])
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output.parent) as tmp:
+        with open(input_path, "rb") as source:
+            runs = sort_runs(source, Path(tmp), chunk_bytes)
+        pairs = Path(tmp, "merged.i64")
+        with open(pairs, "wb") as file:
+            covered = merge_runs(runs, file, block)
+        split_columns(pairs, output, block)
+    return covered
+
+
+def intervals(path: Path) -> NDArray[np.int64]:
+    """The interval file at `path`, memory-mapped as a (2, n) array of starts
+    and ends."""
+
+    if path.stat().st_size == 0:
+        return np.empty((2, 0), dtype=np.int64)
+    return np.memmap(path, dtype=DTYPE, mode="r").reshape(2, -1)
+
+
+def fresh(merged: NDArray[np.int64], ids: NDArray[np.int64]) -> int:
+    """How many of `ids` fall in the disjoint, sorted ranges of `merged`.
+
+    >>> fresh(np.array([[3, 10], [5, 20]]), np.array([1, 5, 8, 11, 17, 32]))
+    3
+    """
+    starts, ends = merged
+    index = np.searchsorted(starts, ids, side="right") - 1
+    inside = index >= 0
+    inside[inside] = ids[inside] <= ends[index[inside]]
+    return int(inside.sum())
+
+
+def fresh_file(
+    input_path: Path, merged: NDArray[np.int64], chunk_bytes: int = CHUNK_BYTES
+) -> int:
+    """Star 1 for the input at `input_path`, streaming its IDs in blocks."""
+
+    total = 0
+    with open(input_path, "rb") as source:
+        for section, block in sections(source, chunk_bytes):
+            if section:
+                total += fresh(merged, parsing.integers(block).astype(np.int64))
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="days.day5.external", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("input", type=Path)
+    parser.add_argument("--output", type=Path, default=Path("fresh.intervals"))
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20)
+    args = parser.parse_args(argv)
+
+    chunk_bytes = args.chunk_mb << 20
+    print(f"star2 {merge_file(args.input, args.output, chunk_bytes)}")
+    print(f"star1 {fresh_file(args.input, intervals(args.output), chunk_bytes)}")
+    print(f"wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 from itertools import groupby
 import math
 from pathlib import Path
+import random
+from typing import Iterator
 
 
 @dataclass(eq=True, frozen=True, slots=True)
@@ -17,62 +19,111 @@ class Problem:
         return math.prod(int(v) for v in self.values)
 
 
-def parse_input(input_str: str) -> list[Problem]:
+@dataclass(frozen=True, slots=True)
+class Worksheet:
+    rows: tuple[str, ...]
+    operators: str
+
+
+def parse_input(input_str: str) -> Worksheet:
     """
-    >>> parse_input(Path("days/day6/examples/1.txt").read_text())
-    [Problem(values=('123', '45', '6'), operator='*'), Problem(values=('328', '64', '98'), operator='+'), Problem(values=('51', '387', '215'), operator='*'), Problem(values=('64', '23', '314'), operator='+')]
+    >>> parse_input("12 3\\n 4 5\\n*  +\\n")
+    Worksheet(rows=('12 3', ' 4 5'), operators='*+')
     """
 
     *rows, operators = input_str.splitlines()
+    return Worksheet(rows=tuple(rows), operators=operators.replace(" ", ""))
+
+
+def row_problems(sheet: Worksheet) -> list[Problem]:
+    """
+    >>> row_problems(parse_input(Path("days/day6/examples/1.txt").read_text()))
+    [Problem(values=('123', '45', '6'), operator='*'), Problem(values=('328', '64', '98'), operator='+'), Problem(values=('51', '387', '215'), operator='*'), Problem(values=('64', '23', '314'), operator='+')]
+    """
 
-    operators = operators.replace(" ", "")
-    value_sets = list(zip(*(row.split() for row in rows)))
+    value_sets = list(zip(*(row.split() for row in sheet.rows)))
 
     return [
-        Problem(values=values, operator=operators[i])
+        Problem(values=values, operator=sheet.operators[i])
         for i, values in enumerate(value_sets)
     ]
 
 
-def parse_input2(input_str: str) -> list[Problem]:
+def column_problems(sheet: Worksheet) -> list[Problem]:
     """
-    >>> parse_input2(Path("days/day6/examples/1.txt").read_text())
+    >>> column_problems(parse_input(Path("days/day6/examples/1.txt").read_text()))
     [Problem(values=('1', '24', '356'), operator='*'), Problem(values=('369', '248', '8'), operator='+'), Problem(values=('32', '581', '175'), operator='*'), Problem(values=('623', '431', '4'), operator='+')]
     """
-    *rows, operators = input_str.splitlines()
-    operators = operators.replace(" ", "")
     value_sets = [
         list(group)
         for key, group in groupby(
-            ("".join(e).strip() for e in zip(*rows)), lambda e: e == ""
+            ("".join(e).strip() for e in zip(*sheet.rows)), lambda e: e == ""
         )
         if not key
     ]
     return [
-        Problem(values=tuple(values), operator=operators[i])
+        Problem(values=tuple(values), operator=sheet.operators[i])
         for i, values in enumerate(value_sets)
     ]
 
 
 def grand_total(problems: list[Problem]) -> int:
     """
-    >>> grand_total(parse_input(Path("days/day6/examples/1.txt").read_text()))
-    4277556
-    >>> grand_total(parse_input2(Path("days/day6/examples/1.txt").read_text()))
-    3263827
-    >>> grand_total(parse_input(Path("days/day6/input.txt").read_text()))
-    7326876294741
-    >>> grand_total(parse_input2(Path("days/day6/input.txt").read_text()))
-    10756006415204
+    >>> example = parse_input(Path("days/day6/examples/1.txt").read_text())
+    >>> grand_total(row_problems(example)), grand_total(column_problems(example))
+    (4277556, 3263827)
+    >>> sheet = parse_input(Path("days/day6/input.txt").read_text())
+    >>> grand_total(row_problems(sheet)), grand_total(column_problems(sheet))
+    (7326876294741, 10756006415204)
     """
     return sum(problem.solve() for problem in problems)
 
 
+def solve_star1(sheet: Worksheet) -> int:
+    return grand_total(row_problems(sheet))
+
+
+def solve_star2(sheet: Worksheet) -> int:
+    return grand_total(column_problems(sheet))
+
+
 def star1(input_str: str) -> str:
-    problems = parse_input(input_str)
-    return str(grand_total(problems))
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
-    problems = parse_input2(input_str)
-    return str(grand_total(problems))
+    return str(solve_star2(parse_input(input_str)))
+
+
+def generate(
+    size: int, seed: int = 0, rows: int = 4, max_digits: int = 4
+) -> Iterator[str]:
+    """Yields a worksheet of `size` problems with `rows` numbers each.
+
+    The sheet is written row by row, so each problem's numbers are
+    regenerated from a per-problem seed instead of being held in memory.
+
+    >>> "".join(generate(2, seed=1, rows=2, max_digits=3)).splitlines()
+    ['11 29', '37  2', '+  + ']
+    """
+
+    def problem(i: int) -> tuple[list[str], str, bool]:
+        # Digit counts are monotonic down a problem, so every column of
+        # digits is contiguous when read top to bottom.
+        rng = random.Random(f"{seed}-{i}")
+        lengths = sorted(
+            (rng.randint(1, max_digits) for _ in range(rows)),
+            reverse=rng.random() < 0.5,
+        )
+        values = [str(rng.randint(10 ** (n - 1), 10**n - 1)) for n in lengths]
+        return values, rng.choice("+*"), rng.random() < 0.5
+
+    for row in range(rows + 1):
+        for i in range(size):
+            values, operator, left = problem(i)
+            width = max(len(v) for v in values)
+            cell = operator if row == rows else values[row]
+            if i:
+                yield " "
+            yield cell.ljust(width) if left or row == rows else cell.rjust(width)
+        yield "\n"
@@ -1,17 +1,18 @@
-from functools import cache
+from __future__ import annotations
+from dataclasses import dataclass
 from pathlib import Path
+import random
+from typing import Iterator
 
+from days.memo import memoize
 
-def parse_input(input_str: str) -> list[list[int]]:
-    """
-    >>> parse_input(Path("days/day7/examples/1.txt").read_text())
-    [[0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0], [0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0], [0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 0, 0, 1, 0]]
-    """
-    result = [[1 if c in "S^" else 0 for c in line] for line in input_str.splitlines()]
-    return [line for line in result if any(line)]
 
+def parse_input(input_str: str) -> tuple[str, ...]:
+    """The manifold's non-empty rows as strings of 1s (`S` or `^`) and 0s.
 
-def parse_input_bits(input_str: str) -> tuple[str, ...]:
+    >>> parse_input("..S..\\n.....\\n.^.^.\\n")
+    ('00100', '01010')
+    """
     lines = [
         "".join("1" if c in "S^" else "0" for c in line)
         for line in input_str.splitlines()
@@ -19,6 +20,14 @@ def parse_input_bits(input_str: str) -> tuple[str, ...]:
     return tuple(line for line in lines if "1" in line)
 
 
+def rows(bits: tuple[str, ...]) -> list[list[int]]:
+    """
+    >>> rows(parse_input(Path("days/day7/examples/1.txt").read_text()))
+    [[0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 1, 0, 1, 0, 1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0, 0], [0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0, 0], [0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 0, 0, 1, 0]]
+    """
+    return [[int(c) for c in line] for line in bits]
+
+
 def split(a: list[int], b: list[int]) -> tuple[list[int], int]:
     """
     >>> split([0], [0])
@@ -56,7 +65,7 @@ def split(a: list[int], b: list[int]) -> tuple[list[int], int]:
 
 def total_splits(inp: list[list[int]]) -> int:
     """
-    >>> total_splits(parse_input(Path("days/day7/examples/1.txt").read_text()))
+    >>> total_splits(rows(parse_input(Path("days/day7/examples/1.txt").read_text())))
     21
     """
     total_count = 0
@@ -67,7 +76,7 @@ def total_splits(inp: list[list[int]]) -> int:
     return total_count
 
 
-@cache
+@memoize()
 def quantum_split(xs: tuple[str]) -> int:
     """
     >>> quantum_split(("010",))
@@ -78,7 +87,7 @@ def quantum_split(xs: tuple[str]) -> int:
     2
     >>> quantum_split(("00100", "00100", "01010"))
     4
-    >>> quantum_split(parse_input_bits(Path("days/day7/examples/1.txt").read_text()))
+    >>> quantum_split(parse_input(Path("days/day7/examples/1.txt").read_text()))
     40
     """
 
@@ -106,11 +115,124 @@ def quantum_split(xs: tuple[str]) -> int:
     return quantum_split((x,) + ys)
 
 
+@dataclass(frozen=True)
+class Manifold:
+    """What a beam entering the top row at each column leads to:
+    `timelines[c]` is how many timelines it splits into, as counted by
+    `quantum_split`, and `splits[c]` how many splitters it hits, as counted
+    by `total_splits`. Beams that leave the board end there.
+
+    >>> manifold = Manifold.build(parse_input(Path("days/day7/examples/1.txt").read_text()))
+    >>> manifold.timelines[manifold.start], manifold.splits[manifold.start]
+    (40, 21)
+    >>> manifold.best_entry(), manifold.timelines[manifold.best_entry()]
+    (7, 40)
+    """
+
+    start: int
+    timelines: tuple[int, ...]
+    splits: tuple[int, ...]
+
+    @classmethod
+    def build(cls, bits: tuple[str, ...]) -> Manifold:
+        """Sweeps the rows from the bottom up. Below the last row a beam
+        anywhere is one timeline that hits nothing; a beam at column i
+        above a splitter then goes on from columns i - 1 and i + 1 of the
+        splitter's row, and otherwise from column i.
+
+        The splitters reachable from each column are kept as a bitset, so a
+        splitter reached along several paths is counted once. The sweep is
+        O(rows * width) but for the bitsets: with S splitters, each one ORs
+        two bitsets of up to S bits, adding O(S ** 2 / 64) word operations.
+        Adding up per-column counts instead would count shared splitters
+        twice.
+
+        >>> Manifold.build(("00100", "00100", "01010"))
+        Manifold(start=2, timelines=(1, 2, 4, 2, 1), splits=(0, 1, 3, 1, 0))
+        """
+        width = len(bits[0])
+        timelines = [1] * width
+        reached = [0] * width
+        splitter = 1
+        for row in reversed(bits[1:]):
+            above_timelines = timelines[:]
+            above_reached = reached[:]
+            for i, cell in enumerate(row):
+                if cell != "1":
+                    continue
+                left, right = i - 1, i + 1
+                above_timelines[i] = (timelines[left] if left >= 0 else 1) + (
+                    timelines[right] if right < width else 1
+                )
+                above_reached[i] = (
+                    splitter
+                    | (reached[left] if left >= 0 else 0)
+                    | (reached[right] if right < width else 0)
+                )
+                splitter <<= 1
+            timelines, reached = above_timelines, above_reached
+
+        return cls(
+            bits[0].find("1"),
+            tuple(timelines),
+            tuple(mask.bit_count() for mask in reached),
+        )
+
+    def best_entry(self, by: str = "timelines") -> int:
+        """The leftmost column with the most timelines (or splits)."""
+
+        if by not in ("timelines", "splits"):
+            raise ValueError(f"can't rank entries by {by!r}")
+        counts = getattr(self, by)
+        return max(range(len(counts)), key=counts.__getitem__)
+
+
+def solve_star1(bits: tuple[str, ...]) -> int:
+    return total_splits(rows(bits))
+
+
+def solve_star2(bits: tuple[str, ...]) -> int:
+    manifold = Manifold.build(bits)
+    return manifold.timelines[manifold.start]
+
+
 def star1(input_str: str) -> str:
-    inp = parse_input(input_str)
-    return str(total_splits(inp))
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
-    inp = parse_input_bits(input_str)
-    return str(quantum_split(inp))
+    return str(solve_star2(parse_input(input_str)))
+
+
+def generate(
+    size: int, seed: int = 0, width: int | None = None, density: float = 0.5
+) -> Iterator[str]:
+    """Yields a manifold with `size` splitter rows under the `S` row.
+
+    Rows alternate between empty and splitter rows, and splitters only sit
+    where a beam from `S` can arrive, as in the real inputs. The default
+    width of `2 * size + 3` keeps every beam on the board.
+
+    >>> "".join(generate(2, seed=1, width=7)).splitlines()
+    ['...S...', '.......', '...^...', '.......', '.......', '.......']
+    """
+    rng = random.Random(seed)
+    width = width or 2 * size + 3
+    start = width // 2
+
+    yield "." * start + "S" + "." * (width - start - 1) + "\n"
+    for row in range(1, size + 1):
+        yield "." * width + "\n"
+        yield "".join(
+            (
+                "^"
+                if 0 < x < width - 1
+                and (x - start + row) % 2 == 1
+                and abs(x - start) < row
+                and rng.random() < density
+                else "."
+            )
+            for x in range(width)
+        )
+        yield "\n"
+    yield "." * width + "\n"
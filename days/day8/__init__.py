@@ -2,10 +2,21 @@ from __future__ import annotations
 from itertools import combinations
 from math import prod
 from pathlib import Path
+import random
+from typing import TYPE_CHECKING, Iterator
 
+from days import parsing
+from days.lazy import lazy_import
+from days.stream import Source, lines
 from demapples.dsu import DisjointSetUnion
 from demapples.vec import Vec3
 
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
 
 def parse_input(input_str: str) -> list[Vec3]:
     """
@@ -18,6 +29,29 @@ def parse_input(input_str: str) -> list[Vec3]:
     ]
 
 
+def parse_stream(source: Source) -> list[Vec3]:
+    """Like `parse_input`, but reads lines lazily from a binary file or mmap.
+
+    >>> with open("days/day8/examples/1.txt", "rb") as file:
+    ...     parse_stream(file) == parse_input(Path("days/day8/examples/1.txt").read_text())
+    True
+    """
+    return [
+        Vec3(x=int(x_str), y=int(y_str), z=int(z_str))
+        for x_str, y_str, z_str in (line.split(",") for line in lines(source) if line)
+    ]
+
+
+def parse_input_array(input_str: parsing.Data) -> NDArray[np.int64]:
+    """The junction boxes as an (n, 3) matrix.
+
+    >>> parse_input_array("1,2,3\\n4,5,6\\n")
+    array([[1, 2, 3],
+           [4, 5, 6]])
+    """
+    return parsing.integer_rows(input_str, 3)
+
+
 def shortest_pairs(nodes: list[Vec3]) -> list[tuple[int, int]]:
     """
     >>> shortest_pairs(parse_input(Path("days/day8/examples/1.txt").read_text()))[:4]
@@ -55,17 +89,34 @@ def connect(nodes: list[Vec3], n: int | None = None) -> tuple[int, int | None]:
     return p1_result, p2_result
 
 
+def solve_star1(nodes: list[Vec3]) -> int:
+    return connect(nodes, 1000)[0]
+
+
+def solve_star2(nodes: list[Vec3]) -> int | None:
+    return connect(nodes)[1]
+
+
 def star1(input_str: str) -> str:
-    inp = parse_input(input_str)
-    return str(connect(inp, 1000)[0])
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
-    inp = parse_input(input_str)
-    return str(connect(inp)[1])
+    return str(solve_star2(parse_input(input_str)))
 
 
 def just_sort(input_str: str) -> str:
     inp = parse_input(input_str)
     pairs = shortest_pairs(inp)
     return ""
+
+
+def generate(size: int, seed: int = 0, max_coord: int = 100_000) -> Iterator[str]:
+    """Yields `size` junction boxes as `x,y,z` lines.
+
+    >>> "".join(generate(2, seed=1, max_coord=100))
+    '17,72,97\\n8,32,15\\n'
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield f"{rng.randint(0, max_coord)},{rng.randint(0, max_coord)},{rng.randint(0, max_coord)}\n"
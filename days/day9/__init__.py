@@ -1,11 +1,23 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from functools import cache
 from itertools import combinations
 from pathlib import Path
-
+import random
+from typing import TYPE_CHECKING, Iterator
+
+from days import parsing
+from days.coords import LOW, pack_pair, swap_corners, unpack_pair
+from days.lazy import lazy_import
+from days.memo import memoize
+from days.stream import Source, lines
 from demapples.vec import Vec2
 
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
 
 @dataclass(eq=True, frozen=True, slots=True)
 class Line:
@@ -115,51 +127,116 @@ class Rectangle:
 
 
 class Shape:
+    """A closed rectilinear polygon. Its edges are also kept as (at, lo, hi)
+    int triples, horizontal ones at y = at from x = lo to hi and vertical
+    ones at x = at, which the containment tests scan without making a
+    `Vec2` or `Line`."""
+
     def __init__(self, lines: list[Line]) -> None:
         assert lines[0].p1 == lines[-1].p2, "Shape must be closed"
         self.lines = tuple(lines)
-        self.points = set(line.p1 for line in lines)
+        self.points = set(pack_pair(line.p1.x, line.p1.y) for line in lines)
         self.vertical_lines = tuple(line for line in lines if line.vertical)
         self.horizontal_lines = tuple(line for line in lines if line.horizontal)
+        self.verticals = tuple(
+            (line.p1.x, line.min_y, line.max_y) for line in self.vertical_lines
+        )
+        self.horizontals = tuple(
+            (line.p1.y, line.min_x, line.max_x) for line in self.horizontal_lines
+        )
 
-    @cache
     def contains_point(self, point: Vec2) -> bool:
-        if point in self.points:
+        return self.contains_packed(pack_pair(point.x, point.y))
+
+    @memoize("weak")
+    def contains_packed(self, packed: int) -> bool:
+        """Whether the point packed by `pack_pair` is inside or on the shape.
+
+        >>> shape = Shape.from_points(parse_input(Path("days/day9/examples/1.txt").read_text()))
+        >>> [shape.contains_packed(pack_pair(x, 3)) for x in (1, 2, 7, 11, 12)]
+        [False, True, True, True, False]
+        """
+        if packed in self.points:
             return True
 
-        x, y = point.x, point.y
+        x, y = unpack_pair(packed)
 
         # Treat points on the boundary as inside.
-        for line in self.horizontal_lines:
-            if y == line.p1.y:
-                if line.min_x <= x <= line.max_x:
-                    return True
+        for at, lo, hi in self.horizontals:
+            if y == at and lo <= x <= hi:
+                return True
 
-        for line in self.vertical_lines:
-            if x == line.p1.x:
-                if line.min_y <= y <= line.max_y:
-                    return True
+        for at, lo, hi in self.verticals:
+            if x == at and lo <= y <= hi:
+                return True
 
         crossings = 0
-        for line in self.vertical_lines:
-            x0 = line.p1.x
-
-            if x < x0 and line.min_y <= y < line.max_y:
+        for at, lo, hi in self.verticals:
+            if x < at and lo <= y < hi:
                 crossings += 1
 
         return (crossings % 2) == 1
 
-    @cache
+    def crosses_horizontal(self, y: int, lo: int, hi: int) -> bool:
+        """Whether an edge touches the segment at `y` from x = `lo` to `hi`."""
+
+        return any(
+            at == y and lo <= max_x and min_x <= hi
+            for at, min_x, max_x in self.horizontals
+        ) or any(
+            lo <= at <= hi and min_y <= y <= max_y
+            for at, min_y, max_y in self.verticals
+        )
+
+    def crosses_vertical(self, x: int, lo: int, hi: int) -> bool:
+        """Whether an edge touches the segment at `x` from y = `lo` to `hi`."""
+
+        return any(
+            at == x and lo <= max_y and min_y <= hi
+            for at, min_y, max_y in self.verticals
+        ) or any(
+            lo <= at <= hi and min_x <= x <= max_x
+            for at, min_x, max_x in self.horizontals
+        )
+
+    @memoize("weak")
     def intersects_line(self, line: Line) -> bool:
         return any(line.intersects(other) for other in self.lines)
 
-    def contains_rectangle(self, rectangle: Rectangle) -> bool:
-        return all(
-            self.contains_point(corner) for corner in rectangle.other_corners()
-        ) and not any(
-            self.intersects_line(side) for side in rectangle.sides_with_margin(-1)
+    def contains_box(self, p: int, q: int) -> bool:
+        """`contains_rectangle` for the rectangle with opposite corners `p`
+        and `q`, packed by `pack_pair`.
+
+        Its sides are tested one cell beyond each corner, moving `p` by
+        (-1, -1) and `q` by (1, 1), as `sides_with_margin(-1)` draws them.
+        """
+        corner1, corner2 = swap_corners(p, q)
+        if not (self.contains_packed(corner1) and self.contains_packed(corner2)):
+            return False
+
+        x1, y1 = unpack_pair(p)
+        x2, y2 = unpack_pair(q)
+        x1, y1, x2, y2 = x1 - 1, y1 - 1, x2 + 1, y2 + 1
+        min_x, max_x = min(x1, x2), max(x1, x2)
+        min_y, max_y = min(y1, y2), max(y1, y2)
+        return not (
+            self.crosses_horizontal(y1, min_x, max_x)
+            or self.crosses_vertical(x2, min_y, max_y)
+            or self.crosses_horizontal(y2, min_x, max_x)
+            or self.crosses_vertical(x1, min_y, max_y)
         )
 
+    def contains_rectangle(self, rectangle: Rectangle) -> bool:
+        """
+        >>> shape = Shape.from_points(parse_input(Path("days/day9/examples/1.txt").read_text()))
+        >>> shape.contains_rectangle(Rectangle(Vec2(9, 5), Vec2(2, 3)))
+        True
+        >>> shape.contains_rectangle(Rectangle(Vec2(7, 1), Vec2(2, 5)))
+        False
+        """
+        p1, p2 = rectangle.p1, rectangle.p2
+        return self.contains_box(pack_pair(p1.x, p1.y), pack_pair(p2.x, p2.y))
+
     @classmethod
     def from_points(cls, points: list[Vec2]) -> Shape:
         lines = [Line(points[i], points[i + 1]) for i in range(len(points) - 1)]
@@ -178,6 +255,29 @@ def parse_input(input_str: str) -> list[Vec2]:
     ]
 
 
+def parse_stream(source: Source) -> list[Vec2]:
+    """Like `parse_input`, but reads lines lazily from a binary file or mmap.
+
+    >>> with open("days/day9/examples/1.txt", "rb") as file:
+    ...     parse_stream(file) == parse_input(Path("days/day9/examples/1.txt").read_text())
+    True
+    """
+    return [
+        Vec2(x=int(x_str), y=int(y_str))
+        for x_str, y_str in (line.split(",") for line in lines(source) if line)
+    ]
+
+
+def parse_input_array(input_str: parsing.Data) -> NDArray[np.int64]:
+    """The red tiles as an (n, 2) matrix.
+
+    >>> parse_input_array("1,2\\n3,4\\n")
+    array([[1, 2],
+           [3, 4]])
+    """
+    return parsing.integer_rows(input_str, 2)
+
+
 def largest(points: list[Vec2]) -> int:
     """
     >>> largest(parse_input(Path("days/day9/examples/1.txt").read_text()))
@@ -192,35 +292,117 @@ def largest2(points: list[Vec2]) -> int:
     24
     """
     shape = Shape.from_points(points)
+    packed = [pack_pair(point.x, point.y) for point in points]
     max_area = 0
-    for pair in combinations(points, 2):
-        rect = Rectangle(*pair)
-        area = rect.area()
-        if area > max_area and shape.contains_rectangle(rect):
+    for p, q in combinations(packed, 2):
+        # Differences of the biased halves are differences of coordinates.
+        area = (abs((q & LOW) - (p & LOW)) + 1) * (abs((q >> 32) - (p >> 32)) + 1)
+        if area > max_area and shape.contains_box(p, q):
             max_area = area
     return max_area
 
 
+def solve_star1(points: list[Vec2]) -> int:
+    return largest(points)
+
+
+def solve_star2(points: list[Vec2]) -> int:
+    return largest2(points)
+
+
 def star1(input_str: str) -> str:
-    inp = parse_input(input_str)
-    return str(largest(inp))
+    return str(solve_star1(parse_input(input_str)))
 
 
 def star2(input_str: str) -> str:
-    inp = parse_input(input_str)
-    return str(largest2(inp))
+    return str(solve_star2(parse_input(input_str)))
 
 
-def render(input_str: str) -> None:
-    points = parse_input(input_str)
-    shape = Shape.from_points(points)
+def decimate(points: NDArray[np.int64], cell: int = 1) -> NDArray[np.int64]:
+    """The closed polygon `points` with each vertex snapped down to a multiple
+    of `cell`, keeping only the vertices where it turns.
+
+    Vertices on a straight run between their neighbours, and vertices that
+    snap onto the one before them, draw nothing of their own. A polygon
+    that snaps flat onto a line is left as it is.
+
+    >>> decimate(np.array([[0, 0], [1, 0], [2, 0], [2, 2], [0, 2]])).tolist()
+    [[0, 0], [2, 0], [2, 2], [0, 2]]
+    >>> decimate(np.array([[0, 0], [4, 0], [4, 1], [5, 1], [5, 4], [0, 4]]), cell=2).tolist()
+    [[0, 0], [4, 0], [4, 4], [0, 4]]
+    """
+    points = points // cell * cell
+    while True:
+        moved = (points != np.roll(points, 1, axis=0)).any(axis=1)
+        if moved.sum() < 3:
+            return points
+        points = points[moved]
+        before = points - np.roll(points, 1, axis=0)
+        after = np.roll(points, -1, axis=0) - points
+        turns = before[:, 0] * after[:, 1] != before[:, 1] * after[:, 0]
+        if turns.all() or turns.sum() < 3:
+            return points
+        points = points[turns]
+
+
+def render(
+    input_str: parsing.Data, output: Path, pixels: int = 2000, simplify: bool = True
+) -> int:
+    """Draws the polygon to `output` (.png or .svg) as a single LineCollection
+    and returns how many segments were drawn.
+
+    With `simplify`, vertices are snapped to the size of a pixel and
+    decimated first, so a million-vertex input draws about as many segments
+    as the image has pixels across.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     render(Path("days/day9/examples/1.txt").read_text(), Path(tmp, "day9.svg"))
+    8
+    """
+    from days.render import add_lines, figure, save
+
+    points = parse_input_array(input_str)
+    if simplify:
+        span = int((points.max(axis=0) - points.min(axis=0)).max())
+        points = decimate(points, max(1, span // pixels))
+    segments = np.stack((points, np.roll(points, -1, axis=0)), axis=1)
 
-    import matplotlib.pyplot as plt
+    fig, ax = figure(pixels)
+    add_lines(ax, segments, colors="red", linewidths=0.5)
+    ax.autoscale_view()
+    ax.set_aspect("equal")  # keep scale consistent so lines aren't distorted
+    save(fig, output)
+    return len(segments)
 
-    for line in shape.lines:
-        x1, y1 = line.p1.x, line.p1.y
-        x2, y2 = line.p2.x, line.p2.y
-        plt.plot([x1, x2], [y1, y2], color="red")
 
-    plt.axis("equal")  # keep scale consistent so lines aren't distorted
-    plt.show()
+def generate(
+    size: int, seed: int = 0, max_step: int = 1000, max_height: int = 100_000
+) -> Iterator[str]:
+    """Yields the vertices of a rectilinear polygon with `size` vertices
+    (rounded down to an even number, at least 4).
+
+    The polygon is a histogram: a staircase of columns of random height
+    standing on the x axis.
+
+    >>> "".join(generate(6, seed=1, max_step=10, max_height=10))
+    '0,3\\n10,3\\n10,2\\n15,2\\n15,0\\n0,0\\n'
+    """
+    rng = random.Random(seed)
+    columns = max(1, (size - 2) // 2)
+
+    x = 0
+    height = 0
+    for _ in range(columns):
+        new_height = height
+        while new_height == height:
+            new_height = rng.randint(1, max_height)
+        if height:
+            yield f"{x},{height}\n"
+        yield f"{x},{new_height}\n"
+        height = new_height
+        x += rng.randint(1, max_step)
+
+    yield f"{x},{height}\n"
+    yield f"{x},0\n"
+    yield "0,0\n"
@@ -0,0 +1,28 @@
+"""Deferred imports for heavy dependencies, so importing a day stays cheap."""
+
+from __future__ import annotations
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns module `name`, which is only executed on first attribute access.
+
+    >>> json = lazy_import("json")
+    >>> json.dumps([1])
+    '[1]'
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
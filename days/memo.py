@@ -0,0 +1,335 @@
+"""Memoization with a choice of policy and counters that can be inspected.
+
+    @memoize()                     # unbounded, like functools.cache
+    @memoize("lru", maxsize=4096)  # least recently used entries evicted
+    @memoize("weak")               # per instance, dropped with the instance
+
+The "weak" policy is for methods: each instance's results are kept in a
+`WeakKeyDictionary` under the instance, so caching doesn't keep instances
+alive the way `functools.cache` on a method does. A result that held the
+instance would keep it alive all the same, so the policy refuses results
+that are, or directly hold, their instance.
+
+Counters are registered under the function's qualified name, so closures
+memoized anew on each call add up to one entry. `snapshot` reads every
+registered name's counters, its live entries and an estimate of their size
+in bytes; the runner reports the change over each star.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from functools import wraps
+from itertools import islice
+import sys
+from typing import Callable, Iterable, TypeVar, cast
+import weakref
+
+F = TypeVar("F", bound=Callable[..., object])
+
+POLICIES = ("unbounded", "lru", "weak")
+# Entries measured to estimate the size of a cache.
+SAMPLE = 64
+_KWARGS = object()
+
+
+@dataclass
+class Counts:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+@dataclass(frozen=True)
+class MemoStats:
+    name: str
+    policy: str
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def since(self, before: MemoStats | None) -> MemoStats:
+        """These counters less those of the earlier snapshot `before`."""
+
+        if before is None:
+            return self
+        return replace(
+            self,
+            hits=self.hits - before.hits,
+            misses=self.misses - before.misses,
+            evictions=self.evictions - before.evictions,
+        )
+
+
+class Memo:
+    """The entries of one memoized function (or one closure of it)."""
+
+    def __init__(self, policy: str, counts: Counts) -> None:
+        self.policy = policy
+        self.counts = counts
+        self.entries: dict[object, object] = OrderedDict() if policy == "lru" else {}
+        self.instances: weakref.WeakKeyDictionary[object, dict[object, object]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def tables(self) -> list[dict[object, object]]:
+        if self.policy == "weak":
+            return list(self.instances.values())
+        return [self.entries]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.instances.clear()
+
+
+@dataclass
+class Registered:
+    policy: str
+    counts: Counts
+    memos: weakref.WeakSet[Memo]
+
+
+_registry: dict[str, Registered] = {}
+
+
+def estimate_bytes(value: object, depth: int = 2, seen: set[int] | None = None) -> int:
+    """`sys.getsizeof` of `value` and, `depth` levels down, of what it holds
+    (scaled up from the first `SAMPLE` items), counting NumPy arrays by
+    their buffers. Objects already in `seen` count as nothing, so what
+    entries share is counted once.
+
+    >>> estimate_bytes((1, 2)) == sys.getsizeof((1, 2)) + 2 * sys.getsizeof(1)
+    True
+    >>> word = "shared" * 10
+    >>> estimate_bytes((word, word)) == sys.getsizeof((word, word)) + sys.getsizeof(word)
+    True
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return sys.getsizeof(value) + nbytes
+    size = sys.getsizeof(value)
+    if depth == 0:
+        return size
+
+    if isinstance(value, dict):
+        items: list[object] = [*value.keys(), *value.values()]
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        items = list(value)
+    elif hasattr(value, "__dict__"):
+        items = list(vars(value).values())
+    else:
+        return size
+    measured = items[:SAMPLE]
+    inner = sum(estimate_bytes(item, depth - 1, seen) for item in measured)
+    return size + inner * len(items) // max(1, len(measured))
+
+
+def holds(value: object, instance: object) -> bool:
+    """Whether `value` is `instance` or holds it one level down.
+
+    >>> class Box:
+    ...     pass
+    >>> box = Box()
+    >>> holds([1, box], box), holds({"box": box}, box), holds((1, 2), box)
+    (True, True, False)
+    """
+    if value is instance:
+        return True
+    if isinstance(value, dict):
+        items: Iterable[object] = (*value.keys(), *value.values())
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        items = value
+    elif hasattr(value, "__dict__"):
+        items = vars(value).values()
+    else:
+        return False
+    return any(item is instance for item in items)
+
+
+def stats(name: str) -> MemoStats:
+    registered = _registry[name]
+    tables = [table for memo in registered.memos for table in memo.tables()]
+    entries = sum(len(table) for table in tables)
+    # Every step-th entry, since entries made early or late may differ in size.
+    step = max(1, entries // SAMPLE)
+    sample = [item for table in tables for item in islice(table.items(), 0, None, step)]
+    # What entries point to is often shared (strings of an input, say), so
+    # only the keys and values themselves and what they hold directly count.
+    per_entry = (
+        sum(estimate_bytes(key, 1) + estimate_bytes(value, 1) for key, value in sample)
+        / len(sample)
+        if sample
+        else 0.0
+    )
+    overhead = sum(sys.getsizeof(table) for table in tables)
+    counts = registered.counts
+    return MemoStats(
+        name,
+        registered.policy,
+        counts.hits,
+        counts.misses,
+        counts.evictions,
+        entries,
+        overhead + int(per_entry * entries),
+    )
+
+
+def snapshot() -> dict[str, MemoStats]:
+    """The counters of every memoized function in this process."""
+
+    return {name: stats(name) for name in _registry}
+
+
+def changes(
+    before: dict[str, MemoStats], after: dict[str, MemoStats]
+) -> list[MemoStats]:
+    """The functions called between two snapshots, with their counters'
+    changes and their entries at `after`."""
+
+    moved = [stats.since(before.get(name)) for name, stats in after.items()]
+    return [stats for stats in moved if stats.hits or stats.misses]
+
+
+def format_stats(stats: MemoStats) -> str:
+    """
+    >>> format_stats(MemoStats("days.day7.quantum_split", "unbounded", 30, 10, 0, 10, 2048))
+    'days.day7.quantum_split  unbounded  75.0% of 40 calls hit, 0 evicted, 10 entries, ~2.0 KiB'
+    """
+    return (
+        f"{stats.name}  {stats.policy}  {stats.hit_rate:.1%} of"
+        f" {stats.hits + stats.misses} calls hit, {stats.evictions} evicted,"
+        f" {stats.entries} entries, ~{stats.bytes / 1024:.1f} KiB"
+    )
+
+
+def memoize(policy: str = "unbounded", maxsize: int | None = None) -> Callable[[F], F]:
+    """Decorator caching a function's results by its (hashable) arguments.
+
+    >>> @memoize("lru", maxsize=2)
+    ... def square(x):
+    ...     return x * x
+    >>> [square(x) for x in (1, 2, 1, 3, 2)]
+    [1, 4, 1, 9, 4]
+    >>> info = square.cache_info()
+    >>> info.hits, info.misses, info.evictions, info.entries
+    (1, 4, 2, 2)
+
+    >>> class Point:
+    ...     def __init__(self, x):
+    ...         self.x = x
+    ...     @memoize("weak")
+    ...     def norm(self):
+    ...         return abs(self.x)
+    >>> point = Point(-3)
+    >>> point.norm(), point.norm(), Point.norm.cache_info().entries
+    (3, 3, 1)
+    >>> del point
+    >>> Point.norm.cache_info().entries
+    0
+
+    >>> class Node:
+    ...     @memoize("weak")
+    ...     def path(self):
+    ...         return [self]
+    >>> Node().path()
+    Traceback (most recent call last):
+    ...
+    ValueError: days.memo.Node.path returned a value holding its instance, which a weak cache would keep alive
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"unknown policy {policy!r}, expected one of {POLICIES}")
+    if (policy == "lru") != (maxsize is not None):
+        raise ValueError("maxsize is required by, and only allowed with, lru")
+
+    def decorate(function: F) -> F:
+        name = f"{function.__module__}.{function.__qualname__}"
+        registered = _registry.get(name)
+        if registered is None or registered.policy != policy:
+            registered = Registered(policy, Counts(), weakref.WeakSet())
+            _registry[name] = registered
+        counts = registered.counts
+        memo = Memo(policy, counts)
+        registered.memos.add(memo)
+
+        def key_of(args: tuple[object, ...], kwargs: dict[str, object]) -> object:
+            if kwargs:
+                return (*args, _KWARGS, *sorted(kwargs.items()))
+            return args
+
+        if policy == "weak":
+            instances = memo.instances
+
+            @wraps(function)
+            def wrapper(self: object, *args: object, **kwargs: object) -> object:
+                table = instances.get(self)
+                if table is None:
+                    table = instances[self] = {}
+                key = key_of(args, kwargs)
+                try:
+                    value = table[key]
+                except KeyError:
+                    counts.misses += 1
+                    value = function(self, *args, **kwargs)
+                    if holds(value, self):
+                        raise ValueError(
+                            f"{name} returned a value holding its instance,"
+                            " which a weak cache would keep alive"
+                        ) from None
+                    table[key] = value
+                    return value
+                counts.hits += 1
+                return value
+
+        elif policy == "lru":
+            entries = cast(OrderedDict[object, object], memo.entries)
+            assert maxsize is not None
+
+            @wraps(function)
+            def wrapper(*args: object, **kwargs: object) -> object:
+                key = key_of(args, kwargs)
+                try:
+                    value = entries[key]
+                except KeyError:
+                    counts.misses += 1
+                    value = entries[key] = function(*args, **kwargs)
+                    if len(entries) > maxsize:
+                        entries.popitem(last=False)
+                        counts.evictions += 1
+                    return value
+                entries.move_to_end(key)
+                counts.hits += 1
+                return value
+
+        else:
+            table = memo.entries
+
+            @wraps(function)
+            def wrapper(*args: object, **kwargs: object) -> object:
+                key = key_of(args, kwargs)
+                try:
+                    value = table[key]
+                except KeyError:
+                    counts.misses += 1
+                    value = table[key] = function(*args, **kwargs)
+                    return value
+                counts.hits += 1
+                return value
+
+        wrapper.memo = memo  # type: ignore[attr-defined]
+        wrapper.cache_clear = memo.clear  # type: ignore[attr-defined]
+        wrapper.cache_info = lambda: stats(name)  # type: ignore[attr-defined]
+        return cast(F, wrapper)
+
+    return decorate
@@ -0,0 +1,127 @@
+"""Vectorised extraction of the integers in a puzzle input.
+
+The raw bytes are scanned once with NumPy. Runs of digits are found from a
+digit mask, and their values are built one digit position at a time across
+all runs at once. Values are int64, unless a run is longer than
+`MAX_DIGITS`; then the result falls back to an object array of Python ints.
+"""
+
+from __future__ import annotations
+import mmap
+from typing import TYPE_CHECKING
+
+from days.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+Data = bytes | bytearray | memoryview | mmap.mmap | str
+
+MAX_DIGITS = 18
+NEWLINE = ord("\n")
+MINUS = ord("-")
+
+
+def as_bytes(data: Data) -> NDArray[np.uint8]:
+    """A read-only uint8 view of `data`; only a `str` is copied (to encode it)."""
+
+    if isinstance(data, str):
+        data = data.encode()
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def digit_runs(buf: NDArray[np.uint8]) -> tuple[NDArray[np.intp], NDArray[np.intp]]:
+    """Start and end offsets of every run of ASCII digits.
+
+    >>> digit_runs(as_bytes("L68\\nR5"))
+    (array([1, 5]), array([3, 6]))
+    """
+    digit = (buf >= ord("0")) & (buf <= ord("9"))
+    edges = np.diff(digit.astype(np.int8), prepend=0, append=0)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def run_values(
+    buf: NDArray[np.uint8], starts: NDArray[np.intp], ends: NDArray[np.intp]
+) -> NDArray[np.int64] | NDArray[np.object_]:
+    """The value of each digit run.
+
+    >>> buf = as_bytes("7,1234567890123456789")
+    >>> run_values(buf, *digit_runs(buf))
+    array([7, 1234567890123456789], dtype=object)
+    """
+    lengths = ends - starts
+    if len(lengths) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if lengths.max() > MAX_DIGITS:
+        return np.array(
+            [int(bytes(buf[start:end])) for start, end in zip(starts, ends)],
+            dtype=object,
+        )
+
+    values = np.zeros(len(starts), dtype=np.int64)
+    for offset in range(int(lengths.max())):
+        active = offset < lengths
+        digits = buf[np.where(active, starts + offset, 0)].astype(np.int64) - ord("0")
+        values = np.where(active, values * 10 + digits, values)
+    return values
+
+
+def integers(
+    data: Data, signed: bool = False
+) -> NDArray[np.int64] | NDArray[np.object_]:
+    """Every integer in `data`, in order. With `signed`, a `-` directly before
+    a number negates it unless it follows a digit (as in a range `a-b`).
+
+    >>> integers("11-22,95-115\\n")
+    array([ 11,  22,  95, 115])
+    >>> integers("x=-3, y=4-5", signed=True)
+    array([-3,  4,  5])
+    """
+    buf = as_bytes(data)
+    starts, ends = digit_runs(buf)
+    values = run_values(buf, starts, ends)
+    if signed and len(starts):
+        before = np.maximum(starts - 1, 0)
+        twice_before = np.maximum(starts - 2, 0)
+        after_digit = (starts >= 2) & (buf[twice_before] >= ord("0"))
+        after_digit &= buf[twice_before] <= ord("9")
+        negative = (starts >= 1) & (buf[before] == MINUS) & ~after_digit
+        values = np.where(negative, -values, values)
+    return values
+
+
+def integer_rows(
+    data: Data, k: int, signed: bool = False
+) -> NDArray[np.int64] | NDArray[np.object_]:
+    """An (n, k) matrix of the integers in `data`, for inputs whose lines each
+    hold exactly `k` numbers, such as `x,y,z` or `a-b`.
+
+    >>> integer_rows("1,2,3\\n4,5,6\\n", 3)
+    array([[1, 2, 3],
+           [4, 5, 6]])
+    >>> integer_rows("1,2,3,4\\n", 2)
+    Traceback (most recent call last):
+    ...
+    ValueError: lines do not each hold 2 integers
+    >>> integer_rows("1,2\\n3\\n", 2)
+    Traceback (most recent call last):
+    ...
+    ValueError: lines do not each hold 2 integers
+    """
+    buf = as_bytes(data)
+    starts, _ = digit_runs(buf)
+    values = integers(buf, signed)
+
+    line = np.cumsum(buf == NEWLINE)[starts] if len(starts) else starts
+    if (
+        len(values) % k
+        or np.any(line[::k] != line[k - 1 :: k])
+        or np.any(np.diff(line[::k]) <= 0)
+    ):
+        raise ValueError(f"lines do not each hold {k} integers")
+    return values.reshape(-1, k)
@@ -0,0 +1,74 @@
+"""Headless drawing for the days' `render` functions.
+
+Figures are built on matplotlib's `Figure` directly instead of through
+pyplot, so no display or GUI toolkit is needed: `savefig` picks the Agg
+canvas for raster formats and the SVG canvas for `.svg`, from the output's
+suffix. Large collections are rasterized even in SVG. matplotlib is only
+imported when something is drawn.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from days.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+    import numpy as np
+    from numpy.typing import NDArray
+else:
+    np = lazy_import("numpy")
+
+DPI = 100
+FORMATS = ("png", "svg")
+# Above this many elements, collections are embedded in vector formats as a
+# bitmap instead of one path each.
+RASTERIZE_ABOVE = 10_000
+
+
+def figure(pixels: int) -> tuple[Figure, Axes]:
+    """A square figure `pixels` wide, with one axes and no frame or ticks."""
+
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(pixels / DPI, pixels / DPI), dpi=DPI)
+    ax = fig.add_axes((0.01, 0.01, 0.98, 0.98))
+    ax.set_axis_off()
+    return fig, ax
+
+
+def add_lines(ax: Axes, segments: NDArray, **style: object) -> None:
+    """Adds `segments`, an (n, 2, 2) array, to `ax` as one LineCollection."""
+
+    from matplotlib.collections import LineCollection
+
+    rasterized = len(segments) > RASTERIZE_ABOVE
+    ax.add_collection(LineCollection(segments, rasterized=rasterized, **style))
+
+
+def snap(items: NDArray, cell: NDArray | float) -> NDArray[np.float64]:
+    """`items`, points or segments (pairs of points), snapped down to multiples
+    of `cell` along each axis and without duplicates. With `cell` the size of a
+    pixel, what's dropped would only have been drawn over.
+
+    >>> snap(np.array([[[0, 0], [10, 10]], [[1, 0], [11, 11]]]), 2.0).tolist()
+    [[[0.0, 0.0], [10.0, 10.0]]]
+    """
+    grid = np.floor(items / cell).astype(np.int64).reshape(len(items), -1)
+    origin = grid.min(axis=0)
+    grid -= origin
+    keys = np.ravel_multi_index(grid.T, grid.max(axis=0) + 1)
+    _, first = np.unique(keys, return_index=True)
+    return (grid[first] + origin).reshape(-1, *items.shape[1:]) * cell
+
+
+def save(fig: Figure, output: Path) -> Path:
+    """Writes `fig` to `output`, in the format named by its suffix."""
+
+    if output.suffix.lstrip(".") not in FORMATS:
+        raise ValueError(f"can't render to {output}, expected one of {FORMATS}")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output)
+    return output
@@ -0,0 +1,19 @@
+"""Lazy line iteration over binary inputs, for days with a `parse_stream`."""
+
+from __future__ import annotations
+import mmap
+from typing import BinaryIO, Iterator
+
+Source = BinaryIO | mmap.mmap
+
+
+def lines(source: Source) -> Iterator[str]:
+    """Yields each line decoded and without its line ending. Uses `readline`
+    rather than iteration, since an mmap iterates bytes, not lines.
+
+    >>> import io
+    >>> list(lines(io.BytesIO(b"L68\\r\\nR30\\n\\nL5")))
+    ['L68', 'R30', '', 'L5']
+    """
+    for raw in iter(source.readline, b""):
+        yield raw.rstrip(b"\r\n").decode()
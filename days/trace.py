@@ -0,0 +1,181 @@
+"""Timeline spans in the Chrome trace-event format.
+
+    with trace.span("parse", "runner"):
+        parsed = parse(...)
+
+Tracing is off unless `enable` was called in this process or an ancestor
+(through the `DAYS_TRACE` environment variable, so pool workers started by
+any method join in). While it is off, `span` returns a shared do-nothing
+context manager, so spans can stay in hot code.
+
+While it is on, each process buffers complete events in memory and
+`flush` appends them to `<spool>/<pid>.jsonl`. `collect` gathers every
+process's spool and `write` saves them as a trace file, which opens in
+Perfetto or chrome://tracing.
+"""
+
+from __future__ import annotations
+from contextlib import nullcontext
+from functools import wraps
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, ContextManager, TypeVar, cast
+
+F = TypeVar("F", bound=Callable[..., object])
+
+ENV = "DAYS_TRACE"
+
+_spool: Path | None = None
+_events: list[dict[str, object]] | None = None
+_NULL: ContextManager[None] = nullcontext()
+
+
+def enable(spool: Path) -> None:
+    """Turns tracing on here and in every process started from here."""
+
+    global _spool, _events
+    spool.mkdir(parents=True, exist_ok=True)
+    os.environ[ENV] = str(spool)
+    _spool, _events = spool, []
+
+
+def disable() -> None:
+    global _spool, _events
+    os.environ.pop(ENV, None)
+    _spool, _events = None, None
+
+
+def enabled() -> bool:
+    return _events is not None
+
+
+class Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name: str, category: str, args: dict[str, object]) -> None:
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> Span:
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        end = time.perf_counter_ns()
+        if _events is None:
+            return
+        _events.append(
+            {
+                "name": self.name,
+                "cat": self.category,
+                "ph": "X",
+                "ts": self.start / 1000,
+                "dur": (end - self.start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": {key: str(value) for key, value in self.args.items()},
+            }
+        )
+
+
+def span(name: str, category: str = "solve", **args: object) -> ContextManager:
+    """Records the time spent in the `with` block, if tracing is on.
+
+    >>> with span("off"):
+    ...     pass
+    >>> enabled()
+    False
+    """
+    if _events is None:
+        return _NULL
+    return Span(name, category, args)
+
+
+def traced(category: str = "solve") -> Callable[[F], F]:
+    """Decorator recording a span named after the function for each call.
+
+    >>> @traced("example")
+    ... def double(x):
+    ...     return 2 * x
+    >>> double(2)
+    4
+    """
+
+    def decorate(function: F) -> F:
+        name = function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            if _events is None:
+                return function(*args, **kwargs)
+            with Span(name, category, {}):
+                return function(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorate
+
+
+def name_process(name: str) -> None:
+    """Labels this process in the viewer."""
+
+    if _events is not None:
+        _events.append(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": name},
+            }
+        )
+
+
+def flush() -> None:
+    """Appends this process's buffered events to its spool file."""
+
+    if _spool is None or not _events:
+        return
+    lines = "".join(json.dumps(event) + "\n" for event in _events)
+    with open(_spool / f"{os.getpid()}.jsonl", "a") as file:
+        file.write(lines)
+    _events.clear()
+
+
+def collect(spool: Path) -> list[dict[str, object]]:
+    """Every event flushed to `spool`, by any process.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     enable(Path(tmp))
+    ...     name_process("example")
+    ...     with span("parse", "runner", day=1):
+    ...         pass
+    ...     flush()
+    ...     disable()
+    ...     [(e["ph"], e["name"], e["args"]) for e in collect(Path(tmp))]
+    [('M', 'process_name', {'name': 'example'}), ('X', 'parse', {'day': '1'})]
+    """
+    events = []
+    for path in sorted(spool.glob("*.jsonl")):
+        with open(path) as file:
+            events.extend(json.loads(line) for line in file if line.endswith("\n"))
+    return events
+
+
+def write(path: Path, events: list[dict[str, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+
+def _forget_parent_events() -> None:
+    if _events is not None:
+        _events.clear()
+
+
+if ENV in os.environ:
+    _spool, _events = Path(os.environ[ENV]), []
+os.register_at_fork(after_in_child=_forget_parent_events)
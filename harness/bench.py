@@ -0,0 +1,307 @@
+"""Benchmarks each day's parse step and stars across a ladder of inputs.
+
+Run with `./bench.sh` (or `python -m harness.bench`):
+
+    ./bench.sh --days 8,9,12 --sizes 100,1000,10000 --output bench/new.json
+    ./bench.sh --compare bench/baseline.json --threshold 0.1
+
+Besides the examples and input.txt, each day is run on inputs from its
+`generate` at every `--sizes` step. A day module can time more phases by
+naming them in a `BENCH_PHASES` dict of phase to function, each taking the
+input text like the stars do. Results are written as JSON together with
+the machine and git revision they were measured on. With `--compare`, every
+timing whose median got slower than the baseline's by more than the threshold
+is reported as a regression and the exit status is non-zero.
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+import importlib
+import json
+import math
+import os
+from pathlib import Path
+import pkgutil
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from types import ModuleType
+from typing import Callable
+
+import days
+
+DEFAULT_OUTPUT = Path("bench/latest.json")
+PHASES = {
+    "parse": "parse_input",
+    "parse_array": "parse_input_array",
+    "star1": "star1",
+    "star2": "star2",
+}
+
+
+@dataclass
+class Timing:
+    day: int
+    input: str
+    bytes: int
+    phase: str
+    samples: list[float]
+    median: float | None
+    p95: float | None
+    error: str | None = None
+
+    @property
+    def key(self) -> tuple[int, str, str]:
+        return self.day, self.input, self.phase
+
+
+def day_numbers() -> list[int]:
+    numbers = []
+    for module in pkgutil.iter_modules(days.__path__):
+        match = re.fullmatch(r"day(\d+)", module.name)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+
+def parse_days(spec: str) -> list[int]:
+    """
+    >>> parse_days("1-3,7")
+    [1, 2, 3, 7]
+    >>> parse_days("all") == day_numbers()
+    True
+    """
+    if spec == "all":
+        return day_numbers()
+
+    result = []
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        result.extend(range(int(start), int(end or start) + 1))
+    return result
+
+
+def day_inputs(
+    module: ModuleType, day: int, sizes: list[int], seed: int
+) -> list[tuple[str, str]]:
+    """The ladder of (label, text) inputs for a day, smallest first: the
+    examples, the day's generator at each of `sizes`, and input.txt."""
+
+    directory = Path(f"days/day{day}")
+    paths = sorted((directory / "examples").glob("*.txt"))
+    if (directory / "input.txt").exists():
+        paths.append(directory / "input.txt")
+
+    inputs = [(str(path.relative_to(directory)), path.read_text()) for path in paths]
+    if hasattr(module, "generate"):
+        inputs.extend(
+            (f"generated/{size}", "".join(module.generate(size, seed)))
+            for size in sizes
+        )
+    return sorted(inputs, key=lambda item: len(item[1]))
+
+
+def clear_caches(module: ModuleType) -> None:
+    """Empties every `functools.cache` in a day module, so repeats stay cold."""
+
+    for value in vars(module).values():
+        if hasattr(value, "cache_clear"):
+            value.cache_clear()
+        elif isinstance(value, type) and value.__module__ == module.__name__:
+            for attr in vars(value).values():
+                if hasattr(attr, "cache_clear"):
+                    attr.cache_clear()
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile.
+
+    >>> percentile([5.0, 1.0, 3.0, 2.0, 4.0], 0.95)
+    5.0
+    >>> percentile([5.0, 1.0, 3.0, 2.0, 4.0], 0.5)
+    3.0
+    """
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+# What a day's solver raises on an input it cannot handle, recorded in the
+# timing instead of stopping the run. Anything else is a bug in the harness.
+SOLVER_ERRORS = (ArithmeticError, AssertionError, LookupError, RuntimeError, ValueError)
+
+
+def measure(
+    module: ModuleType,
+    fn: Callable[[str], object],
+    text: str,
+    warmup: int,
+    repeats: int,
+) -> tuple[list[float], str | None]:
+    samples = []
+    try:
+        for i in range(warmup + repeats):
+            clear_caches(module)
+            start = time.perf_counter()
+            fn(text)
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                samples.append(elapsed)
+    except SOLVER_ERRORS as e:
+        return samples, f"{type(e).__name__}: {e}"
+
+    return samples, None
+
+
+def bench_day(
+    day: int, sizes: list[int], seed: int, warmup: int, repeats: int
+) -> list[Timing]:
+    try:
+        module = importlib.import_module(f"days.day{day}")
+    except ImportError as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"day{day:<2} import error: {error}", file=sys.stderr)
+        return [Timing(day, "-", 0, "import", [], None, None, error)]
+
+    phases = {**PHASES, **getattr(module, "BENCH_PHASES", {})}
+    timings = []
+    for label, text in day_inputs(module, day, sizes, seed):
+        for phase, name in phases.items():
+            fn = getattr(module, name, None)
+            if fn is None:
+                continue
+
+            samples, error = measure(module, fn, text, warmup, repeats)
+            timing = Timing(
+                day=day,
+                input=label,
+                bytes=len(text.encode()),
+                phase=phase,
+                samples=samples,
+                median=statistics.median(samples) if samples and not error else None,
+                p95=percentile(samples, 0.95) if samples and not error else None,
+                error=error,
+            )
+            print(format_timing(timing), file=sys.stderr)
+            timings.append(timing)
+
+    return timings
+
+
+def format_timing(timing: Timing) -> str:
+    label = (
+        f"day{timing.day:<2} {timing.phase:<11} {timing.input:<20} {timing.bytes:>10}B"
+    )
+    if timing.error:
+        return f"{label}  error: {timing.error}"
+    assert timing.median is not None and timing.p95 is not None
+    median_ms, p95_ms = timing.median * 1e3, timing.p95 * 1e3
+    return f"{label}  median {median_ms:10.3f} ms  p95 {p95_ms:10.3f} ms"
+
+
+def git_revision() -> dict[str, object]:
+    def git(*args: str) -> str:
+        result = subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=False
+        )
+        # Outside a checkout there is no revision to record.
+        return result.stdout.strip() if result.returncode == 0 else ""
+
+    return {
+        "revision": git("rev-parse", "HEAD") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def machine_info() -> dict[str, object]:
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+    }
+
+
+def write_results(path: Path, timings: list[Timing]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "machine": machine_info(),
+        "git": git_revision(),
+        "results": [asdict(timing) for timing in timings],
+    }
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load_results(path: Path) -> list[Timing]:
+    return [Timing(**result) for result in json.loads(path.read_text())["results"]]
+
+
+def compare(
+    current: list[Timing], baseline: list[Timing], threshold: float
+) -> list[tuple[Timing, float]]:
+    """Timings whose median grew by more than `threshold` over the baseline's.
+
+    >>> old = Timing(1, "input.txt", 10, "star1", [1.0], 1.0, 1.0)
+    >>> new = Timing(1, "input.txt", 10, "star1", [1.3], 1.3, 1.3)
+    >>> [(t.phase, round(r, 2)) for t, r in compare([new], [old], 0.1)]
+    [('star1', 1.3)]
+    >>> compare([new], [old], 0.5)
+    []
+    """
+
+    by_key = {timing.key: timing for timing in baseline}
+    regressions = []
+    for timing in current:
+        base = by_key.get(timing.key)
+        if base is None or base.median is None or timing.median is None:
+            continue
+
+        ratio = timing.median / base.median if base.median else math.inf
+        if ratio > 1 + threshold:
+            regressions.append((timing, ratio))
+
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--days", default="all", help='e.g. "1-5,8" or "all"')
+    parser.add_argument(
+        "--sizes", default="10,100,1000", help="generated input sizes, e.g. 10,1000"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "--compare", type=Path, help="baseline results to compare against"
+    )
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    timings = []
+    for day in parse_days(args.days):
+        sizes = [int(size) for size in args.sizes.split(",") if size]
+        timings.extend(bench_day(day, sizes, args.seed, args.warmup, args.repeats))
+
+    write_results(args.output, timings)
+    print(f"wrote {args.output}", file=sys.stderr)
+
+    if args.compare:
+        regressions = compare(timings, load_results(args.compare), args.threshold)
+        for timing, ratio in regressions:
+            print(f"REGRESSION {format_timing(timing)}  x{ratio:.2f}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
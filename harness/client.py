@@ -0,0 +1,76 @@
+"""Thin client for `harness.daemon`.
+
+    python -m harness.client 12 --star 1 --input days/day12/input.txt
+    python -m harness.client --stats
+    python -m harness.client --stop
+
+Only the standard library's socket and json are imported here, so a warm
+request costs little more than interpreter startup.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+import socket
+import sys
+
+SOCKET_PATH = Path(".cache/daemon.sock")
+
+
+def request(messages: list[dict[str, object]], path: Path = SOCKET_PATH) -> list[dict]:
+    """Sends each message over one connection and returns the responses."""
+
+    with socket.socket(socket.AF_UNIX) as conn:
+        conn.connect(str(path))
+        with conn.makefile("rwb") as stream:
+            responses = []
+            for message in messages:
+                stream.write((json.dumps(message) + "\n").encode())
+                stream.flush()
+                responses.append(json.loads(stream.readline()))
+            return responses
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="client", description=__doc__.splitlines()[0])
+    parser.add_argument("day", type=int, nargs="?")
+    parser.add_argument("--star", type=int, choices=(1, 2), help="default: both")
+    parser.add_argument("--input", type=Path, help="default: days/dayN/input.txt")
+    parser.add_argument("--socket", type=Path, default=SOCKET_PATH)
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("--stop", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.stop or args.stats:
+        messages: list[dict[str, object]] = [{"op": "stop" if args.stop else "stats"}]
+    elif args.day is None:
+        parser.error("a day is required unless --stats or --stop is given")
+    else:
+        stars = [args.star] if args.star else [1, 2]
+        path = str(args.input.resolve()) if args.input else None
+        messages = [{"day": args.day, "star": star, "input": path} for star in stars]
+
+    try:
+        responses = request(messages, args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(
+            f"no daemon on {args.socket}; start one with `python -m harness.daemon`",
+            file=sys.stderr,
+        )
+        return 2
+
+    status = 0
+    for message, response in zip(messages, responses):
+        if "star" not in message:
+            print(json.dumps(response, indent=2))
+        elif response["error"]:
+            print(f"day{args.day} star{message['star']}  error: {response['error']}")
+            status = 1
+        else:
+            print(response["answer"])
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""A long-lived solver that keeps days imported and their caches warm.
+
+    python -m harness.daemon &
+    python -m harness.client 12 --star 1
+    python -m harness.client --stop
+
+The daemon listens on a Unix socket (`.cache/daemon.sock` by default) for
+one JSON request per line, `{"day": 12, "star": 1, "input": "path"}`, and
+answers each with one JSON line. The day modules stay imported between
+requests, so imports and `functools.cache`s stay warm. Parsed inputs and
+answers are kept in memory, keyed by the input's path, size and mtime.
+
+A watcher thread polls the source files of every loaded `days` module.
+When a day's own files change, only that day is reloaded and its parsed
+inputs and answers are dropped. A change to a shared module such as
+`days.parsing` reloads it and every loaded day.
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+import importlib
+import json
+import os
+from pathlib import Path
+import socket
+import socketserver
+import sys
+import threading
+import time
+from types import ModuleType
+
+from harness.runner import parse, splits_parse
+
+SOCKET_PATH = Path(".cache/daemon.sock")
+POLL_INTERVAL = 0.5
+
+InputKey = tuple[int, str, int, int]
+
+
+def input_key(day: int, path: Path) -> InputKey:
+    stat = path.stat()
+    return day, str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+
+def day_of(name: str) -> int | None:
+    """
+    >>> day_of("days.day12.milp"), day_of("days.day3"), day_of("days.parsing")
+    (12, 3, None)
+    """
+    parts = name.split(".")
+    if len(parts) >= 2 and parts[1].startswith("day") and parts[1][3:].isdigit():
+        return int(parts[1][3:])
+    return None
+
+
+class RequestError(Exception):
+    pass
+
+
+@dataclass
+class Stats:
+    requests: int = 0
+    parses: int = 0
+    solves: int = 0
+    reloads: int = 0
+
+
+class Daemon:
+    """The daemon's state, independent of the socket it is served on.
+
+    >>> daemon = Daemon()
+    >>> first = daemon.handle({"day": 1, "star": 2, "input": "days/day1/examples/1.txt"})
+    >>> first["answer"], first["cached"]
+    ('6', False)
+    >>> daemon.handle({"day": 1, "star": 2, "input": "days/day1/examples/1.txt"})["cached"]
+    True
+    >>> daemon.handle({"day": 1, "star": 3, "input": "days/day1/examples/1.txt"})["error"]
+    'day1 has no star3'
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.parsed: dict[InputKey, object] = {}
+        self.answers: dict[tuple[InputKey, int], str] = {}
+        self.mtimes: dict[str, int] = {}
+        self.stats = Stats()
+
+    def module(self, day: int) -> ModuleType:
+        name = f"days.day{day}"
+        module = importlib.import_module(name)
+        self.track()
+        return module
+
+    def track(self) -> None:
+        """Starts watching every loaded `days` module not yet watched."""
+
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if name.startswith("days.") and path and name not in self.mtimes:
+                self.mtimes[name] = os.stat(path).st_mtime_ns
+
+    def changed(self) -> list[str]:
+        changed = []
+        for name, mtime in self.mtimes.items():
+            module = sys.modules.get(name)
+            path = getattr(module, "__file__", None)
+            if path and os.path.exists(path) and os.stat(path).st_mtime_ns != mtime:
+                changed.append(name)
+        return changed
+
+    def reload_changed(self) -> list[str]:
+        """Reloads changed modules, and the days that depend on them. Deeper
+        modules are reloaded first, so a package sees its fresh submodules."""
+
+        changed = self.changed()
+        if not changed:
+            return []
+
+        shared = any(day_of(name) is None for name in changed)
+        days = {day_of(name) for name in changed} - {None}
+        stale = [
+            name
+            for name in self.mtimes
+            if name in changed
+            or (day_of(name) is not None and (shared or day_of(name) in days))
+        ]
+        for name in sorted(stale, key=lambda n: (day_of(n) is not None, -n.count("."))):
+            importlib.reload(sys.modules[name])
+            path = sys.modules[name].__file__
+            assert path is not None
+            self.mtimes[name] = os.stat(path).st_mtime_ns
+
+        reloaded_days = {day_of(name) for name in stale}
+        self.parsed = {
+            k: v for k, v in self.parsed.items() if k[0] not in reloaded_days
+        }
+        self.answers = {
+            k: v for k, v in self.answers.items() if k[0][0] not in reloaded_days
+        }
+        self.stats.reloads += len(stale)
+        return stale
+
+    def solve(self, day: int, star: int, path: Path) -> tuple[str, bool]:
+        key = input_key(day, path)
+        if (key, star) in self.answers:
+            return self.answers[key, star], True
+
+        module = self.module(day)
+        if splits_parse(module, star):
+            if key not in self.parsed:
+                self.parsed[key] = parse(module, path)
+                self.stats.parses += 1
+            answer = getattr(module, f"solve_star{star}")(self.parsed[key])
+        elif hasattr(module, f"star{star}"):
+            answer = getattr(module, f"star{star}")(path.read_text())
+        else:
+            raise RequestError(f"day{day} has no star{star}")
+
+        self.stats.solves += 1
+        self.answers[key, star] = str(answer)
+        return str(answer), False
+
+    def handle(self, request: dict[str, object]) -> dict[str, object]:
+        start = time.perf_counter()
+        with self.lock:
+            self.stats.requests += 1
+            if request.get("op") == "stats":
+                return {"stats": vars(self.stats), "modules": sorted(self.mtimes)}
+
+            try:
+                day = int(str(request["day"]))
+                star = int(str(request["star"]))
+                path = Path(str(request.get("input") or f"days/day{day}/input.txt"))
+                self.reload_changed()
+                answer, cached = self.solve(day, star, path)
+                error = None
+            except RequestError as e:
+                answer, cached, error = None, False, str(e)
+            except Exception as e:
+                answer, cached, error = None, False, f"{type(e).__name__}: {e}"
+
+        return {
+            "answer": answer,
+            "cached": cached,
+            "seconds": time.perf_counter() - start,
+            "error": error,
+        }
+
+    def watch(self, stop: threading.Event, interval: float = POLL_INTERVAL) -> None:
+        while not stop.wait(interval):
+            with self.lock:
+                for name in self.reload_changed():
+                    print(f"reloaded {name}", file=sys.stderr)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    server: Server
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            request = json.loads(line)
+            if request.get("op") == "stop":
+                self.respond({"stopping": True})
+                threading.Thread(target=self.server.shutdown).start()
+                return
+            self.respond(self.server.daemon.handle(request))
+
+    def respond(self, response: dict[str, object]) -> None:
+        self.wfile.write((json.dumps(response) + "\n").encode())
+        self.wfile.flush()
+
+
+class Server(socketserver.UnixStreamServer):
+    def __init__(self, path: Path, daemon: Daemon) -> None:
+        self.daemon = daemon
+        super().__init__(str(path), Handler)
+
+
+def claim(path: Path) -> None:
+    """Removes a stale socket left by a daemon that died, refusing to replace
+    a live one."""
+
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return
+
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(str(path))
+        except OSError:
+            path.unlink()
+            return
+    raise SystemExit(f"a daemon is already listening on {path}")
+
+
+def serve(path: Path = SOCKET_PATH, preload: list[int] | None = None) -> None:
+    claim(path)
+    daemon = Daemon()
+    for day in preload or []:
+        daemon.module(day)
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=daemon.watch, args=(stop,), daemon=True)
+    watcher.start()
+    try:
+        with Server(path, daemon) as server:
+            print(f"listening on {path}", file=sys.stderr)
+            server.serve_forever()
+    finally:
+        stop.set()
+        path.unlink(missing_ok=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from harness.bench import parse_days
+
+    parser = argparse.ArgumentParser(prog="daemon", description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", type=Path, default=SOCKET_PATH)
+    parser.add_argument(
+        "--preload", default="all", help='days to import up front, e.g. "1-12" or ""'
+    )
+    args = parser.parse_args(argv)
+
+    serve(args.socket, parse_days(args.preload) if args.preload else [])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
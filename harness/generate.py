@@ -0,0 +1,55 @@
+"""Writes generated puzzle inputs, streaming them straight to disk.
+
+    python -m harness.generate 9 --size 100000 --seed 1 -o inputs/day9-100k.txt
+
+Each `days.dayN` module provides `generate(size, seed)`, which yields the input
+in pieces, so inputs far larger than memory can be written.
+"""
+
+from __future__ import annotations
+import argparse
+import importlib
+from pathlib import Path
+import sys
+from typing import Iterator
+
+BUFFER_SIZE = 1 << 20
+
+
+def generator(day: int, size: int, seed: int = 0) -> Iterator[str]:
+    module = importlib.import_module(f"days.day{day}")
+    return module.generate(size, seed)
+
+
+def write_input(day: int, path: Path, size: int, seed: int = 0) -> int:
+    """Writes a generated input for `day` to `path` and returns its size in bytes."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(path, "wb", buffering=BUFFER_SIZE) as f:
+        for piece in generator(day, size, seed):
+            written += f.write(piece.encode())
+    return written
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="generate", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("day", type=int)
+    parser.add_argument("--size", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="defaults to stdout")
+    args = parser.parse_args(argv)
+
+    if args.output is None:
+        sys.stdout.writelines(generator(args.day, args.size, args.seed))
+        return 0
+
+    written = write_input(args.day, args.output, args.size, args.seed)
+    print(f"wrote {written} bytes to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
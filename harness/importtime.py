@@ -0,0 +1,179 @@
+"""Cold import-time report and budget for the days modules.
+
+    ./run.sh all --import-time
+    python -m harness.importtime --days 10,12 --top 5 --budget 80
+
+Each `days.dayN` is imported in a fresh interpreter under `-X importtime`.
+The smallest of a few runs is kept, so the numbers are cold-start costs
+with as little noise as possible. Heavy dependencies should be imported
+lazily, when the solver that needs them runs. The doctests fail when a
+day imports one of `HEAVY_MODULES` at module level, or when the best of
+`BUDGET_RUNS` cold imports of a day takes longer than `IMPORT_BUDGET_MS`
+plus `TOLERANCE`. Running this module checks the budget without the
+tolerance and exits non-zero when a day goes over it.
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+import re
+import subprocess
+import sys
+
+from harness.bench import day_numbers, parse_days
+
+IMPORT_BUDGET_MS = 100.0
+HEAVY_MODULES = ("numpy", "scipy", "matplotlib", "networkx", "icecream")
+RUNS = 3
+# Runs kept the best of when checking the budget, and the slack the
+# doctest allows over it: a cold import varies by some 20% between runs on
+# a busy machine even at its best.
+BUDGET_RUNS = 5
+TOLERANCE = 0.2
+ROOT = Path(__file__).resolve().parent.parent
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """
+    >>> parse_importtime(
+    ...     "import time: self [us] | cumulative | imported package\\n"
+    ...     "import time:       120 |        340 |   pathlib\\n"
+    ...     "import time:      1262 |      24780 | days.day1\\n"
+    ... )
+    [ImportTime(module='pathlib', self_us=120, cumulative_us=340, depth=1), ImportTime(module='days.day1', self_us=1262, cumulative_us=24780, depth=0)]
+    """
+    entries = []
+    for match in LINE.finditer(output):
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append(
+            ImportTime(module, int(self_us), int(cumulative_us), len(indent) // 2)
+        )
+    return entries
+
+
+@cache
+def measure(module: str, runs: int = RUNS) -> tuple[ImportTime, ...]:
+    """The `-X importtime` entries of the fastest of `runs` cold imports."""
+
+    best: list[ImportTime] = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+            check=False,
+        )
+        if result.returncode != 0:
+            raise ImportError(result.stderr.strip().splitlines()[-1])
+        entries = parse_importtime(result.stderr)
+        if not best or total_ms(entries, module) < total_ms(best, module):
+            best = entries
+    return tuple(best)
+
+
+def total_ms(entries: list[ImportTime] | tuple[ImportTime, ...], module: str) -> float:
+    return next(e.cumulative_us for e in entries if e.module == module) / 1000
+
+
+def heavy(entries: tuple[ImportTime, ...]) -> list[str]:
+    return sorted(
+        {e.module for e in entries if e.module.split(".")[0] in HEAVY_MODULES}
+        & set(HEAVY_MODULES)
+    )
+
+
+def import_times(days: list[int] | None = None, runs: int = RUNS) -> dict[str, float]:
+    """Each day's cold import time in milliseconds, the best of `runs`, by
+    module."""
+
+    times = {}
+    for day in days or day_numbers():
+        module = f"days.day{day}"
+        times[module] = total_ms(measure(module, runs), module)
+    return times
+
+
+def over_budget(
+    times: dict[str, float], budget_ms: float = IMPORT_BUDGET_MS
+) -> list[tuple[str, float]]:
+    """The modules of `times` that took longer than `budget_ms` to import.
+
+    >>> over_budget({"days.day1": 12.5, "days.day12": 140.0, "days.day7": 99.9})
+    [('days.day12', 140.0)]
+    """
+    return [(module, ms) for module, ms in times.items() if ms > budget_ms]
+
+
+def check_budget(
+    days: list[int] | None = None, tolerance: float = TOLERANCE
+) -> list[tuple[str, float]]:
+    """Days whose best of `BUDGET_RUNS` cold imports goes over the budget by
+    more than `tolerance`.
+
+    >>> check_budget()
+    []
+    """
+    limit = IMPORT_BUDGET_MS * (1 + tolerance)
+    return over_budget(import_times(days, BUDGET_RUNS), limit)
+
+
+def eager_heavy_imports(days: list[int] | None = None) -> dict[str, list[str]]:
+    """Days that import a heavy dependency at module level.
+
+    >>> eager_heavy_imports()
+    {}
+    """
+    found = {}
+    for day in days or day_numbers():
+        modules = heavy(measure(f"days.day{day}"))
+        if modules:
+            found[f"days.day{day}"] = modules
+    return found
+
+
+def report(days: list[int], top: int = 5) -> list[str]:
+    lines = []
+    for day in days:
+        module = f"days.day{day}"
+        entries = measure(module)
+        modules = heavy(entries)
+        eager = f"  eager: {', '.join(modules)}" if modules else ""
+        lines.append(f"{module:<11} {total_ms(entries, module):8.1f} ms{eager}")
+        for entry in sorted(entries, key=lambda e: e.self_us, reverse=True)[:top]:
+            lines.append(f"    {entry.self_us / 1000:8.1f} ms  {entry.module}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="importtime", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--days", default="all", help='e.g. "1-5,8" or "all"')
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    days = parse_days(args.days)
+    print("\n".join(report(days, args.top)))
+
+    slow = over_budget(import_times(days, BUDGET_RUNS), args.budget)
+    for module, elapsed in slow:
+        print(f"OVER BUDGET {module} {elapsed:.1f} ms > {args.budget:.1f} ms")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
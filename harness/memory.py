@@ -0,0 +1,138 @@
+"""Memory instrumentation for the runner's `--memory` mode.
+
+Each phase of a day (its parse, then each star's solve) runs inside a
+`MemoryProbe`. The probe records:
+- the process's peak RSS after the phase, and how much the phase grew it;
+- `tracemalloc`'s current and peak traced sizes for the phase;
+- the top allocation sites by file:line that are still live when the phase
+  ends, which is where caches and parsed structures show up;
+- live instance counts of the project's dataclasses.
+
+Reports are written as JSON next to the benchmark results, together with
+the machine and git revision, so that memory regressions can be tracked.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+import gc
+import json
+from pathlib import Path
+import resource
+import sys
+import tracemalloc
+
+from harness.bench import git_revision, machine_info
+
+DEFAULT_OUTPUT = Path("bench/memory.json")
+TRACKED_TYPES = frozenset(
+    {"Vec2", "Vec3", "Line", "Rectangle", "Shape", "Tile", "Spec", "Problem", "Range"}
+)
+TOP_SITES = 10
+
+
+@dataclass
+class PhaseMemory:
+    day: int
+    phase: str
+    peak_rss_kib: int = 0
+    rss_growth_kib: int = 0
+    traced_current: int = 0
+    traced_peak: int = 0
+    top_sites: list[tuple[str, int, int]] = field(default_factory=list)
+    objects: dict[str, int] = field(default_factory=dict)
+
+
+def max_rss_kib() -> int:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def count_objects() -> dict[str, int]:
+    """Live instances of the tracked dataclasses, by class name."""
+
+    counts: Counter[str] = Counter()
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in TRACKED_TYPES:
+            counts[name] += 1
+    return dict(sorted(counts.items()))
+
+
+def top_sites(snapshot: tracemalloc.Snapshot, limit: int) -> list[tuple[str, int, int]]:
+    """(file:line, bytes, blocks) of the largest live allocation sites."""
+
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+            tracemalloc.Filter(False, str(Path(__file__).parent / "*")),
+        )
+    )
+    sites = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        sites.append((f"{frame.filename}:{frame.lineno}", stat.size, stat.count))
+    return sites
+
+
+class MemoryProbe:
+    """Measures the memory of the code run inside it.
+
+    >>> with MemoryProbe(0, "example") as probe:
+    ...     data = [bytearray(1000) for _ in range(100)]
+    >>> probe.report.traced_peak >= 100_000, probe.report.top_sites[0][2] >= 100
+    (True, True)
+    """
+
+    def __init__(self, day: int, phase: str, sites: int = TOP_SITES) -> None:
+        self.report = PhaseMemory(day, phase)
+        self.sites = sites
+
+    def __enter__(self) -> MemoryProbe:
+        gc.collect()
+        self.rss_before = max_rss_kib()
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        report = self.report
+        report.traced_current, report.traced_peak = current, peak
+        report.top_sites = top_sites(snapshot, self.sites)
+        report.objects = count_objects()
+        report.peak_rss_kib = max_rss_kib()
+        report.rss_growth_kib = report.peak_rss_kib - self.rss_before
+
+
+def format_phase(report: PhaseMemory) -> str:
+    mib = 1024 * 1024
+    lines = [
+        f"day{report.day:<2} {report.phase:<5}  peak RSS {report.peak_rss_kib / 1024:8.1f} MiB"
+        f" (+{report.rss_growth_kib / 1024:.1f})"
+        f"  traced peak {report.traced_peak / mib:8.1f} MiB"
+        f"  live {report.traced_current / mib:8.1f} MiB"
+    ]
+    if report.objects:
+        objects = ", ".join(f"{name} {count}" for name, count in report.objects.items())
+        lines.append(f"    objects: {objects}")
+    for site, size, count in report.top_sites[:3]:
+        lines.append(f"    {size / 1024:10.1f} KiB {count:>9} blocks  {site}")
+    return "\n".join(lines)
+
+
+def write_reports(path: Path, reports: list[PhaseMemory]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "machine": machine_info(),
+        "git": git_revision(),
+        "results": [asdict(report) for report in reports],
+    }
+    path.write_text(json.dumps(report, indent=2) + "\n")
@@ -0,0 +1,272 @@
+"""Microbenchmarks of the grid hot loops, with `Vec2` objects against the
+packed ints of `days.coords`.
+
+    python -m harness.microbench --days 4,9,12 --repeat 5
+
+Each case pairs the loop the day ran before `days.coords`, written out
+here as it was and making a `Vec2` (and a `Line`, for day9) per position,
+with the packed code the day runs now, on the same generated input. Each
+run's setup builds fresh objects, so neither side finds its caches warm.
+For each kernel it reports:
+- the best time of `--repeat` runs, the setup excluded;
+- the traced size of the state the kernel works on (a set of `Vec2`
+  against a bytearray, say);
+- the traced peak of the kernel itself over that state, which is what
+  it allocates at once.
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+from itertools import combinations, islice
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from days import day4, day9, day12
+from days.coords import pack_pair
+from demapples.vec import Vec2
+
+REPEAT = 5
+
+
+@dataclass(frozen=True)
+class Kernel:
+    # Builds the state, outside the timing.
+    setup: Callable[[], object]
+    run: Callable[[object], object]
+
+
+@dataclass(frozen=True)
+class Case:
+    day: int
+    name: str
+    vec2: Kernel
+    packed: Kernel
+
+
+@dataclass(frozen=True)
+class Measurement:
+    seconds: float
+    state_bytes: int
+    peak_bytes: int
+
+
+def measure(kernel: Kernel, repeat: int = REPEAT) -> Measurement:
+    """
+    >>> m = measure(Kernel(lambda: list(range(1000)), lambda xs: [x * 2 for x in xs]), 2)
+    >>> m.state_bytes > 8000, m.peak_bytes > 8000
+    (True, True)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        state = kernel.setup()
+        started = time.perf_counter()
+        kernel.run(state)
+        best = min(best, time.perf_counter() - started)
+        del state
+
+    tracemalloc.start()
+    try:
+        state = kernel.setup()
+        state_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = kernel.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+        del result, state
+    finally:
+        tracemalloc.stop()
+    return Measurement(best, state_bytes, peak - state_bytes)
+
+
+def day4_case(size: int) -> Case:
+    """One wave of `Diagram.accessible` over a `size` x `size` grid."""
+
+    rolls = day4.parse_input("".join(day4.generate(size)))
+
+    def vec2(rolls: set[Vec2]) -> set[Vec2]:
+        return {roll for roll in rolls if len(roll.neighbours() & rolls) < 4}
+
+    return Case(
+        4,
+        "accessible rolls",
+        Kernel(
+            rolls.positions,
+            vec2,  # type: ignore[arg-type]
+        ),
+        Kernel(
+            lambda: day4.Diagram.from_rolls(rolls),
+            day4.Diagram.accessible_cells,  # type: ignore[arg-type]
+        ),
+    )
+
+
+def vec2_contains_point(shape: day9.Shape, corners: set[Vec2], point: Vec2) -> bool:
+    """day9's point test before the shape kept its points packed, with the
+    shape's vertices as the set of `Vec2` it kept then."""
+
+    if point in corners:
+        return True
+
+    x, y = point.x, point.y
+    for line in shape.horizontal_lines:
+        if y == line.p1.y and line.min_x <= x <= line.max_x:
+            return True
+    for line in shape.vertical_lines:
+        if x == line.p1.x and line.min_y <= y <= line.max_y:
+            return True
+
+    crossings = 0
+    for line in shape.vertical_lines:
+        if x < line.p1.x and line.min_y <= y < line.max_y:
+            crossings += 1
+    return (crossings % 2) == 1
+
+
+def day9_case(size: int, pairs: int = 20_000) -> Case:
+    """`Shape.contains_rectangle` for the first `pairs` pairs of vertices of
+    a `size`-vertex polygon."""
+
+    points = day9.parse_input("".join(day9.generate(size)))
+    chosen = list(islice(combinations(points, 2), pairs))
+    packed = [(pack_pair(p.x, p.y), pack_pair(q.x, q.y)) for p, q in chosen]
+
+    def vec2(shape: day9.Shape) -> int:
+        # Shape.contains_point was memoized per shape by Vec2.
+        contained: dict[Vec2, bool] = {}
+        corners = {line.p1 for line in shape.lines}
+
+        def contains_point(point: Vec2) -> bool:
+            if point not in contained:
+                contained[point] = vec2_contains_point(shape, corners, point)
+            return contained[point]
+
+        count = 0
+        for p1, p2 in chosen:
+            rect = day9.Rectangle(p1, p2)
+            count += all(
+                contains_point(corner) for corner in rect.other_corners()
+            ) and not any(
+                shape.intersects_line(side) for side in rect.sides_with_margin(-1)
+            )
+        return count
+
+    def ints(shape: day9.Shape) -> int:
+        return sum(shape.contains_box(p, q) for p, q in packed)
+
+    # A fresh shape each time, so its caches start empty.
+    return Case(
+        9,
+        "rectangles in shape",
+        Kernel(lambda: day9.Shape.from_points(points), vec2),  # type: ignore[arg-type]
+        Kernel(lambda: day9.Shape.from_points(points), ints),  # type: ignore[arg-type]
+    )
+
+
+def day12_case(size: int, boards: int = 100) -> Case:
+    """`board_to_str` of `boards` random `size` x `size` boards, and every
+    tile's placements in the longest 3-high strip that fits a uint64."""
+
+    strip = min(size, 64 // 3)
+    rng = random.Random(0)
+    dim = Vec2(size, size)
+    drawn = [rng.getrandbits(size * size) for _ in range(boards)]
+    stream = day12.generate(1, 0)
+    tile_strs = [next(stream).strip() for _ in range(6)]
+
+    def setup() -> tuple[list[int], list[day12.Tile]]:
+        # New tiles, whose weak caches are empty.
+        return list(drawn), [day12.Tile.from_str(text) for text in tile_strs]
+
+    def vec2(state: tuple[list[int], list[day12.Tile]]) -> int:
+        boards, tiles = state
+        rendered = 0
+        for board in boards:
+            rows = []
+            for y in range(dim.y):
+                row = []
+                for x in range(dim.x):
+                    pos = Vec2(x, y)
+                    mask = 1 << (pos.y * dim.x + pos.x)
+                    row.append("#" if (board & mask) != 0 else ".")
+                rows.append("".join(row))
+            rendered += len("\n".join(rows))
+
+        masks = 0
+        for tile in tiles:
+            orientations = set()
+            current = tile
+            for _ in range(4):
+                orientations.add(current)
+                orientations.add(current.fliplr())
+                current = current.rot90()
+            tile_masks = set()
+            for orientation in orientations:
+                base = sum(
+                    1 << (i // 3 * strip + i % 3)
+                    for i, cell in enumerate(orientation.data)
+                    if cell
+                )
+                for x in range(strip - 2):
+                    offset = Vec2(x, 0)
+                    tile_masks.add(base << (offset.y * strip + offset.x))
+            masks += len(tile_masks)
+        return rendered + masks
+
+    def ints(state: tuple[list[int], list[day12.Tile]]) -> int:
+        boards, tiles = state
+        rendered = sum(len(day12.board_to_str(board, dim)) for board in boards)
+        return rendered + sum(len(day12.strip_masks(tile, strip)) for tile in tiles)
+
+    return Case(
+        12,
+        "boards and strip masks",
+        Kernel(setup, vec2),  # type: ignore[arg-type]
+        Kernel(setup, ints),  # type: ignore[arg-type]
+    )
+
+
+CASES: dict[int, Callable[[int], Case]] = {4: day4_case, 9: day9_case, 12: day12_case}
+SIZES = {4: 140, 9: 500, 12: 50}
+
+
+def format_row(case: Case, vec2: Measurement, packed: Measurement) -> str:
+    """
+    >>> case = Case(4, "accessible rolls", Kernel(list, len), Kernel(list, len))
+    >>> format_row(case, Measurement(0.5, 4096, 2048), Measurement(0.1, 1024, 512))
+    'day4  accessible rolls         500.0 ms ->    100.0 ms  5.0x  state 4.0 -> 1.0 KiB  peak 2.0 -> 0.5 KiB'
+    """
+    return (
+        f"day{case.day:<2} {case.name:<24}"
+        f"{vec2.seconds * 1000:6.1f} ms -> {packed.seconds * 1000:8.1f} ms"
+        f"  {vec2.seconds / packed.seconds:.1f}x"
+        f"  state {vec2.state_bytes / 1024:.1f} -> {packed.state_bytes / 1024:.1f} KiB"
+        f"  peak {vec2.peak_bytes / 1024:.1f} -> {packed.peak_bytes / 1024:.1f} KiB"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="harness.microbench", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--days", default=",".join(map(str, CASES)))
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument(
+        "--size", type=int, help="input size, instead of each day's default"
+    )
+    args = parser.parse_args(argv)
+
+    for day in map(int, args.days.split(",")):
+        if day not in CASES:
+            parser.error(f"no microbenchmark for day {day}")
+        case = CASES[day](args.size or SIZES[day])
+        vec2 = measure(case.vec2, args.repeat)
+        packed = measure(case.packed, args.repeat)
+        print(format_row(case, vec2, packed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
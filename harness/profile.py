@@ -0,0 +1,211 @@
+"""Profiles a day's stars, attributing time to parsing and solving.
+
+    ./run.sh 12 --star 1 --profile
+
+Each star is run twice: once under `cProfile`, whose stats are dumped to
+`<dir>/dayN-starM.pstats`, and once under a low-overhead sampling profiler
+driven by `SIGPROF`, whose stacks are written to `<dir>/dayN-starM.collapsed`
+in the collapsed format flamegraph tools read (`frame;frame;frame count`).
+Every collapsed stack is rooted at a `parse` or `solve` frame, depending on
+whether a parse function (`parse*`, `from_str`, `from_file`) is on it, so
+the two phases show up as separate towers. A summary of both phases and the
+top functions, grouped by module, is printed.
+"""
+
+from __future__ import annotations
+from collections import Counter, defaultdict
+import cProfile
+from functools import cache
+import importlib
+from pathlib import Path
+import pstats
+import re
+import signal
+import sys
+import time
+from types import FrameType
+from typing import Callable
+
+from harness.bench import clear_caches
+
+DEFAULT_DIR = Path("profile")
+SAMPLE_INTERVAL = 0.001
+PARSE_FUNCTION = re.compile(r"parse\w*|from_str|from_file")
+
+FunctionKey = tuple[str, int, str]
+
+
+def is_parse(module: str, function: str) -> bool:
+    """
+    >>> is_parse("days.day12", "parse_input"), is_parse("days.day4", "Diagram.from_str")
+    (True, True)
+    >>> is_parse("days.day12", "feasible"), is_parse("json", "parse_constant")
+    (False, False)
+    """
+    return module.startswith("days.") and bool(
+        PARSE_FUNCTION.fullmatch(function.rpartition(".")[2])
+    )
+
+
+@cache
+def module_of(filename: str) -> str:
+    """
+    >>> module_of("/src/aoc/days/day12/__init__.py")
+    'days.day12'
+    >>> module_of("/opt/vendor/toml/decoder.py")
+    'decoder'
+    >>> import json.decoder; module_of(json.decoder.__file__)
+    'json.decoder'
+    >>> module_of("~")
+    'builtins'
+    """
+    path = Path(filename)
+    if filename.startswith("<") or filename == "~":
+        return "builtins"
+    for name, module in list(sys.modules.items()):
+        if getattr(module, "__file__", None) == filename:
+            return name
+    if "days" in path.parts:
+        parts = path.parts[path.parts.index("days") :]
+        return ".".join(p for p in parts[:2] if not p.endswith(".py")) or "days"
+    if path.name == "__init__.py":
+        return path.parent.name
+    return path.stem
+
+
+def _run_profiled(fn: Callable[[str], object], text: str) -> object:
+    # Stacks are trimmed at this frame, so samples start at the star itself.
+    return fn(text)
+
+
+class Sampler:
+    """Samples the main thread's stack every `interval` seconds of CPU time."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+
+    def __enter__(self) -> Sampler:
+        self.previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self.previous)
+
+    def _sample(self, signum: int, frame: FrameType | None) -> None:
+        stack = []
+        while frame is not None:
+            if frame.f_code is _run_profiled.__code__:
+                break
+            module = frame.f_globals.get("__name__", "?")
+            stack.append(f"{module}:{frame.f_code.co_qualname}")
+            frame = frame.f_back
+        else:
+            return
+
+        self.stacks[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> list[str]:
+        """Stacks in collapsed format, each rooted at its phase."""
+
+        lines = []
+        for stack, count in sorted(self.stacks.items()):
+            phase = (
+                "parse" if any(is_parse(*f.split(":", 1)) for f in stack) else "solve"
+            )
+            lines.append(f"{';'.join((phase, *stack))} {count}")
+        return lines
+
+
+def parse_time(stats: pstats.Stats) -> float:
+    """Cumulative time spent in parse functions not called by another one."""
+
+    entries = stats.stats  # type: ignore[attr-defined]
+
+    def parsing(key: FunctionKey) -> bool:
+        filename, _, function = key
+        return is_parse(module_of(filename), function)
+
+    return sum(
+        cumtime
+        for key, (_, _, _, cumtime, callers) in entries.items()
+        if parsing(key) and not any(parsing(caller) for caller in callers)
+    )
+
+
+def format_top(stats: pstats.Stats, top: int) -> list[str]:
+    """The `top` functions by own time, grouped by module, days first."""
+
+    entries = stats.stats  # type: ignore[attr-defined]
+    ranked = sorted(entries.items(), key=lambda item: item[1][2], reverse=True)[:top]
+
+    groups: dict[str, list[str]] = defaultdict(list)
+    for (filename, lineno, function), (_, calls, tottime, cumtime, _) in ranked:
+        groups[module_of(filename)].append(
+            f"    {tottime:9.4f} {cumtime:9.4f} {calls:>9}  {function}:{lineno}"
+        )
+
+    lines = []
+    for module in sorted(groups, key=lambda m: (not m.startswith("days."), m)):
+        lines.append(f"  {module}")
+        lines.append(f"    {'tottime':>9} {'cumtime':>9} {'calls':>9}  function")
+        lines.extend(groups[module])
+    return lines
+
+
+def profile_star(
+    day: int, star: int, text: str, out_dir: Path, top: int, interval: float
+) -> None:
+    module = importlib.import_module(f"days.day{day}")
+    fn = getattr(module, f"star{star}", None)
+    if fn is None:
+        print(f"day{day} has no star{star}", file=sys.stderr)
+        return
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    name = f"day{day}-star{star}"
+
+    clear_caches(module)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.runcall(_run_profiled, fn, text)
+    elapsed = time.perf_counter() - start
+    profiler.dump_stats(out_dir / f"{name}.pstats")
+    stats = pstats.Stats(profiler)
+
+    clear_caches(module)
+    with Sampler(interval) as sampler:
+        _run_profiled(fn, text)
+    collapsed = sampler.collapsed()
+    (out_dir / f"{name}.collapsed").write_text(
+        "".join(f"{line}\n" for line in collapsed)
+    )
+
+    parse = parse_time(stats)
+    parse_samples = sum(
+        int(line.rpartition(" ")[2]) for line in collapsed if line.startswith("parse;")
+    )
+    total_samples = sum(sampler.stacks.values())
+
+    print(f"day{day} star{star}: {elapsed:.3f} s under cProfile")
+    print(
+        f"  parse {parse:.3f} s, solve {max(elapsed - parse, 0):.3f} s;"
+        f" samples: parse {parse_samples}, solve {total_samples - parse_samples}"
+    )
+    print("\n".join(format_top(stats, top)))
+    print(f"  wrote {out_dir / name}.pstats and .collapsed")
+
+
+def profile_day(
+    day: int,
+    stars: list[int],
+    input_path: Path,
+    out_dir: Path = DEFAULT_DIR,
+    top: int = 20,
+    interval: float = SAMPLE_INTERVAL,
+) -> None:
+    text = input_path.read_text()
+    for star in stars:
+        profile_star(day, star, text, out_dir, top, interval)
@@ -0,0 +1,416 @@
+"""Runs a selection of (day, star) jobs in parallel, caching answers on disk.
+
+    ./run.sh all
+    ./run.sh 1-5,8 --star 2 --workers 4 --timeout 60
+
+Each job runs in its own process, so one that exceeds `--timeout` is
+terminated without taking the others down. Answers are kept in
+`.cache/results`, keyed by the day, the star, the SHA-256 of the input and
+a hash of the day package's source together with the shared `days` modules.
+Editing one day therefore re-runs only that day's stars.
+
+The stars of one day run in the same process and share a single parse: days
+that expose `parse_input` with `solve_star1`/`solve_star2` are parsed once per
+input (through the day's `parse_stream` over an mmap of the input when it has
+one), and the parsed form is kept in `.cache/parsed` (as `.npy` when it is a
+NumPy array, pickled otherwise) so later runs skip parsing as well.
+
+With `--memory`, the parse and each star are measured separately (see
+`harness.memory`), and the parsed cache is bypassed so the parse is real.
+
+With `--memo-stats`, each star's use of the days' memoized functions (see
+`days.memo`) is reported: hits, misses, evictions, entries and their size.
+
+With `--trace`, every process records spans (see `days.trace`) for the
+imports, input reads, parses, stars and cache loads and stores, along with
+any spans the solvers record, and they are merged into one Chrome trace.
+"""
+
+from __future__ import annotations
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+import hashlib
+import importlib
+import json
+import mmap
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+import os
+from pathlib import Path
+import pickle
+import shutil
+import sys
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
+
+from days import memo, trace
+
+if TYPE_CHECKING:
+    from harness.memory import PhaseMemory
+
+CACHE_DIR = Path(".cache/results")
+PARSED_DIR = Path(".cache/parsed")
+TRACE_SPOOL = Path(".cache/trace")
+DAYS_DIR = Path("days")
+
+
+@dataclass(frozen=True)
+class Job:
+    day: int
+    star: int
+    input_path: Path
+
+    @property
+    def name(self) -> str:
+        return f"day{self.day} star{self.star}"
+
+
+@dataclass
+class Result:
+    job: Job
+    answer: str | None
+    seconds: float
+    cached: bool = False
+    error: str | None = None
+    memory: list[PhaseMemory] = field(default_factory=list)
+    memos: list[memo.MemoStats] = field(default_factory=list)
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def source_hash(day: int) -> str:
+    """Hash of everything a day's answers can depend on: its own package and
+    the modules shared between days."""
+
+    digest = hashlib.sha256()
+    shared = sorted(DAYS_DIR.glob("*.py"))
+    own = sorted((DAYS_DIR / f"day{day}").rglob("*.py"))
+    for path in shared + own:
+        digest.update(str(path).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def job_key(job: Job) -> str:
+    parts = (job.day, job.star, file_digest(job.input_path), source_hash(job.day))
+    return hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+
+
+class ResultCache:
+    """One JSON file per job key."""
+
+    def __init__(self, directory: Path = CACHE_DIR) -> None:
+        self.directory = directory
+
+    def get(self, key: str) -> str | None:
+        try:
+            return json.loads((self.directory / f"{key}.json").read_text())["answer"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, job: Job, answer: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"day": job.day, "star": job.star, "answer": answer}))
+        os.replace(tmp, path)
+
+
+def parsed_key(day: int, input_path: Path) -> str:
+    parts = (day, file_digest(input_path), source_hash(day))
+    return hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+
+
+class ParsedCache:
+    """Parsed inputs, as `<key>.npy` for NumPy arrays and `<key>.pkl` otherwise."""
+
+    def __init__(self, directory: Path = PARSED_DIR) -> None:
+        self.directory = directory
+
+    def get(self, key: str) -> tuple[bool, object]:
+        npy, pkl = self.directory / f"{key}.npy", self.directory / f"{key}.pkl"
+        try:
+            if npy.exists():
+                import numpy as np
+
+                return True, np.load(npy, allow_pickle=False)
+            with open(pkl, "rb") as file:
+                return True, pickle.load(file)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return False, None
+
+    def put(self, key: str, parsed: object) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{key}.{os.getpid()}.tmp"
+        if type(parsed).__name__ == "ndarray":
+            import numpy as np
+
+            with open(tmp, "wb") as file:
+                np.save(file, parsed, allow_pickle=False)
+            os.replace(tmp, self.directory / f"{key}.npy")
+        else:
+            with open(tmp, "wb") as file:
+                pickle.dump(parsed, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.directory / f"{key}.pkl")
+
+
+def parse(module: ModuleType, path: Path) -> object:
+    """Parses with the day's `parse_stream` over an mmap of the input when it
+    has one, so the input is never held as a whole string."""
+
+    if not hasattr(module, "parse_stream"):
+        with trace.span("read input", "runner"):
+            text = path.read_text()
+        with trace.span("parse", "runner"):
+            return module.parse_input(text)
+
+    with open(path, "rb") as file, trace.span("parse", "runner", stream=True):
+        if os.fstat(file.fileno()).st_size == 0:
+            return module.parse_stream(file)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            return module.parse_stream(source)
+
+
+def parse_once(module: ModuleType, job: Job, cache: ParsedCache | None) -> object:
+    if cache is None:
+        return parse(module, job.input_path)
+
+    key = parsed_key(job.day, job.input_path)
+    with trace.span("parsed cache load", "runner"):
+        found, parsed = cache.get(key)
+    if not found:
+        parsed = parse(module, job.input_path)
+        with trace.span("parsed cache store", "runner"):
+            cache.put(key, parsed)
+    return parsed
+
+
+def splits_parse(module: ModuleType, star: int) -> bool:
+    return hasattr(module, "parse_input") and hasattr(module, f"solve_star{star}")
+
+
+def execute(
+    jobs: list[Job], conn: Connection, cache: ParsedCache | None, memory: bool
+) -> None:
+    """Child process body: solve one day's jobs in order, sending back
+    (answer, seconds, error, memory reports, memo stats) after each. The
+    input is parsed once, while solving the first job. With `memory`, the
+    parse and each solve are measured separately."""
+
+    def probe(day: int, phase: str) -> Any:
+        if not memory:
+            return nullcontext()
+        from harness.memory import MemoryProbe
+
+        return MemoryProbe(day, phase)
+
+    if jobs:
+        trace.name_process(f"day{jobs[0].day}")
+
+    parsed = None
+    for job in jobs:
+        start = time.perf_counter()
+        reports = []
+        memos_before = memo.snapshot()
+        try:
+            with trace.span("import", "runner"):
+                module = importlib.import_module(f"days.day{job.day}")
+            if splits_parse(module, job.star):
+                if parsed is None:
+                    with probe(job.day, "parse") as measured:
+                        parsed = parse_once(module, job, cache)
+                    reports.append(measured)
+                with probe(job.day, f"star{job.star}") as measured:
+                    with trace.span(f"star{job.star}", "runner"):
+                        answer = getattr(module, f"solve_star{job.star}")(parsed)
+                reports.append(measured)
+            else:
+                with probe(job.day, f"star{job.star}") as measured:
+                    with trace.span("read input", "runner"):
+                        text = job.input_path.read_text()
+                    with trace.span(f"star{job.star}", "runner"):
+                        answer = getattr(module, f"star{job.star}")(text)
+                reports.append(measured)
+            reports = [taken.report for taken in reports if taken is not None]
+            memos = memo.changes(memos_before, memo.snapshot())
+            trace.flush()
+            conn.send((str(answer), time.perf_counter() - start, None, reports, memos))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            trace.flush()
+            conn.send((None, time.perf_counter() - start, error, [], []))
+    conn.close()
+
+
+def select_jobs(
+    days: list[int], stars: list[int], input_path: Path | None
+) -> list[Job]:
+    """Every existing star of the selected days, reading `input_path` or each
+    day's input.txt."""
+
+    jobs = []
+    for day in days:
+        module = importlib.import_module(f"days.day{day}")
+        path = input_path or DAYS_DIR / f"day{day}" / "input.txt"
+        jobs.extend(
+            Job(day, star, path) for star in stars if hasattr(module, f"star{star}")
+        )
+    return jobs
+
+
+def run_jobs(
+    jobs: list[Job],
+    workers: int | None = None,
+    timeout: float | None = None,
+    cache: ResultCache | None = None,
+    parsed_cache: ParsedCache | None = None,
+    memory: bool = False,
+) -> list[Result]:
+    """Solves `jobs`, at most `workers` days at a time, returning results in
+    the order given. `timeout` applies to each star separately. With
+    `memory`, every job runs (answers are stored but not looked up) and its
+    results carry a memory report per phase."""
+
+    workers = workers or os.cpu_count() or 1
+    results: dict[Job, Result] = {}
+    keys: dict[Job, str] = {}
+
+    batches: dict[tuple[int, Path], list[Job]] = {}
+    for job in jobs:
+        if not job.input_path.exists():
+            results[job] = Result(job, None, 0.0, error=f"no input at {job.input_path}")
+            continue
+        keys[job] = job_key(job)
+        with trace.span("cache load", "runner", job=job.name):
+            answer = cache.get(keys[job]) if cache and not memory else None
+        if answer is not None:
+            results[job] = Result(job, answer, 0.0, cached=True)
+        else:
+            batches.setdefault((job.day, job.input_path), []).append(job)
+
+    pending = list(batches.values())
+    running: dict[Connection, tuple[list[Job], multiprocessing.Process, float]] = {}
+
+    def deadline() -> float:
+        return time.monotonic() + timeout if timeout else float("inf")
+
+    def stop(conn: Connection, error: str) -> None:
+        remaining, process, _ = running.pop(conn)
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        for job in remaining:
+            results[job] = Result(job, None, 0.0, error=error)
+
+    while pending or running:
+        while pending and len(running) < workers:
+            batch = pending.pop(0)
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=execute, args=(batch, sender, parsed_cache, memory)
+            )
+            process.start()
+            sender.close()
+            running[receiver] = (list(batch), process, deadline())
+
+        next_deadline = min(due for _, _, due in running.values())
+        wait_for = max(0.0, next_deadline - time.monotonic())
+        ready = wait(list(running), None if wait_for == float("inf") else wait_for)
+
+        for conn in ready:
+            remaining, process, _ = running[conn]  # type: ignore[index]
+            try:
+                answer, seconds, error, reports, memos = conn.recv()  # type: ignore[union-attr]
+            except EOFError:
+                process.join()
+                stop(conn, f"exit code {process.exitcode}")  # type: ignore[arg-type]
+                continue
+
+            job = remaining.pop(0)
+            results[job] = Result(
+                job, answer, seconds, error=error, memory=reports, memos=memos
+            )
+            if cache and answer is not None:
+                with trace.span("cache store", "runner", job=job.name):
+                    cache.put(keys[job], job, answer)
+            if remaining:
+                running[conn] = (remaining, process, deadline())  # type: ignore[index]
+            else:
+                stop(conn, "")  # type: ignore[arg-type]
+
+        now = time.monotonic()
+        for conn, (_, _, due) in list(running.items()):
+            if now >= due:
+                stop(conn, "timed out")
+
+    return [results[job] for job in jobs]
+
+
+def format_result(result: Result) -> str:
+    label = f"{result.job.name:<12}"
+    if result.error:
+        return f"{label} error: {result.error}"
+    source = "cached" if result.cached else f"{result.seconds:.3f} s"
+    return f"{label} {result.answer:<20} {source}"
+
+
+def run(
+    days: list[int],
+    stars: list[int],
+    input_path: Path | None = None,
+    workers: int | None = None,
+    timeout: float | None = None,
+    use_cache: bool = True,
+    memory_output: Path | None = None,
+    trace_output: Path | None = None,
+    memo_stats: bool = False,
+) -> int:
+    """Runs and prints the selection; the exit status is 1 if any job failed.
+    With `memory_output`, each phase's memory is measured, summarised on
+    stderr and written there as JSON. With `trace_output`, a Chrome trace
+    of the run is written there. With `memo_stats`, each solved star's use
+    of memoized functions is listed on stderr."""
+
+    start = time.perf_counter()
+    spool = TRACE_SPOOL / str(os.getpid())
+    if trace_output is not None:
+        trace.enable(spool)
+        trace.name_process("runner")
+
+    with trace.span("select jobs", "runner"):
+        jobs = select_jobs(days, stars, input_path)
+    memory = memory_output is not None
+    cache = ResultCache() if use_cache else None
+    parsed_cache = ParsedCache() if use_cache and not memory else None
+    results = run_jobs(jobs, workers, timeout, cache, parsed_cache, memory)
+    for result in results:
+        print(format_result(result))
+    print(
+        f"{len(results)} jobs in {time.perf_counter() - start:.3f} s", file=sys.stderr
+    )
+
+    if memo_stats:
+        for result in results:
+            for stats in result.memos:
+                print(f"{result.job.name}  {memo.format_stats(stats)}", file=sys.stderr)
+
+    if memory_output is not None:
+        from harness.memory import format_phase, write_reports
+
+        reports = [report for result in results for report in result.memory]
+        for report in reports:
+            print(format_phase(report), file=sys.stderr)
+        write_reports(memory_output, reports)
+        print(f"wrote {memory_output}", file=sys.stderr)
+
+    if trace_output is not None:
+        trace.flush()
+        trace.write(trace_output, trace.collect(spool))
+        trace.disable()
+        shutil.rmtree(spool, ignore_errors=True)
+        print(f"wrote {trace_output}", file=sys.stderr)
+
+    return 1 if any(result.error for result in results) else 0
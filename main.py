@@ -1,5 +1,121 @@
-from demapples.runner import run
+import argparse
+from pathlib import Path
+import sys
+
+from days.render import FORMATS
+from harness.bench import parse_days
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "days", nargs="?", default="12", help='e.g. "12", "1-5,8" or "all"'
+    )
+    parser.add_argument("--star", type=int, choices=(1, 2), help="default: both")
+    parser.add_argument("--input", type=Path, help="default: days/dayN/input.txt")
+    parser.add_argument("--workers", type=int, help="default: one per CPU")
+    parser.add_argument("--timeout", type=float, help="seconds per star")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="ignore and don't store answers"
+    )
+    parser.add_argument(
+        "--memory",
+        type=Path,
+        nargs="?",
+        const=Path("bench/memory.json"),
+        help="measure memory per phase and write it as JSON (default: %(const)s)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        nargs="?",
+        const=Path("profile/trace.json"),
+        help="write a Chrome trace of the run's phases (default: %(const)s)",
+    )
+    parser.add_argument(
+        "--memo-stats",
+        action="store_true",
+        help="report each star's memoization hits, misses and cache sizes",
+    )
+    parser.add_argument(
+        "--import-time",
+        action="store_true",
+        help="report each selected day's cold import time instead of answers",
+    )
+    parser.add_argument(
+        "--render",
+        type=Path,
+        nargs="?",
+        const=Path("render"),
+        help="draw each selected day that has a renderer into this directory"
+        " instead of answering (default: %(const)s)",
+    )
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument(
+        "--submit", action="store_true", help="run through the demapples runner"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="write cProfile stats and collapsed stacks instead of answers",
+    )
+    parser.add_argument("--profile-dir", type=Path, default=Path("profile"))
+    parser.add_argument(
+        "--top", type=int, help="functions (or imports) to report, default 20 (5)"
+    )
+    args = parser.parse_args(argv)
+
+    days = parse_days(args.days)
+    stars = [args.star] if args.star else [1, 2]
+
+    if args.profile:
+        from harness.profile import profile_day
+
+        for day in days:
+            input_path = args.input or Path(f"days/day{day}/input.txt")
+            profile_day(day, stars, input_path, args.profile_dir, args.top or 20)
+        return 0
+
+    if args.import_time:
+        from harness.importtime import report
+
+        print("\n".join(report(days, args.top or 5)))
+        return 0
+
+    if args.render:
+        import importlib
+
+        for day in days:
+            module = importlib.import_module(f"days.day{day}")
+            if not hasattr(module, "render"):
+                continue
+            input_path = args.input or Path(f"days/day{day}/input.txt")
+            output = args.render / f"day{day}.{args.format}"
+            module.render(input_path.read_text(), output)
+            print(output)
+        return 0
+
+    if args.submit:
+        from demapples.runner import run
+
+        for day in days:
+            run(2025, day)
+        return 0
+
+    from harness.runner import run
+
+    return run(
+        days,
+        stars,
+        args.input,
+        args.workers,
+        args.timeout,
+        not args.no_cache,
+        args.memory,
+        args.trace,
+        args.memo_stats,
+    )
 
 
 if __name__ == "__main__":
-    run(2025, 12)
+    sys.exit(main())